@@ -1,234 +1,862 @@
 # ai_services.py
-import openai
 import os
 import json
-from dotenv import load_dotenv
-from pathlib import Path # For easier path manipulation
-
-# --- Enhanced .env loading and debugging ---
-# This section tries to locate and load the .env file robustly.
-# It assumes ai_services.py is in the root of your project (e.g., cv_job_matcher/ai_services.py)
-# and your .env file is also in the root (cv_job_matcher/.env).
-
-# Get the directory where this ai_services.py file is located.
-# Path(__file__) gives the path to the current file (ai_services.py).
-# .parent gives its directory.
-current_script_directory = Path(__file__).resolve().parent
-# Assume the .env file is in the same directory as this script.
-# This is a common setup if your project root contains both ai_services.py and .env
-dotenv_path_to_try = current_script_directory / ".env"
-
-print(f"DEBUG [ai_services.py]: Current Working Directory (os.getcwd()): {os.getcwd()}")
-print(f"DEBUG [ai_services.py]: Path to this script (__file__): {Path(__file__).resolve()}")
-print(f"DEBUG [ai_services.py]: Calculated current_script_directory: {current_script_directory}")
-print(f"DEBUG [ai_services.py]: Attempting to load .env from specific path: {dotenv_path_to_try}")
-
-if dotenv_path_to_try.exists():
-    print(f"DEBUG [ai_services.py]: Found .env file at: {dotenv_path_to_try}")
-    # Load the .env file from the specific path.
-    # override=True means if variables are already in the environment (e.g. system-wide),
-    # the ones from .env will take precedence. Useful for ensuring .env is respected.
-    load_dotenv(dotenv_path=dotenv_path_to_try, override=True)
-    print(f"DEBUG [ai_services.py]: load_dotenv() called with specific path: {dotenv_path_to_try}")
-else:
-    print(f"DEBUG [ai_services.py]: .env file NOT found at specific path: {dotenv_path_to_try}")
-    print(f"DEBUG [ai_services.py]: Attempting fallback load_dotenv() (will search CWD and parent dirs).")
-    # If the specific path didn't work, try the default behavior of load_dotenv(),
-    # which searches the current working directory and then parent directories.
-    # This is a fallback in case the path calculation was incorrect for your setup.
-    load_dotenv(override=True)
-    print(f"DEBUG [ai_services.py]: Fallback load_dotenv() called.")
-
-
-# Now, try to get the API key from the environment after attempting to load .env
-OPENAI_API_KEY_FROM_ENV = os.getenv('OPENAI_API_KEY')
-print(f"DEBUG [ai_services.py]: Value of OPENAI_API_KEY after all load attempts: '{OPENAI_API_KEY_FROM_ENV}'")
-# --- End of enhanced .env loading ---
-
-# Initialize OpenAI client within this module
-openai_client = None # Default to None
-
-if OPENAI_API_KEY_FROM_ENV:
-    try:
-        # Use the key retrieved from the environment
-        openai_client = openai.OpenAI(api_key=OPENAI_API_KEY_FROM_ENV)
-        print("✅ OpenAI client initialized successfully (ai_services.py)")
-    except Exception as e:
-        print(f"❌ Error initializing OpenAI client in ai_services.py: {e}")
-        openai_client = None # Ensure client is None if initialization fails
-else:
-    # This message means OPENAI_API_KEY_FROM_ENV was None or empty
-    print("⚠️ OpenAI API key was NOT found in the environment by ai_services.py.")
-    print("   Please ensure:")
-    print("   1. Your .env file is in the project root directory (e.g., alongside app.py).")
-    print("   2. The .env file contains the line: OPENAI_API_KEY=\"your_actual_key_here\"")
-    print("   3. The script has permissions to read the .env file.")
-    print("   (AI services will not function without the API key.)")
+import asyncio
+import time
+import random
+import re
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from cache_utils import LRUCache, SQLiteCache, TieredCache, stable_hash
+from stream_utils import IncrementalJSONFieldParser
+from prompt_utils import compact_cv_text, count_tokens
+from settings import settings
+import metrics
+
+# The .env file is loaded once by settings.py. The openai package takes most of the app's import
+# time, so it and the clients below are only loaded when the first OpenAI call is made.
+OPENAI_API_KEY_FROM_ENV = settings.openai_api_key
+
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
+
+def _openai():
+    """The openai package, imported on first use."""
+    import openai
+    return openai
+
+
+def get_openai_client():
+    """The shared OpenAI client, created on first use; None if OPENAI_API_KEY is not set or it can't be created."""
+    global _openai_client
+    if _openai_client is None and OPENAI_API_KEY_FROM_ENV:
+        with _openai_client_lock:
+            if _openai_client is None:
+                try:
+                    _openai_client = _openai().OpenAI(api_key=OPENAI_API_KEY_FROM_ENV)
+                    print("✅ OpenAI client initialized successfully (ai_services.py)")
+                except Exception as e:
+                    print(f"❌ Error initializing OpenAI client in ai_services.py: {e}")
+    return _openai_client
+
+
+def _require_client(purpose):
+    client = get_openai_client()
+    if client is None:
+        raise Exception(f"OpenAI client is not initialized in ai_services. Cannot {purpose}.")
+    return client
+
+
+# --- Scoring engine configuration ---
+# How many scoring calls may be in flight at once, how long a single call may take,
+# and how many times a rate-limited (429) call is retried before giving up.
+SCORING_MAX_IN_FLIGHT = settings.get_int('SCORING_MAX_IN_FLIGHT', 8)
+SCORING_CALL_TIMEOUT = settings.get_float('SCORING_CALL_TIMEOUT', 20)
+SCORING_MAX_RETRIES = settings.get_int('SCORING_MAX_RETRIES', 3)
+SCORING_BACKOFF_BASE = settings.get_float('SCORING_BACKOFF_BASE', 1.0)
+# Jobs packed into one scoring prompt; 1 disables batching (one call per job).
+SCORING_BATCH_SIZE = settings.get_int('SCORING_BATCH_SIZE', 5)
+# (candidate, job) pairs packed into one multi-candidate scoring prompt (bulk matching).
+SCORING_PAIRS_PER_CALL = settings.get_int('SCORING_PAIRS_PER_CALL', 12)
+
+# --- Prompt compaction ---
+# CV text is tidied and cut to a token budget (see prompt_utils.compact_cv_text) before it goes
+# into the analysis and tailoring prompts. Every prompt starts with its fixed instructions and
+# puts the variable parts last, so repeated calls share a prefix for OpenAI's prompt caching.
+PROMPT_COMPACTION_ENABLED = settings.get_bool('PROMPT_COMPACTION_ENABLED', True)
+CV_ANALYSIS_MAX_CV_TOKENS = settings.get_int('CV_ANALYSIS_MAX_CV_TOKENS', 1500)
+TAILOR_MAX_CV_TOKENS = settings.get_int('TAILOR_MAX_CV_TOKENS', 3000)
+
+
+def _cv_text_for_prompt(cv_text, max_tokens, stage):
+    """Compacted CV text for a prompt; the tokens saved are recorded in the metrics and request trace."""
+    if not PROMPT_COMPACTION_ENABLED:
+        return cv_text
+    compacted = compact_cv_text(cv_text, max_tokens)
+    original_tokens, compacted_tokens = count_tokens(cv_text), count_tokens(compacted)
+    metrics.record_prompt_compaction(stage, original_tokens, compacted_tokens)
+    if compacted_tokens < original_tokens:
+        print(f"✂️ CV text for {stage}: {original_tokens} → {compacted_tokens} tokens")
+    return compacted
+
+
+def _retry_after_seconds(error, attempt):
+    """Seconds to wait after a 429: the server's Retry-After if given, else exponential backoff with jitter."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    retry_after = headers.get('retry-after') if hasattr(headers, 'get') else None
+    if retry_after:
+        try:
+            return min(float(retry_after), 60.0)
+        except ValueError:
+            pass
+    return SCORING_BACKOFF_BASE * (2 ** attempt) + random.uniform(0, SCORING_BACKOFF_BASE)
+
+
+def _create_completion_with_backoff(timeout=None, max_retries=None, stage='scoring_call', **kwargs):
+    """chat.completions.create with a per-call timeout and 429-aware retries."""
+    retries = SCORING_MAX_RETRIES if max_retries is None else max_retries
+    # Retries are handled here so the SDK's own retry loop doesn't multiply them.
+    client = _require_client('score jobs').with_options(timeout=timeout or SCORING_CALL_TIMEOUT, max_retries=0)
+    with metrics.timed(stage):
+        for attempt in range(retries + 1):
+            try:
+                response = client.chat.completions.create(**kwargs)
+                metrics.record_openai_usage(response, kwargs.get('model'))
+                return response
+            except _openai().RateLimitError as e:
+                metrics.inc('openai_rate_limited', 1, 'OpenAI 429 responses', stage=stage)
+                if attempt >= retries:
+                    raise
+                wait_seconds = _retry_after_seconds(e, attempt)
+                print(f"⏳ OpenAI rate limited (429), retrying in {wait_seconds:.1f}s (attempt {attempt + 1}/{retries})")
+                time.sleep(wait_seconds)
+
+
+# --- CV analysis cache ---
+# Keyed by a hash of the normalized CV text plus the model and prompt version, so a repeat
+# upload of the same CV skips the LLM. Bump CV_ANALYSIS_PROMPT_VERSION whenever the analysis
+# prompt changes so stale results are not served. Set CV_CACHE_DB_PATH to "" to keep it in memory only.
+CV_ANALYSIS_MODEL = "gpt-4o"
+CV_ANALYSIS_PROMPT_VERSION = "2"
+CV_CACHE_TTL_SECONDS = settings.get_float('CV_CACHE_TTL_SECONDS', 7 * 24 * 3600)
+CV_CACHE_MEMORY_ENTRIES = settings.get_int('CV_CACHE_MEMORY_ENTRIES', 256)
+CV_CACHE_DISK_ENTRIES = settings.get_int('CV_CACHE_DISK_ENTRIES', 5000)
+CV_CACHE_DB_PATH = settings.get('CV_CACHE_DB_PATH', os.path.join('cache', 'ai_cache.sqlite3'))
+
+cv_analysis_cache = TieredCache(
+    LRUCache(max_entries=CV_CACHE_MEMORY_ENTRIES, ttl_seconds=CV_CACHE_TTL_SECONDS),
+    SQLiteCache(CV_CACHE_DB_PATH, table='cv_analysis', ttl_seconds=CV_CACHE_TTL_SECONDS,
+                max_entries=CV_CACHE_DISK_ENTRIES) if CV_CACHE_DB_PATH else None
+)
+
+def normalize_cv_text(cv_text):
+    """Collapses whitespace so the same CV extracted with different spacing hashes the same."""
+    return re.sub(r'\s+', ' ', cv_text or '').strip()
+
+def cv_analysis_cache_key(cv_text):
+    return stable_hash(normalize_cv_text(cv_text), CV_ANALYSIS_MODEL, CV_ANALYSIS_PROMPT_VERSION)
+
+
+# --- Match score cache ---
+# The same postings come back across searches and across users with similar profiles, so
+# scores are memoized per (canonical job URL, fingerprint of the cv_analysis fields in the prompt).
+# The SQLite tier (same database as the CV analysis cache by default) is shared by all worker
+# processes; set SCORE_CACHE_DB_PATH to "" to keep scores in memory only.
+SCORE_CACHE_ENABLED = settings.get_bool('SCORE_CACHE_ENABLED', True)
+SCORE_CACHE_TTL_SECONDS = settings.get_float('SCORE_CACHE_TTL_SECONDS', 24 * 3600)
+SCORE_CACHE_MAX_ENTRIES = settings.get_int('SCORE_CACHE_MAX_ENTRIES', 20000)
+SCORE_CACHE_DISK_ENTRIES = settings.get_int('SCORE_CACHE_DISK_ENTRIES', 200000)
+SCORE_CACHE_DB_PATH = settings.get('SCORE_CACHE_DB_PATH', CV_CACHE_DB_PATH)
+SCORING_PROMPT_VERSION = "2"
+
+match_score_cache = TieredCache(
+    LRUCache(max_entries=SCORE_CACHE_MAX_ENTRIES, ttl_seconds=SCORE_CACHE_TTL_SECONDS),
+    SQLiteCache(SCORE_CACHE_DB_PATH, table='match_scores', ttl_seconds=SCORE_CACHE_TTL_SECONDS,
+                max_entries=SCORE_CACHE_DISK_ENTRIES) if SCORE_CACHE_DB_PATH and SCORE_CACHE_ENABLED else None
+)
+
+# cv_analysis fields that go into the scoring prompt; nothing else affects the score.
+_SCORING_PROFILE_FIELDS = ('current_role', 'experience_years', 'technical_skills', 'industry', 'career_level', 'target_job_titles')
+
+def candidate_profile_fingerprint(cv_analysis):
+    """Stable hash of the cv_analysis fields used by the scoring prompt (case/whitespace-insensitive)."""
+    parts = []
+    for field in _SCORING_PROFILE_FIELDS:
+        value = cv_analysis.get(field)
+        if isinstance(value, (list, tuple)):
+            value = '|'.join(str(item) for item in value)
+        parts.append(re.sub(r'\s+', ' ', str(value if value is not None else '')).strip().lower())
+    return stable_hash(SCORING_PROMPT_VERSION, *parts)
+
+def _match_score_cache_key(job, profile_fingerprint):
+    job_url = job.get('url')
+    return stable_hash(job_url, profile_fingerprint) if job_url else None
+
+def _get_cached_match_score(job, cv_analysis):
+    """Returns the cached score (and sets job['match_reasoning']) or None on a miss."""
+    cache_key = _match_score_cache_key(job, candidate_profile_fingerprint(cv_analysis))
+    cached = match_score_cache.get(cache_key) if cache_key else None
+    if cached is None:
+        return None
+    job['match_reasoning'] = cached['reasoning']
+    return cached['score']
+
+def _store_match_score(job, cv_analysis, score):
+    cache_key = _match_score_cache_key(job, candidate_profile_fingerprint(cv_analysis))
+    if cache_key:
+        match_score_cache.set(cache_key, {'score': score, 'reasoning': job.get('match_reasoning', '')})
 
 
 # --- Your working AI functions (copied from your provided code) ---
 
-def analyze_cv_with_ai(cv_text):
-    if not openai_client:
-        # This exception will be caught by the calling route in app.py
-        raise Exception("OpenAI client is not initialized in ai_services. Cannot analyze CV.")
-    
-    prompt = f"""
-    Analyze this CV and extract information for LinkedIn job search:
-    CV TEXT:
-    {cv_text}
-    Extract:
-    1. Current job title/role (be very specific)
-    2. Years of experience
-    3. Top 5 technical skills (only explicitly mentioned skills)
-    4. Industry/field (based on actual experience)
-    5. Career level (Junior/Mid/Senior/Executive)
-    6. What job titles they should search for on LinkedIn (5 realistic titles matching experience)
-    IMPORTANT: 
-    - Only suggest job titles directly related to their experience.
-    - Be precise and accurate based on the CV content.
-    Respond ONLY with valid JSON:
-    {{
-        "current_role": "Current job title",
-        "experience_years": 5,
-        "technical_skills": ["skill1", "skill2", "skill3", "skill4", "skill5"],
-        "industry": "Industry name",
-        "career_level": "Senior",
-        "target_job_titles": ["title1", "title2", "title3", "title4", "title5"]
-    }}
-    """
+# Fixed part of the prompt, sent first so it is identical for every CV
+_CV_ANALYSIS_INSTRUCTIONS = """Analyze the CV below and extract information for LinkedIn job search.
+Extract:
+1. Current job title/role (be very specific)
+2. Years of experience
+3. Top 5 technical skills (only explicitly mentioned skills)
+4. Industry/field (based on actual experience)
+5. Career level (Junior/Mid/Senior/Executive)
+6. What job titles they should search for on LinkedIn (5 realistic titles matching experience)
+IMPORTANT:
+- Only suggest job titles directly related to their experience.
+- Be precise and accurate based on the CV content.
+Respond ONLY with valid JSON:
+{
+    "current_role": "Current job title",
+    "experience_years": 5,
+    "technical_skills": ["skill1", "skill2", "skill3", "skill4", "skill5"],
+    "industry": "Industry name",
+    "career_level": "Senior",
+    "target_job_titles": ["title1", "title2", "title3", "title4", "title5"]
+}"""
+
+def _cached_cv_analysis(cache_key):
+    cached_analysis = cv_analysis_cache.get(cache_key)
+    if cached_analysis is None:
+        return None
+    print("♻️ CV analysis served from cache (no OpenAI call).")
+    return copy.deepcopy(cached_analysis)
+
+def _build_cv_analysis_request(cv_text):
+    """chat.completions.create keyword arguments shared by analyze_cv_with_ai and analyze_cv_with_ai_async."""
+    prompt = f"""{_CV_ANALYSIS_INSTRUCTIONS}
+CV TEXT:
+{_cv_text_for_prompt(cv_text, CV_ANALYSIS_MAX_CV_TOKENS, 'cv_analysis')}"""
+    return dict(
+        model=CV_ANALYSIS_MODEL,
+        messages=[
+            {"role": "system", "content": "You are a career analyst. Extract job search information from CVs."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.1,
+        max_tokens=800,
+        response_format={"type": "json_object"}
+    )
+
+def _parse_cv_analysis_response(response, cache_key, use_cache):
+    metrics.record_openai_usage(response, CV_ANALYSIS_MODEL)
+    content = response.choices[0].message.content.strip()
+    cv_analysis = json.loads(content)
+    if use_cache and isinstance(cv_analysis, dict):
+        cv_analysis_cache.set(cache_key, copy.deepcopy(cv_analysis))
+    return cv_analysis
+
+def analyze_cv_with_ai(cv_text, use_cache=True):
+    cache_key = cv_analysis_cache_key(cv_text)
+    cached_analysis = _cached_cv_analysis(cache_key) if use_cache else None
+    if cached_analysis is not None:
+        return cached_analysis
+
+    # This exception will be caught by the calling route in app.py
+    client = _require_client('analyze CV')
+
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a career analyst. Extract job search information from CVs."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,
-            max_tokens=800,
-            response_format={"type": "json_object"}
-        )
-        content = response.choices[0].message.content.strip()
-        return json.loads(content)
+        request_kwargs = _build_cv_analysis_request(cv_text)
+        with metrics.timed('cv_analysis_call'):
+            response = client.chat.completions.create(**request_kwargs)
+        return _parse_cv_analysis_response(response, cache_key, use_cache)
     except Exception as e:
         print(f"AI analysis failed: {e}")
         # Re-raise the exception so the calling function in app.py can handle it and return a proper JSON error
         raise
 
-def calculate_job_match_score(job, cv_analysis):
-    if not openai_client:
+def _job_description_for_scoring(job):
+    job_description_for_scoring = job.get('description', f"{job.get('title')} at {job.get('company')}")
+    if "Details for" in job_description_for_scoring and "available on LinkedIn" in job_description_for_scoring:
+        job_description_for_scoring = f"Seeking a {job.get('title')} at {job.get('company')} in {job.get('location', 'specified location')}."
+    return job_description_for_scoring
+
+# Fixed prompt parts for the scoring calls; they come first so every call in a search shares them
+_SCORING_SYSTEM_MESSAGE = "You are a highly efficient career matching expert. Evaluate job-candidate fit and provide a concise score and reasoning. Be strict with `is_relevant` if the job is clearly unsuitable."
+_SCORING_INSTRUCTIONS = """Analyze if the job below is a good match for the candidate below.
+Evaluate the match. Respond with ONLY a JSON object:
+{"match_score": 0.85, "reasoning": "Brief explanation (max 20 words).", "is_relevant": true}"""
+_BATCH_SCORING_SYSTEM_MESSAGE = "You are a highly efficient career matching expert. Evaluate job-candidate fit for each job and provide a concise score and reasoning per job ID. Be strict with `is_relevant` if a job is clearly unsuitable."
+_BATCH_SCORING_INSTRUCTIONS = """Analyze if each of the jobs below is a good match for the candidate below.
+Evaluate every job independently. Respond with ONLY a JSON object containing one result per job ID:
+{"results": [{"id": "1", "match_score": 0.85, "reasoning": "Brief explanation (max 20 words).", "is_relevant": true}]}"""
+_PAIR_SCORING_SYSTEM_MESSAGE = "You are a highly efficient career matching expert. Evaluate job-candidate fit for each listed pair and provide a concise score and reasoning per pair ID. Be strict with `is_relevant` if a job is clearly unsuitable for that candidate."
+_PAIR_SCORING_INSTRUCTIONS = """Analyze how well each candidate/job pair listed below matches.
+Evaluate every pair independently. Respond with ONLY a JSON object containing one result per pair ID:
+{"results": [{"id": "P1", "match_score": 0.85, "reasoning": "Brief explanation (max 20 words).", "is_relevant": true}]}"""
+
+def _candidate_profile_lines(cv_analysis):
+    return f"""- Current Role: {cv_analysis.get('current_role', 'N/A')}
+- Years of Experience: {cv_analysis.get('experience_years', 'N/A')}
+- Technical Skills: {', '.join(cv_analysis.get('technical_skills', []))}
+- Industry: {cv_analysis.get('industry', 'N/A')}
+- Career Level: {cv_analysis.get('career_level', 'N/A')}
+- Target Roles: {', '.join(cv_analysis.get('target_job_titles', []))}"""
+
+def _job_summary_lines(job):
+    return f"""- Title: {job.get('title', 'N/A')}
+- Company: {job.get('company', 'N/A')}
+- Location: {job.get('location', 'N/A')}
+- Description Snippet: {_job_description_for_scoring(job)[:300]}"""
+
+def calculate_job_match_score(job, cv_analysis, use_cache=None, check_cache=True):
+    # check_cache=False still stores the result; callers that already looked the job up use it
+    use_cache = SCORE_CACHE_ENABLED if use_cache is None else use_cache
+    if use_cache and check_cache:
+        cached_score = _get_cached_match_score(job, cv_analysis)
+        if cached_score is not None:
+            print(f"♻️ Cached match for '{job.get('title')}': {cached_score:.0%}")
+            return cached_score
+
+    if get_openai_client() is None:
         print("⚠️ OpenAI client not initialized (ai_services) - cannot calculate match scores, returning default 0.5")
         job['match_reasoning'] = 'OpenAI client not available for scoring (ai_services).'
         return 0.5 # Return a default float score
     
-    job_description_for_scoring = job.get('description', f"{job.get('title')} at {job.get('company')}")
-    if "Details for" in job_description_for_scoring and "available on LinkedIn" in job_description_for_scoring:
-        job_description_for_scoring = f"Seeking a {job.get('title')} at {job.get('company')} in {job.get('location', 'specified location')}."
+    try:
+        response = _create_completion_with_backoff(**_build_scoring_request(job, cv_analysis))
+        return _parse_scoring_response(response, job, cv_analysis, use_cache)
+    except Exception as e:
+        return _scoring_error_score(job, e)
+
+def _build_scoring_request(job, cv_analysis):
+    # Instructions, then the candidate (the same for every job in a search), then the job
+    prompt = f"""{_SCORING_INSTRUCTIONS}
+CANDIDATE PROFILE:
+{_candidate_profile_lines(cv_analysis)}
+JOB POSTING (brief summary):
+{_job_summary_lines(job)}"""
+    return dict(
+        model="gpt-4o", # Consistent with your working file
+        messages=[
+            {"role": "system", "content": _SCORING_SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.05, max_tokens=150,
+        response_format={"type": "json_object"}
+    )
+
+def _parse_scoring_response(response, job, cv_analysis, use_cache):
+    result_content = response.choices[0].message.content.strip()
+    match_data = json.loads(result_content)
+    job['match_reasoning'] = match_data.get('reasoning', 'AI could not provide a reason.') # Set reasoning on the job object
+    
+    print(f"🤖 AI Match for '{job.get('title')}': {match_data.get('match_score', 0):.0%} - {match_data.get('reasoning', '')} (Relevant: {match_data.get('is_relevant', True)})")
+    
+    match_score = 0.0 if not match_data.get('is_relevant', True) else float(match_data.get('match_score', 0.3)) # Float score
+    if use_cache:
+        _store_match_score(job, cv_analysis, match_score)
+    return match_score
+
+def _scoring_error_score(job, e):
+    print(f"❌ AI matching error for job '{job.get('title', 'Unknown Job')}': {e}. Returning default score 0.4")
+    job['match_reasoning'] = 'Error during AI scoring.' # Set reasoning on error
+    return 0.4 # Return default float score
 
-    prompt = f"""
-    Analyze if this job is a good match for this candidate:
-    CANDIDATE PROFILE:
-    - Current Role: {cv_analysis.get('current_role', 'N/A')}
-    - Years of Experience: {cv_analysis.get('experience_years', 'N/A')}
-    - Technical Skills: {', '.join(cv_analysis.get('technical_skills', []))}
-    - Industry: {cv_analysis.get('industry', 'N/A')}
-    - Career Level: {cv_analysis.get('career_level', 'N/A')}
-    - Target Roles: {', '.join(cv_analysis.get('target_job_titles', []))}
-    JOB POSTING (brief summary):
-    - Title: {job.get('title', 'N/A')}
-    - Company: {job.get('company', 'N/A')}
-    - Location: {job.get('location', 'N/A')}
-    - Description Snippet: {job_description_for_scoring[:300]} 
-    Evaluate the match. Respond with ONLY a JSON object:
-    {{
-        "match_score": 0.85,
-        "reasoning": "Brief explanation (max 20 words).",
-        "is_relevant": true
-    }}
+def _valid_batch_entry(entry):
+    """True if one entry of a batch scoring response has the fields we need with sane types."""
+    if not isinstance(entry, dict):
+        return False
+    score = entry.get('match_score')
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0.0 <= float(score) <= 1.0:
+        return False
+    return isinstance(entry.get('reasoning'), str) and isinstance(entry.get('is_relevant'), bool)
+
+def calculate_job_match_scores_batch(jobs, cv_analysis, use_cache=None, check_cache=True):
+    """
+    Scores several jobs against one candidate profile in a single LLM call.
+    Returns a list of float scores in the same order as `jobs` and sets job['match_reasoning']
+    like calculate_job_match_score. Any job whose entry is missing or malformed in the
+    response (or the whole batch, if the call fails) is re-scored with calculate_job_match_score.
     """
+    if not jobs:
+        return []
+    use_cache = SCORE_CACHE_ENABLED if use_cache is None else use_cache
+    if get_openai_client() is None or len(jobs) == 1:
+        return [calculate_job_match_score(job, cv_analysis, use_cache=use_cache, check_cache=check_cache) for job in jobs]
+
+    all_jobs_by_id = {str(i + 1): job for i, job in enumerate(jobs)}
+    scores_by_id = _cached_batch_scores(all_jobs_by_id, cv_analysis) if use_cache and check_cache else {}
+    if len(scores_by_id) == len(jobs):
+        return [scores_by_id[job_id] for job_id in all_jobs_by_id]
+    jobs_by_id = {job_id: job for job_id, job in all_jobs_by_id.items() if job_id not in scores_by_id}
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o", # Consistent with your working file
+        response = _create_completion_with_backoff(**_build_batch_scoring_request(jobs_by_id, cv_analysis))
+        _parse_batch_scoring_response(response, jobs_by_id, scores_by_id, cv_analysis, use_cache)
+    except Exception as e:
+        print(f"❌ AI batch matching error for {len(jobs_by_id)} jobs: {e}. Falling back to single-job scoring.")
+
+    for job_id in _missing_batch_ids(jobs_by_id, scores_by_id):
+        scores_by_id[job_id] = calculate_job_match_score(jobs_by_id[job_id], cv_analysis, use_cache=use_cache, check_cache=False)
+    return [scores_by_id[job_id] for job_id in all_jobs_by_id]
+
+def _cached_batch_scores(jobs_by_id, cv_analysis):
+    scores_by_id = {}
+    for job_id, job in jobs_by_id.items():
+        cached_score = _get_cached_match_score(job, cv_analysis)
+        if cached_score is not None:
+            scores_by_id[job_id] = cached_score
+    if len(scores_by_id) == len(jobs_by_id):
+        print(f"♻️ All {len(jobs_by_id)} batch match scores served from cache.")
+    return scores_by_id
+
+def _build_batch_scoring_request(jobs_by_id, cv_analysis):
+    job_summaries = "\n".join(f"[JOB {job_id}]\n{_job_summary_lines(job)}" for job_id, job in jobs_by_id.items())
+    prompt = f"""{_BATCH_SCORING_INSTRUCTIONS}
+CANDIDATE PROFILE:
+{_candidate_profile_lines(cv_analysis)}
+JOB POSTINGS (brief summaries):
+{job_summaries}"""
+    return dict(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": _BATCH_SCORING_SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.05, max_tokens=60 + 90 * len(jobs_by_id),
+        response_format={"type": "json_object"}
+    )
+
+def _parse_batch_scoring_response(response, jobs_by_id, scores_by_id, cv_analysis, use_cache):
+    """Adds the valid entries of a batch response to scores_by_id (and sets each job's match_reasoning)."""
+    batch_data = json.loads(response.choices[0].message.content.strip())
+    results = batch_data.get('results', []) if isinstance(batch_data, dict) else []
+    for entry in results if isinstance(results, list) else []:
+        job_id = str(entry.get('id')) if isinstance(entry, dict) else None
+        if job_id not in jobs_by_id or job_id in scores_by_id or not _valid_batch_entry(entry):
+            continue
+        job = jobs_by_id[job_id]
+        job['match_reasoning'] = entry['reasoning'] or 'AI could not provide a reason.'
+        print(f"🤖 AI Match for '{job.get('title')}': {float(entry['match_score']):.0%} - {entry['reasoning']} (Relevant: {entry['is_relevant']}) [batch]")
+        scores_by_id[job_id] = float(entry['match_score']) if entry['is_relevant'] else 0.0
+        if use_cache:
+            _store_match_score(job, cv_analysis, scores_by_id[job_id])
+
+def _missing_batch_ids(jobs_by_id, scores_by_id):
+    missing_ids = [job_id for job_id in jobs_by_id if job_id not in scores_by_id]
+    if missing_ids and len(missing_ids) < len(jobs_by_id):
+        print(f"⚠️ Batch response missing or malformed for job IDs {missing_ids}, scoring them individually.")
+    return missing_ids
+
+def score_job_batch(batch, cv_analysis, use_cache=None, check_cache=True):
+    """
+    Scores one batch of jobs in a single call (or a single-job call for a batch of one).
+    Never raises: returns a list of scores in batch order, with None for every job if scoring failed.
+    Meant to be submitted to a thread pool by callers that schedule their own batches.
+    """
+    try:
+        if len(batch) == 1:
+            return [calculate_job_match_score(batch[0], cv_analysis, use_cache=use_cache, check_cache=check_cache)]
+        return calculate_job_match_scores_batch(batch, cv_analysis, use_cache=use_cache, check_cache=check_cache)
+    except Exception as e:
+        print(f"⚠️ Scoring failed for {len(batch)} job(s) starting with '{batch[0].get('title', 'Untitled Job')}': {e}")
+        return [None] * len(batch)
+
+def _plan_scoring_batches(jobs, cv_analysis, batch_size, use_cache):
+    """Returns (scores with cache hits filled in, batches of the remaining job indexes)."""
+    scores = [None] * len(jobs)
+    pending_indexes = []
+    for index, job in enumerate(jobs):
+        cached_score = _get_cached_match_score(job, cv_analysis) if use_cache else None
+        if cached_score is not None:
+            scores[index] = cached_score
+        else:
+            pending_indexes.append(index)
+    if use_cache:
+        print(f"♻️ Match score cache: {len(jobs) - len(pending_indexes)}/{len(jobs)} hits")
+    batch_size = max(1, batch_size or SCORING_BATCH_SIZE)
+    return scores, [pending_indexes[i:i + batch_size] for i in range(0, len(pending_indexes), batch_size)]
+
+def score_jobs_concurrently(jobs, cv_analysis, max_in_flight=None, batch_size=None, use_cache=None):
+    """
+    Scores jobs using a bounded thread pool, `batch_size` jobs per LLM call
+    (calculate_job_match_scores_batch; 1 means one calculate_job_match_score call per job).
+    Cached scores are resolved first so only cache misses are sent to OpenAI.
+    Returns a list of scores in the same order as `jobs`; an entry is None if scoring
+    that job raised, so the caller can apply its own default.
+    """
+    if not jobs:
+        return []
+    use_cache = SCORE_CACHE_ENABLED if use_cache is None else use_cache
+    scores, batches = _plan_scoring_batches(jobs, cv_analysis, batch_size, use_cache)
+    if not batches:
+        return scores
+    workers = max(1, min(max_in_flight or SCORING_MAX_IN_FLIGHT, len(batches)))
+
+    def _score_batch(batch_indexes):
+        return score_job_batch([jobs[index] for index in batch_indexes], cv_analysis, use_cache=use_cache, check_cache=False)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job-scoring') as executor:
+        # executor.map preserves input order regardless of completion order
+        for batch_indexes, batch_scores in zip(batches, executor.map(metrics.bind_trace(_score_batch), batches)):
+            for index, score in zip(batch_indexes, batch_scores):
+                scores[index] = score
+    return scores
+
+def _score_single_pair(job, cv_analysis, use_cache):
+    # calculate_job_match_score writes match_reasoning onto the job, which other candidates share
+    job_copy = dict(job)
+    score = calculate_job_match_score(job_copy, cv_analysis, use_cache=use_cache, check_cache=False)
+    return score, job_copy.get('match_reasoning', '')
+
+def calculate_pair_match_scores(pairs, use_cache=None):
+    """
+    Scores several (job, cv_analysis) pairs, possibly for different candidates, in one LLM call;
+    each distinct job and candidate profile appears once in the prompt.
+    Returns [(score, reasoning)] in pair order without modifying the jobs. Pairs missing or
+    malformed in the response are re-scored one at a time with calculate_job_match_score.
+    """
+    if not pairs:
+        return []
+    use_cache = SCORE_CACHE_ENABLED if use_cache is None else use_cache
+    if get_openai_client() is None or len(pairs) == 1:
+        return [_score_single_pair(job, cv_analysis, use_cache) for job, cv_analysis in pairs]
+
+    job_ids, candidate_ids = {}, {} # id(obj) -> prompt ID
+    jobs_by_id, candidates_by_id = {}, {}
+    for job, cv_analysis in pairs:
+        if id(job) not in job_ids:
+            job_ids[id(job)] = f"J{len(job_ids) + 1}"
+            jobs_by_id[job_ids[id(job)]] = job
+        if id(cv_analysis) not in candidate_ids:
+            candidate_ids[id(cv_analysis)] = f"C{len(candidate_ids) + 1}"
+            candidates_by_id[candidate_ids[id(cv_analysis)]] = cv_analysis
+    pair_ids = {f"P{i + 1}": (job_ids[id(job)], candidate_ids[id(cv_analysis)]) for i, (job, cv_analysis) in enumerate(pairs)}
+
+    candidate_profiles = "\n".join(f"[CANDIDATE {candidate_id}]\n{_candidate_profile_lines(cv_analysis)}"
+                                   for candidate_id, cv_analysis in candidates_by_id.items())
+    job_summaries = "\n".join(f"[JOB {job_id}]\n{_job_summary_lines(job)}" for job_id, job in jobs_by_id.items())
+    pair_lines = "\n".join(f"- {pair_id}: candidate {candidate_id}, job {job_id}" for pair_id, (job_id, candidate_id) in pair_ids.items())
+    prompt = f"""{_PAIR_SCORING_INSTRUCTIONS}
+CANDIDATE PROFILES:
+{candidate_profiles}
+JOB POSTINGS (brief summaries):
+{job_summaries}
+PAIRS TO EVALUATE:
+{pair_lines}"""
+    results_by_pair = {}
+    try:
+        response = _create_completion_with_backoff(
+            model="gpt-4o",
             messages=[
-                {"role": "system", "content": "You are a highly efficient career matching expert. Evaluate job-candidate fit and provide a concise score and reasoning. Be strict with `is_relevant` if the job is clearly unsuitable."},
+                {"role": "system", "content": _PAIR_SCORING_SYSTEM_MESSAGE},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.05, max_tokens=150,
+            temperature=0.05, max_tokens=60 + 90 * len(pair_ids),
             response_format={"type": "json_object"}
         )
-        result_content = response.choices[0].message.content.strip()
-        match_data = json.loads(result_content)
-        job['match_reasoning'] = match_data.get('reasoning', 'AI could not provide a reason.') # Set reasoning on the job object
-        
-        print(f"🤖 AI Match for '{job.get('title')}': {match_data.get('match_score', 0):.0%} - {match_data.get('reasoning', '')} (Relevant: {match_data.get('is_relevant', True)})")
-        
-        if not match_data.get('is_relevant', True): 
-            return 0.0 # Return float score
-        return float(match_data.get('match_score', 0.3)) # Return float score
+        batch_data = json.loads(response.choices[0].message.content.strip())
+        results = batch_data.get('results', []) if isinstance(batch_data, dict) else []
+        for entry in results if isinstance(results, list) else []:
+            pair_id = str(entry.get('id')) if isinstance(entry, dict) else None
+            if pair_id not in pair_ids or pair_id in results_by_pair or not _valid_batch_entry(entry):
+                continue
+            score = float(entry['match_score']) if entry['is_relevant'] else 0.0
+            results_by_pair[pair_id] = (score, entry['reasoning'] or 'AI could not provide a reason.')
     except Exception as e:
-        print(f"❌ AI matching error for job '{job.get('title', 'Unknown Job')}': {e}. Returning default score 0.4")
-        job['match_reasoning'] = 'Error during AI scoring.' # Set reasoning on error
-        return 0.4 # Return default float score
+        print(f"❌ AI multi-candidate matching error for {len(pairs)} pairs: {e}. Falling back to single-pair scoring.")
 
-def tailor_cv_with_ai(original_cv_text, job_details):
-    if not openai_client:
-        raise Exception("OpenAI client is not initialized in ai_services. Cannot tailor CV.")
-
-    job_description_for_prompt = f"""
-    Title: {job_details.get('title', 'N/A')}
-    Company: {job_details.get('company', 'N/A')}
-    Location: {job_details.get('location', 'N/A')}
-    URL: {job_details.get('url', 'N/A')}
-    Description: {job_details.get('description', 'No detailed description provided. Focus on title, company, and infer requirements.')}
+    scored = []
+    for pair_id, (job, cv_analysis) in zip(pair_ids, pairs):
+        if pair_id in results_by_pair:
+            score, reasoning = results_by_pair[pair_id]
+            if use_cache:
+                _store_match_score(dict(job, match_reasoning=reasoning), cv_analysis, score)
+            scored.append((score, reasoning))
+        else:
+            scored.append(_score_single_pair(job, cv_analysis, use_cache))
+    print(f"🤖 Scored {len(pairs)} candidate/job pairs for {len(candidates_by_id)} candidates in one call "
+          f"({len(pairs) - len(results_by_pair)} re-scored individually)")
+    return scored
+
+def score_pairs_concurrently(pairs, max_in_flight=None, pairs_per_call=None, use_cache=None):
     """
-    prompt_content = f"""
-    Act like a seasoned career consultant and resume expert specializing in crafting tailor-made resumes for job seekers.
-    You have a deep understanding of what hiring managers in various industries look for in candidates, particularly for roles advertised on LinkedIn. Your expertise includes transforming LinkedIn job descriptions into compelling CV content.
-    Here’s my original CV:
-    <CV>
-    {original_cv_text}
-    </CV>
-    Feel free to be creative & expand it based on the job.
-    Your task is to help me land this specific job advertised on LinkedIn. It's very important for my career.
-    Here's the job information:
-    <job_information>
-    {job_description_for_prompt}
-    </job_information>
-    Based on my CV and the job information, please perform the following two tasks:
-    1.  **Generate a Tailored CV**: Write a whole new CV, based on my original one, but meticulously tailored to the provided job information. Use professional CV formatting (use newline characters \\n for line breaks and structure). Make it comprehensive and impactful, highlighting how my experience and skills align with the job requirements. Do not explain what you are doing in this part, just provide the CV text. Make it as strong as possible.
-    2.  **Provide Actionable Recommendations**: Give me back recommendations in bullet points on what specific aspects, skills, or experiences from my original CV I absolutely NEED to highlight, expand upon, or quantify to make my application stand out for THIS particular job. Also, suggest if there are any key things from the job information that I should try to address in my CV, even if they are not explicitly in my original CV.
-    Take a deep breath and work on this problem step-by-step.
-    Respond ONLY with a valid JSON object in the following format, with no explanations or markdown formatting before or after the JSON:
-    {{
-        "tailored_cv": "The full text of the tailored CV, with appropriate formatting (e.g., using newline characters \\n for line breaks).",
-        "recommendations": [
-            "Bullet point recommendation 1...",
-            "Bullet point recommendation 2...",
-            "..."
-        ]
-    }}
+    Like score_jobs_concurrently, for (job, cv_analysis) pairs across several candidates: cached
+    scores are resolved first, the rest go out SCORING_PAIRS_PER_CALL pairs per call (pairs for the
+    same job share a call where possible). Returns [(score, reasoning)] in pair order; an entry is
+    (None, None) if its call raised.
     """
+    if not pairs:
+        return []
+    use_cache = SCORE_CACHE_ENABLED if use_cache is None else use_cache
+    scored = [(None, None)] * len(pairs)
+    pending_indexes = []
+    for index, (job, cv_analysis) in enumerate(pairs):
+        job_copy = dict(job)
+        cached_score = _get_cached_match_score(job_copy, cv_analysis) if use_cache else None
+        if cached_score is not None:
+            scored[index] = (cached_score, job_copy.get('match_reasoning', ''))
+        else:
+            pending_indexes.append(index)
+    if use_cache:
+        print(f"♻️ Match score cache: {len(pairs) - len(pending_indexes)}/{len(pairs)} pair hits")
+    if not pending_indexes:
+        return scored
+
+    pending_indexes.sort(key=lambda index: id(pairs[index][0])) # Group pairs by job
+    pairs_per_call = max(1, pairs_per_call or SCORING_PAIRS_PER_CALL)
+    chunks = [pending_indexes[i:i + pairs_per_call] for i in range(0, len(pending_indexes), pairs_per_call)]
+    workers = max(1, min(max_in_flight or SCORING_MAX_IN_FLIGHT, len(chunks)))
+
+    def _score_chunk(chunk_indexes):
+        try:
+            return calculate_pair_match_scores([pairs[index] for index in chunk_indexes], use_cache=use_cache)
+        except Exception as e:
+            print(f"⚠️ Scoring failed for {len(chunk_indexes)} candidate/job pair(s): {e}")
+            return [(None, None)] * len(chunk_indexes)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pair-scoring') as executor:
+        for chunk_indexes, chunk_scores in zip(chunks, executor.map(metrics.bind_trace(_score_chunk), chunks)):
+            for index, result in zip(chunk_indexes, chunk_scores):
+                scored[index] = result
+    return scored
+
+# Part of the tailored CV cache key (tailoring_service.py): bump TAILOR_PROMPT_VERSION whenever the
+# tailoring prompt changes so stale results are not served.
+TAILORING_MODEL = "gpt-4o"
+TAILOR_PROMPT_VERSION = "1"
+
+# Fixed part of the tailoring prompt; the CV and the job follow it so the prefix is shared between calls
+_TAILORING_INSTRUCTIONS = """Act like a seasoned career consultant and resume expert specializing in crafting tailor-made resumes for job seekers.
+You have a deep understanding of what hiring managers in various industries look for in candidates, particularly for roles advertised on LinkedIn. Your expertise includes transforming LinkedIn job descriptions into compelling CV content.
+Your task is to help me land the specific job advertised on LinkedIn given below in <job_information>. It's very important for my career. My original CV is given below in <CV>.
+Feel free to be creative & expand it based on the job.
+Based on my CV and the job information, please perform the following two tasks:
+1.  **Generate a Tailored CV**: Write a whole new CV, based on my original one, but meticulously tailored to the provided job information. Use professional CV formatting (use newline characters \\n for line breaks and structure). Make it comprehensive and impactful, highlighting how my experience and skills align with the job requirements. Do not explain what you are doing in this part, just provide the CV text. Make it as strong as possible.
+2.  **Provide Actionable Recommendations**: Give me back recommendations in bullet points on what specific aspects, skills, or experiences from my original CV I absolutely NEED to highlight, expand upon, or quantify to make my application stand out for THIS particular job. Also, suggest if there are any key things from the job information that I should try to address in my CV, even if they are not explicitly in my original CV.
+Take a deep breath and work on this problem step-by-step.
+Respond ONLY with a valid JSON object in the following format, with no explanations or markdown formatting before or after the JSON:
+{"tailored_cv": "The full text of the tailored CV, with appropriate formatting (e.g., using newline characters \\n for line breaks).", "recommendations": ["Bullet point recommendation 1...", "Bullet point recommendation 2...", "..."]}"""
+
+def _build_tailoring_request(original_cv_text, job_details):
+    """chat.completions.create keyword arguments shared by tailor_cv_with_ai and tailor_cv_with_ai_stream."""
+    job_description_for_prompt = f"""Title: {job_details.get('title', 'N/A')}
+Company: {job_details.get('company', 'N/A')}
+Location: {job_details.get('location', 'N/A')}
+URL: {job_details.get('url', 'N/A')}
+Description: {job_details.get('description', 'No detailed description provided. Focus on title, company, and infer requirements.')}"""
+    prompt_content = f"""{_TAILORING_INSTRUCTIONS}
+Here's my original CV:
+<CV>
+{_cv_text_for_prompt(original_cv_text, TAILOR_MAX_CV_TOKENS, 'tailoring')}
+</CV>
+Here's the job information:
+<job_information>
+{job_description_for_prompt}
+</job_information>"""
+    return dict(
+        model=TAILORING_MODEL,
+        messages=[
+            {"role": "system", "content": "You are an expert career consultant and resume writer. Follow instructions precisely and provide output in the specified JSON format."},
+            {"role": "user", "content": prompt_content}
+        ],
+        temperature=0.4,
+        max_tokens=3800,
+        response_format={"type": "json_object"}
+    )
+
+def _log_tailoring_error(e, job_details):
+    print(f"❌ AI CV tailoring failed for job '{job_details.get('title', 'Unknown')}': {e}")
+    # Check if it's an OpenAI specific error type for more detailed logging if needed
+    # For newer SDK (>=1.0.0), errors are like openai.APIError, openai.AuthenticationError, etc.
+    if hasattr(e, 'http_status') or "OpenAI" in str(type(e)): # A heuristic check
+         print(f"   OpenAI API Related Error: Status {getattr(e, 'http_status', 'N/A')} - Message: {getattr(e, 'message', str(e))}")
+
+def tailor_cv_with_ai(original_cv_text, job_details):
+    client = _require_client('tailor CV')
+
     try:
         print(f"🤖 Starting AI CV tailoring for job: {job_details.get('title')}")
-        response = openai_client.chat.completions.create(
-            model="gpt-4o", 
-            messages=[
-                {"role": "system", "content": "You are an expert career consultant and resume writer. Follow instructions precisely and provide output in the specified JSON format."},
-                {"role": "user", "content": prompt_content}
-            ],
-            temperature=0.4,
-            max_tokens=3800,
-            response_format={"type": "json_object"}
-        )
+        request_kwargs = _build_tailoring_request(original_cv_text, job_details)
+        with metrics.timed('tailoring_call'):
+            response = client.chat.completions.create(**request_kwargs)
+        metrics.record_openai_usage(response, request_kwargs['model'])
         content = response.choices[0].message.content.strip()
         print(f"✅ AI CV tailoring complete for: {job_details.get('title')}")
         return json.loads(content)
     except Exception as e:
-        print(f"❌ AI CV tailoring failed for job '{job_details.get('title', 'Unknown')}': {e}")
-        # Check if it's an OpenAI specific error type for more detailed logging if needed
-        # For example, if using an older SDK, openai.error.APIError might be relevant
-        # For newer SDK (>=1.0.0), errors are like openai.APIError, openai.AuthenticationError, etc.
-        if hasattr(e, 'http_status') or "OpenAI" in str(type(e)): # A heuristic check
-             print(f"   OpenAI API Related Error: Status {getattr(e, 'http_status', 'N/A')} - Message: {getattr(e, 'message', str(e))}")
+        _log_tailoring_error(e, job_details)
         # Re-raise so app.py can catch it and return a JSON error to the client
-        raise
\ No newline at end of file
+        raise
+
+def tailor_cv_with_ai_stream(original_cv_text, job_details):
+    """
+    Streaming version of tailor_cv_with_ai. Yields ('tailored_cv', text_delta) as the CV text is
+    generated and ('recommendation', text) as each recommendation completes, then ('done', result)
+    with the same dict tailor_cv_with_ai returns.
+    """
+    client = _require_client('tailor CV')
+
+    parser = IncrementalJSONFieldParser(string_fields=['tailored_cv'], list_fields=['recommendations'])
+    content_parts = []
+    try:
+        print(f"🤖 Starting streamed AI CV tailoring for job: {job_details.get('title')}")
+        request_kwargs = _build_tailoring_request(original_cv_text, job_details)
+        started_at = time.perf_counter()
+        # include_usage adds a final chunk with token usage and no choices
+        stream = client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **request_kwargs)
+        try:
+            for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    metrics.record_openai_usage(chunk, request_kwargs['model'])
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                content_parts.append(delta)
+                for field, value in parser.feed(delta):
+                    yield ('tailored_cv' if field == 'tailored_cv' else 'recommendation'), value
+        finally:
+            if hasattr(stream, 'close'):
+                stream.close() # Stops generation if the client went away mid-stream
+            metrics.observe_stage('tailoring_call', time.perf_counter() - started_at)
+        result = json.loads(''.join(content_parts).strip())
+        print(f"✅ Streamed AI CV tailoring complete for: {job_details.get('title')}")
+        yield 'done', result
+    except Exception as e:
+        _log_tailoring_error(e, job_details)
+        raise
+
+
+# --- Async API (asgi_app.py) ---
+# The same prompts, caches and fallbacks as above on openai.AsyncOpenAI, so one event loop can
+# keep many OpenAI calls in flight. The client is created on first use from inside the running
+# event loop; scoring concurrency is bounded with a semaphore instead of a thread pool. The
+# caches have a SQLite tier, so every cache read or write goes through asyncio.to_thread.
+_async_openai_client = None
+
+def get_async_openai_client():
+    global _async_openai_client
+    if _async_openai_client is None and OPENAI_API_KEY_FROM_ENV:
+        _async_openai_client = _openai().AsyncOpenAI(api_key=OPENAI_API_KEY_FROM_ENV)
+    return _async_openai_client
+
+async def close_async_openai_client():
+    global _async_openai_client
+    if _async_openai_client is not None:
+        await _async_openai_client.close()
+        _async_openai_client = None
+
+def _require_async_client(purpose):
+    client = get_async_openai_client()
+    if client is None:
+        raise Exception(f"OpenAI client is not initialized in ai_services. Cannot {purpose}.")
+    return client
+
+async def _acreate_completion_with_backoff(timeout=None, max_retries=None, stage='scoring_call', **kwargs):
+    """_create_completion_with_backoff for the async client."""
+    retries = SCORING_MAX_RETRIES if max_retries is None else max_retries
+    client = _require_async_client('score jobs').with_options(timeout=timeout or SCORING_CALL_TIMEOUT, max_retries=0)
+    with metrics.timed(stage):
+        for attempt in range(retries + 1):
+            try:
+                response = await client.chat.completions.create(**kwargs)
+                metrics.record_openai_usage(response, kwargs.get('model'))
+                return response
+            except _openai().RateLimitError as e:
+                metrics.inc('openai_rate_limited', 1, 'OpenAI 429 responses', stage=stage)
+                if attempt >= retries:
+                    raise
+                wait_seconds = _retry_after_seconds(e, attempt)
+                print(f"⏳ OpenAI rate limited (429), retrying in {wait_seconds:.1f}s (attempt {attempt + 1}/{retries})")
+                await asyncio.sleep(wait_seconds)
+
+async def analyze_cv_with_ai_async(cv_text, use_cache=True):
+    cache_key = cv_analysis_cache_key(cv_text)
+    # The disk tier of the cache is SQLite, so lookups go to a worker thread
+    cached_analysis = await asyncio.to_thread(_cached_cv_analysis, cache_key) if use_cache else None
+    if cached_analysis is not None:
+        return cached_analysis
+    client = _require_async_client('analyze CV')
+    try:
+        request_kwargs = _build_cv_analysis_request(cv_text)
+        with metrics.timed('cv_analysis_call'):
+            response = await client.chat.completions.create(**request_kwargs)
+        return await asyncio.to_thread(_parse_cv_analysis_response, response, cache_key, use_cache)
+    except Exception as e:
+        print(f"AI analysis failed: {e}")
+        raise
+
+async def calculate_job_match_score_async(job, cv_analysis, use_cache=None, check_cache=True):
+    use_cache = SCORE_CACHE_ENABLED if use_cache is None else use_cache
+    if use_cache and check_cache:
+        cached_score = await asyncio.to_thread(_get_cached_match_score, job, cv_analysis)
+        if cached_score is not None:
+            print(f"♻️ Cached match for '{job.get('title')}': {cached_score:.0%}")
+            return cached_score
+    if get_async_openai_client() is None:
+        print("⚠️ OpenAI client not initialized (ai_services) - cannot calculate match scores, returning default 0.5")
+        job['match_reasoning'] = 'OpenAI client not available for scoring (ai_services).'
+        return 0.5
+    try:
+        response = await _acreate_completion_with_backoff(**_build_scoring_request(job, cv_analysis))
+        return await asyncio.to_thread(_parse_scoring_response, response, job, cv_analysis, use_cache)
+    except Exception as e:
+        return _scoring_error_score(job, e)
+
+async def calculate_job_match_scores_batch_async(jobs, cv_analysis, use_cache=None, check_cache=True):
+    """calculate_job_match_scores_batch for asyncio callers."""
+    if not jobs:
+        return []
+    use_cache = SCORE_CACHE_ENABLED if use_cache is None else use_cache
+    if get_async_openai_client() is None or len(jobs) == 1:
+        return [await calculate_job_match_score_async(job, cv_analysis, use_cache=use_cache, check_cache=check_cache) for job in jobs]
+
+    all_jobs_by_id = {str(i + 1): job for i, job in enumerate(jobs)}
+    scores_by_id = await asyncio.to_thread(_cached_batch_scores, all_jobs_by_id, cv_analysis) if use_cache and check_cache else {}
+    if len(scores_by_id) == len(jobs):
+        return [scores_by_id[job_id] for job_id in all_jobs_by_id]
+    jobs_by_id = {job_id: job for job_id, job in all_jobs_by_id.items() if job_id not in scores_by_id}
+    try:
+        response = await _acreate_completion_with_backoff(**_build_batch_scoring_request(jobs_by_id, cv_analysis))
+        await asyncio.to_thread(_parse_batch_scoring_response, response, jobs_by_id, scores_by_id, cv_analysis, use_cache)
+    except Exception as e:
+        print(f"❌ AI batch matching error for {len(jobs_by_id)} jobs: {e}. Falling back to single-job scoring.")
+
+    missing_ids = _missing_batch_ids(jobs_by_id, scores_by_id)
+    missing_scores = await asyncio.gather(*(calculate_job_match_score_async(jobs_by_id[job_id], cv_analysis, use_cache=use_cache,
+                                                                            check_cache=False) for job_id in missing_ids))
+    scores_by_id.update(zip(missing_ids, missing_scores))
+    return [scores_by_id[job_id] for job_id in all_jobs_by_id]
+
+async def score_job_batch_async(batch, cv_analysis, use_cache=None, check_cache=True):
+    """score_job_batch for asyncio callers; never raises."""
+    try:
+        if len(batch) == 1:
+            return [await calculate_job_match_score_async(batch[0], cv_analysis, use_cache=use_cache, check_cache=check_cache)]
+        return await calculate_job_match_scores_batch_async(batch, cv_analysis, use_cache=use_cache, check_cache=check_cache)
+    except Exception as e:
+        print(f"⚠️ Scoring failed for {len(batch)} job(s) starting with '{batch[0].get('title', 'Untitled Job')}': {e}")
+        return [None] * len(batch)
+
+async def score_jobs_concurrently_async(jobs, cv_analysis, max_in_flight=None, batch_size=None, use_cache=None):
+    """score_jobs_concurrently with at most max_in_flight (SCORING_MAX_IN_FLIGHT) batch calls awaiting OpenAI at once."""
+    if not jobs:
+        return []
+    use_cache = SCORE_CACHE_ENABLED if use_cache is None else use_cache
+    scores, batches = await asyncio.to_thread(_plan_scoring_batches, jobs, cv_analysis, batch_size, use_cache)
+    semaphore = asyncio.Semaphore(max(1, max_in_flight or SCORING_MAX_IN_FLIGHT))
+
+    async def _score_batch(batch_indexes):
+        async with semaphore:
+            return await score_job_batch_async([jobs[index] for index in batch_indexes], cv_analysis, use_cache=use_cache, check_cache=False)
+
+    for batch_indexes, batch_scores in zip(batches, await asyncio.gather(*(_score_batch(batch) for batch in batches))):
+        for index, score in zip(batch_indexes, batch_scores):
+            scores[index] = score
+    return scores
+
+async def tailor_cv_with_ai_async(original_cv_text, job_details):
+    client = _require_async_client('tailor CV')
+    try:
+        print(f"🤖 Starting AI CV tailoring for job: {job_details.get('title')}")
+        request_kwargs = _build_tailoring_request(original_cv_text, job_details)
+        with metrics.timed('tailoring_call'):
+            response = await client.chat.completions.create(**request_kwargs)
+        metrics.record_openai_usage(response, request_kwargs['model'])
+        content = response.choices[0].message.content.strip()
+        print(f"✅ AI CV tailoring complete for: {job_details.get('title')}")
+        return json.loads(content)
+    except Exception as e:
+        _log_tailoring_error(e, job_details)
+        raise
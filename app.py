@@ -2,68 +2,95 @@
 """
 CV Job Matcher - Main Application (Simplified Config)
 """
-from flask import Flask, request, jsonify, render_template # render_template_string removed
+from flask import Flask, Request, request, jsonify, render_template, Response, stream_with_context # render_template_string removed
 from flask_cors import CORS
 import os
 import json
-from dotenv import load_dotenv
+import importlib
 import urllib3
 import traceback
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from urllib.parse import quote # For people search URL
 from datetime import datetime # For health check
 
-# Ensure environment variables are loaded AT THE VERY TOP
-# This is critical for other modules that might initialize using os.getenv() at import time.
-load_dotenv()
-print("DEBUG [app.py]: load_dotenv() called.") # For checking if this line runs
-
-# Import from our modules AFTER load_dotenv()
-# The 'openai_client' from ai_services will be the one initialized within that module
-from cv_utils import save_uploaded_file, extract_cv_text_from_file, cleanup_file
+# Configuration (including .env) is loaded once by settings.py, on the first import of it below
+from settings import settings
+from cv_utils import extract_cv_text_from_upload, allowed_file
 # Import specific functions and the client instance
-from ai_services import analyze_cv_with_ai, calculate_job_match_score, tailor_cv_with_ai, openai_client as ai_services_openai_client
-from linkedin_services import search_linkedin_jobs, parse_linkedin_html # Import parse_linkedin_html if still needed here, though likely only in linkedin_services
+from ai_services import analyze_cv_with_ai, score_jobs_concurrently, score_job_batch, tailor_cv_with_ai_stream, match_score_cache, cv_analysis_cache, CV_CACHE_DB_PATH, SCORING_MAX_IN_FLIGHT, SCORING_BATCH_SIZE, get_openai_client
+from task_queue import TaskManager, TaskQueueFull
+from tailoring_service import TailoringService
+from cache_utils import LRUCache, SQLiteCache, TieredCache
+from job_prefilter import prefilter_jobs
+import metrics
+from bulk_matching import iter_bulk_results, iter_archive_cvs, is_archive, limit_cvs, validate_locations, BULK_MAX_UPLOAD_BYTES
+from linkedin_services import search_linkedin_jobs, parse_linkedin_html, job_store, linkedin_response_cache, bright_data_config_from_env, bright_data_password_configured # Import parse_linkedin_html if still needed here, though likely only in linkedin_services
 
 # Disable SSL warnings for proxy
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+class _Request(Request):
+    @property
+    def max_content_length(self):
+        # Bulk uploads carry many CVs, so they get their own (larger) limit
+        if self.endpoint == 'bulk_search_jobs_route_handler':
+            return BULK_MAX_UPLOAD_BYTES
+        return super().max_content_length
+
+
 app = Flask(__name__) # Flask app instance
+app.request_class = _Request
 CORS(app)
 
 # Configuration
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
-app.config['UPLOAD_FOLDER'] = 'uploads' # cv_utils uses 'uploads' directly for now, or pass app.config['UPLOAD_FOLDER']
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+
+@app.errorhandler(413)
+def request_too_large(e):
+    limit_mb = request.max_content_length // (1024 * 1024)
+    return jsonify({'success': False, 'error': f'The upload is too large; the limit for {request.path} is {limit_mb} MB.'}), 413
 
 
 # --- Bright Data Configuration ---
 # Load password from .env. Use a specific variable name like BRIGHTDATA_ACTUAL_PASSWORD
 # to avoid confusion with any other Bright Data tokens.
-BRIGHTDATA_PROXY_PASSWORD_FROM_ENV = os.getenv('BRIGHTDATA_ACTUAL_PASSWORD')
+# (built by linkedin_services.bright_data_config_from_env, which the bulk CLI uses too)
+BRIGHT_DATA_CONFIG = bright_data_config_from_env()
+
+# Heavy libraries and clients that are loaded on first use (LAZY_INIT=True, the default)
+_LAZY_MODULES = ('openai', 'PyPDF2', 'docx', 'bs4', 'numpy')
 
-BRIGHT_DATA_CONFIG = {
-    'host': 'brd.superproxy.io',
-    'port': '33335',
-    'username': 'brd-customer-hl_158e0070-zone-mcp_unlocker', # This is from your original code
-    'password': BRIGHTDATA_PROXY_PASSWORD_FROM_ENV # Use the loaded password
-}
 
-# --- Initial Checks and Prints (After all initializations) ---
-print("🚀 Starting CV Job Matcher Application...")
+def warm_up():
+    """Creates the OpenAI client and imports the lazily loaded libraries now instead of on the first request."""
+    for module_name in _LAZY_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except ImportError as e:
+            print(f"⚠️ Could not preload {module_name}: {e}")
+    get_openai_client()
 
-# Check the OpenAI client that was initialized in ai_services.py
-if ai_services_openai_client: # Check the imported client instance
-    print("✅ OpenAI Client (from ai_services.py) appears initialized.")
-else:
-    print("❌ OpenAI Client (from ai_services.py) FAILED to initialize.")
-    print("   Check OPENAI_API_KEY in .env and initialization logic in ai_services.py.")
 
-# Check Bright Data Password
-if BRIGHT_DATA_CONFIG.get('password') and BRIGHT_DATA_CONFIG['password'] != 'YOUR_BRIGHTDATA_PASSWORD_PLACEHOLDER': # Add a distinct placeholder
-    print(f"🌐 Bright Data: ✅ Proxy Password configured for user {BRIGHT_DATA_CONFIG['username'].split('-zone-')[0]}.")
-else:
-    print("❌ Bright Data: Proxy Password NOT configured. Check BRIGHTDATA_ACTUAL_PASSWORD in .env.")
-print("📝 Flow: Upload CV → AI Analysis → LinkedIn Search → Job URLs & People Search → AI CV Tailoring")
+def log_startup_summary():
+    """Configuration checks printed when the server starts (python app.py or serve.py), not on import."""
+    print("🚀 Starting CV Job Matcher Application...")
+    if settings.openai_api_key:
+        print("✅ OpenAI API key configured (the client is created on first use).")
+    else:
+        print("❌ OpenAI API key was NOT found in the environment.")
+        print("   Please ensure:")
+        print("   1. Your .env file is in the project root directory (e.g., alongside app.py).")
+        print("   2. The .env file contains the line: OPENAI_API_KEY=\"your_actual_key_here\"")
+        print("   (AI services will not function without the API key.)")
+    # Check Bright Data Password
+    if bright_data_password_configured(BRIGHT_DATA_CONFIG):
+        print(f"🌐 Bright Data: ✅ Proxy Password configured for user {BRIGHT_DATA_CONFIG['username'].split('-zone-')[0]}.")
+    else:
+        print("❌ Bright Data: Proxy Password NOT configured. Check BRIGHTDATA_ACTUAL_PASSWORD in .env.")
+    print("📝 Flow: Upload CV → AI Analysis → LinkedIn Search → Job URLs & People Search → AI CV Tailoring")
 
 
 @app.route('/')
@@ -71,101 +98,131 @@ def index_route(): # Renamed from 'index' to avoid conflict if any built-in 'ind
     """Serve the main HTML page from templates folder"""
     return render_template('index.html') # This will look for templates/index.html
 
+# --- Search pipeline limits (shared by /search_jobs and /search_jobs_stream) ---
+JOBS_TO_SCORE_LIMIT = 30
+RELEVANT_JOBS_LIMIT = 15
+MIN_RELEVANT_SCORE = 0.35
+SEARCH_MAX_RESULTS = 20
+
+
+def _extract_cv_text_from_request():
+    """
+    Extracts the uploaded CV's text in memory (nothing is written to disk).
+    Returns (raw_cv_text, location_input, None) or (None, None, error_response) for a 400.
+    """
+    if 'cv_file' not in request.files:
+        return None, None, (jsonify({'success': False, 'error': 'No file uploaded'}), 400)
+    
+    file = request.files['cv_file']
+    location_input = request.form.get('location', 'Worldwide')
+    
+    if not file or file.filename == '': # Check if file object exists and has a filename
+        return None, None, (jsonify({'success': False, 'error': 'No file selected or file object missing.'}), 400)
+    
+    with metrics.timed('cv_extraction'):
+        raw_cv_text, safe_filename = extract_cv_text_from_upload(file)
+    if not safe_filename:
+        return None, None, (jsonify({'success': False, 'error': 'File type not allowed. Please upload a PDF, DOCX, DOC or TXT file.'}), 400)
+
+    if not raw_cv_text or len(raw_cv_text.strip()) < 30:
+        return None, None, (jsonify({'success': False, 'error': 'Could not extract sufficient text from CV. Please ensure it has readable content.'}), 400)
+    
+    print(f"📄 CV text extracted: {len(raw_cv_text)} characters from {safe_filename}")
+    return raw_cv_text, location_input, None
+
+
+def _apply_match_score(job, match_score):
+    """Records the score on the job; returns True if the job should be kept as relevant."""
+    if match_score is None:
+        print(f"  ⚠️ Error scoring job '{job.get('title','Untitled Job')}'. Assigning default.")
+        job['match_score'] = 0.3 
+        job['match_reasoning'] = 'Error during AI scoring process.'
+        return True # Keep with default if scoring failed but we want to show it
+    if match_score > MIN_RELEVANT_SCORE:
+        job['match_score'] = match_score
+        return True
+    print(f"  🗑️ Filtered out (low score/not relevant): {job.get('title','Untitled Job')} (Score: {match_score:.0%})")
+    return False
+
+
+def _add_people_search_url(job_info, location_input):
+    job_company_search = job_info.get('company', '')
+    job_loc_for_people = job_info.get('location', location_input)
+    if job_loc_for_people and job_loc_for_people.lower() == "remote":
+        job_loc_for_people = location_input
+
+    if job_company_search and job_loc_for_people:
+        contacts_terms = f"Recruiter OR \"Talent Acquisition\" OR \"Hiring Manager\" OR Manager"
+        query_company_contacts = f"({contacts_terms}) AND \"{job_company_search}\" AND \"{job_loc_for_people}\""
+        job_info['linkedin_people_search_company_contacts_url'] = \
+            f"https://www.linkedin.com/search/results/people/?keywords={quote(query_company_contacts)}&origin=GLOBAL_SEARCH_HEADER&sid=)"
+    else:
+        job_info['linkedin_people_search_company_contacts_url'] = None
+    return job_info
+
+
+def _top_relevant_jobs(relevant_jobs):
+    relevant_jobs = sorted(relevant_jobs, key=lambda x: x.get('match_score', 0), reverse=True)[:RELEVANT_JOBS_LIMIT]
+    print(f"\n✅ Kept {len(relevant_jobs)} relevant jobs after AI scoring.")
+    return relevant_jobs
+
+
+def _analyze_cv(raw_cv_text):
+    if get_openai_client() is None:
+        raise Exception("OpenAI client (from ai_services) is not initialized. Cannot proceed with CV analysis.")
+    
+    with metrics.timed('cv_analysis'):
+        cv_analysis = analyze_cv_with_ai(raw_cv_text) # Uses client from ai_services
+    print(f"🤖 CV analysis: {cv_analysis.get('current_role', 'N/A')} with {cv_analysis.get('experience_years', 0)} years")
+    return cv_analysis
+
+
+def _wants_timings():
+    """?timings=1 adds a per-request timing breakdown (stages, OpenAI tokens, proxy bytes) to the response."""
+    return request.args.get('timings', '').lower() in ('1', 'true', 'yes')
+
+
 @app.route('/search_jobs', methods=['POST'])
 def search_jobs_route_handler(): # Renamed function
-    filepath = None
     raw_cv_text_for_response = "CV text not extracted due to an early error."
 
     try:
-        if 'cv_file' not in request.files:
-            return jsonify({'success': False, 'error': 'No file uploaded'}), 400
-        
-        file = request.files['cv_file']
-        location_input = request.form.get('location', 'Worldwide')
-        
-        if not file or file.filename == '': # Check if file object exists and has a filename
-            return jsonify({'success': False, 'error': 'No file selected or file object missing.'}), 400
-        
-        # Pass app.config['UPLOAD_FOLDER'] to ensure it uses the Flask configured path
-        filepath, unique_filename = save_uploaded_file(file, app.config['UPLOAD_FOLDER'])
-        if not filepath:
-            return jsonify({'success': False, 'error': 'File could not be saved or is not allowed.'}), 400
-
-        raw_cv_text = extract_cv_text_from_file(filepath, unique_filename)
-        raw_cv_text_for_response = raw_cv_text # Update for successful extraction
+        with metrics.start_trace() as trace, metrics.timed('request', route='/search_jobs'):
+            raw_cv_text, location_input, error_response = _extract_cv_text_from_request()
+            if error_response:
+                return error_response
+            raw_cv_text_for_response = raw_cv_text # Update for successful extraction
 
-        if not raw_cv_text or len(raw_cv_text.strip()) < 30:
-            cleanup_file(filepath) # Cleanup before returning
-            return jsonify({'success': False, 'error': 'Could not extract sufficient text from CV. Please ensure it has readable content.'}), 400
-        
-        print(f"📄 CV text extracted: {len(raw_cv_text)} characters from {unique_filename}")
+            cv_analysis = _analyze_cv(raw_cv_text)
+            
+            # Pass the BRIGHT_DATA_CONFIG from app.py
+            with metrics.timed('linkedin_search'):
+                linkedin_jobs_raw = search_linkedin_jobs(cv_analysis, location_input, BRIGHT_DATA_CONFIG, max_results=SEARCH_MAX_RESULTS)
+            print(f"🎯 Found {len(linkedin_jobs_raw)} LinkedIn jobs initially (app.py)")
+            
+            # Cheap local similarity ranking drops obvious mismatches before any OpenAI scoring call
+            with metrics.timed('prefilter'):
+                jobs_to_score = prefilter_jobs(linkedin_jobs_raw, cv_analysis)[:JOBS_TO_SCORE_LIMIT]
 
-        # Use the imported ai_services_openai_client for check
-        if not ai_services_openai_client:
-            raise Exception("OpenAI client (from ai_services) is not initialized. Cannot proceed with CV analysis.")
-        
-        cv_analysis = analyze_cv_with_ai(raw_cv_text) # Uses client from ai_services
-        print(f"🤖 CV analysis: {cv_analysis.get('current_role', 'N/A')} with {cv_analysis.get('experience_years', 0)} years")
-        
-        # Pass the BRIGHT_DATA_CONFIG from app.py
-        linkedin_jobs_raw = search_linkedin_jobs(cv_analysis, location_input, BRIGHT_DATA_CONFIG, max_results=20)
-        print(f"🎯 Found {len(linkedin_jobs_raw)} LinkedIn jobs initially (app.py)")
-        
-        relevant_jobs = []
-        jobs_to_score = linkedin_jobs_raw[:30]
-
-        print("\n🤖 AI Scoring job matches...")
-        for job in jobs_to_score:
-            try:
-                # Check client again just before use, though it should be the same instance
-                if not ai_services_openai_client:
-                    print(f"  ⚠️ OpenAI client not available for scoring job '{job.get('title','Untitled Job')}'. Assigning default score.")
-                    job['match_score'] = 0.3 
-                    job['match_reasoning'] = 'OpenAI client unavailable for scoring.'
-                    # Fall through to append if you still want to show it, or skip
-                else:
-                    # calculate_job_match_score uses the client from ai_services
-                    match_score = calculate_job_match_score(job, cv_analysis) 
-                
-                if match_score > 0.35:
-                    job['match_score'] = match_score
-                    relevant_jobs.append(job)
-                else:
-                    print(f"  🗑️ Filtered out (low score/not relevant): {job.get('title','Untitled Job')} (Score: {match_score:.0% if isinstance(match_score, float) else 'N/A'})")
-            except Exception as match_err:
-                print(f"  ⚠️ Error scoring job '{job.get('title','Untitled Job')}': {match_err}. Assigning default.")
-                job['match_score'] = 0.3 
-                job['match_reasoning'] = 'Error during AI scoring process.'
-                relevant_jobs.append(job) # Add with default if scoring failed but we want to show it
-        
-        relevant_jobs.sort(key=lambda x: x.get('match_score', 0), reverse=True)
-        relevant_jobs = relevant_jobs[:15]
-        print(f"\n✅ Kept {len(relevant_jobs)} relevant jobs after AI scoring.")
-
-        for job_info in relevant_jobs:
-            job_company_search = job_info.get('company', '')
-            job_loc_for_people = job_info.get('location', location_input)
-            if job_loc_for_people and job_loc_for_people.lower() == "remote":
-                job_loc_for_people = location_input
-
-            if job_company_search and job_loc_for_people:
-                contacts_terms = f"Recruiter OR \"Talent Acquisition\" OR \"Hiring Manager\" OR Manager"
-                query_company_contacts = f"({contacts_terms}) AND \"{job_company_search}\" AND \"{job_loc_for_people}\""
-                job_info['linkedin_people_search_company_contacts_url'] = \
-                    f"https://www.linkedin.com/search/results/people/?keywords={quote(query_company_contacts)}&origin=GLOBAL_SEARCH_HEADER&sid=)"
-            else:
-                job_info['linkedin_people_search_company_contacts_url'] = None
-        
-        cleanup_file(filepath) # Cleanup successful processing
-        return jsonify({
-            'success': True, 'jobs': relevant_jobs,
-            'cv_analysis': cv_analysis,
-            'raw_cv_text': raw_cv_text,
-            'filtered_count': len(jobs_to_score) - len(relevant_jobs)
-        })
+            print(f"\n🤖 AI Scoring {len(jobs_to_score)} job matches concurrently...")
+            # Scores come back in the same order as jobs_to_score; None means scoring failed for that job
+            with metrics.timed('scoring'):
+                match_scores = score_jobs_concurrently(jobs_to_score, cv_analysis)
+            relevant_jobs = [job for job, match_score in zip(jobs_to_score, match_scores) if _apply_match_score(job, match_score)]
+            relevant_jobs = [_add_people_search_url(job, location_input) for job in _top_relevant_jobs(relevant_jobs)]
+            
+            response = {
+                'success': True, 'jobs': relevant_jobs,
+                'cv_analysis': cv_analysis,
+                'raw_cv_text': raw_cv_text,
+                'filtered_count': len(jobs_to_score) - len(relevant_jobs),
+                'prefiltered_count': len(linkedin_jobs_raw) - len(jobs_to_score)
+            }
+        if _wants_timings():
+            response['timings'] = trace.to_dict()
+        return jsonify(response)
             
     except Exception as e:
-        cleanup_file(filepath) # Ensure cleanup on any exception
         print(f"❌ Error in /search_jobs: {e}")
         traceback.print_exc()
         return jsonify({
@@ -174,60 +231,446 @@ def search_jobs_route_handler(): # Renamed function
             'raw_cv_text': raw_cv_text_for_response 
         }), 500
 
-@app.route('/tailor_cv', methods=['POST'])
-def tailor_cv_route_handler(): # Renamed function
+
+_SEARCH_DONE = object()
+
+def iter_search_pipeline(raw_cv_text, location_input, cancel_event=None):
+    """
+    Runs the search pipeline incrementally, yielding (event_name, data) tuples:
+    'stage' as each stage starts, 'cv_analysis' once the CV is analyzed, 'job' for each relevant
+    job as soon as it is scored, and a final 'done' with the same payload /search_jobs returns.
+    LinkedIn pages are scored while later pages are still being fetched. Closing the generator
+    (or setting `cancel_event`) stops the LinkedIn search and drops pending scoring work.
+    """
+    yield 'stage', {'stage': 'cv_analysis', 'message': 'Analyzing CV...'}
+    cv_analysis = _analyze_cv(raw_cv_text)
+    yield 'cv_analysis', {'cv_analysis': cv_analysis, 'raw_cv_text': raw_cv_text}
+
+    yield 'stage', {'stage': 'linkedin_search', 'message': 'Searching LinkedIn for jobs...'}
+    found_jobs_queue = queue.Queue()
+    search_stop_event = threading.Event() # Set on exit so the LinkedIn workers stop too
+
+    def _run_search():
+        try:
+            with metrics.timed('linkedin_search'):
+                search_linkedin_jobs(cv_analysis, location_input, BRIGHT_DATA_CONFIG, max_results=SEARCH_MAX_RESULTS,
+                                     on_new_jobs=found_jobs_queue.put, cancel_event=search_stop_event)
+            found_jobs_queue.put(_SEARCH_DONE)
+        except Exception as e:
+            found_jobs_queue.put(e)
+
+    threading.Thread(target=metrics.bind_trace(_run_search), name='linkedin-search', daemon=True).start()
+    executor = ThreadPoolExecutor(max_workers=SCORING_MAX_IN_FLIGHT, thread_name_prefix='stream-scoring')
+    pending_batches = {} # future -> jobs in that batch
+    relevant_jobs = []
+    jobs_to_score_count = 0
+    prefiltered_count = 0
+    search_finished = False
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({'success': False, 'error': 'Invalid request: No JSON payload.'}), 400
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            if not search_finished:
+                try:
+                    item = found_jobs_queue.get(timeout=0.05 if pending_batches else 0.5)
+                except queue.Empty:
+                    item = None
+                if item is _SEARCH_DONE:
+                    search_finished = True
+                    yield 'stage', {'stage': 'scoring', 'message': f'Scoring {jobs_to_score_count} jobs with AI...'}
+                elif isinstance(item, Exception):
+                    raise item
+                elif item:
+                    # Each page is pre-filtered on arrival so scoring can start before the search ends
+                    with metrics.timed('prefilter'):
+                        kept_jobs = prefilter_jobs(item, cv_analysis, min_keep=1)
+                    new_jobs = kept_jobs[:JOBS_TO_SCORE_LIMIT - jobs_to_score_count]
+                    prefiltered_count += len(item) - len(kept_jobs)
+                    jobs_to_score_count += len(new_jobs)
+                    for i in range(0, len(new_jobs), SCORING_BATCH_SIZE):
+                        batch = new_jobs[i:i + SCORING_BATCH_SIZE]
+                        pending_batches[executor.submit(metrics.bind_trace(score_job_batch), batch, cv_analysis)] = batch
+                    if new_jobs:
+                        yield 'jobs_found', {'count': jobs_to_score_count}
+            elif pending_batches:
+                wait(list(pending_batches), timeout=0.5, return_when=FIRST_COMPLETED)
+            else:
+                break
 
-        original_cv_text = data.get('original_cv_text')
-        job_details = data.get('job_details')
+            for future in [f for f in pending_batches if f.done()]:
+                batch = pending_batches.pop(future)
+                for job, match_score in zip(batch, future.result()):
+                    if _apply_match_score(job, match_score):
+                        relevant_jobs.append(_add_people_search_url(job, location_input))
+                        yield 'job', {'job': job}
+
+        relevant_jobs = _top_relevant_jobs(relevant_jobs)
+        yield 'done', {
+            'success': True, 'jobs': relevant_jobs,
+            'cv_analysis': cv_analysis,
+            'raw_cv_text': raw_cv_text,
+            'filtered_count': jobs_to_score_count - len(relevant_jobs),
+            'prefiltered_count': prefiltered_count
+        }
+    finally:
+        search_stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
 
-        if not original_cv_text or not job_details:
-            return jsonify({'success': False, 'error': 'Missing original_cv_text or job_details.'}), 400
-        
-        if not job_details.get('title') or not job_details.get('company'):
-             return jsonify({'success': False, 'error': 'Job details missing title or company.'}), 400
 
-        # Use the imported client instance
-        if not ai_services_openai_client:
-             return jsonify({'success': False, 'error': 'OpenAI client (from ai_services) not configured on server.'}), 500
+def _sse_event(event_name, data):
+    return f"event: {event_name}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route('/search_jobs_stream', methods=['POST'])
+def search_jobs_stream_route_handler():
+    """Same input as /search_jobs, but streams progress and each scored job as Server-Sent Events."""
+    try:
+        raw_cv_text, location_input, error_response = _extract_cv_text_from_request()
+    except Exception as e:
+        print(f"❌ Error in /search_jobs_stream: {e}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': f'An error occurred during processing: {str(e)}'}), 500
+    if error_response:
+        return error_response
+
+    include_timings = _wants_timings()
+
+    def generate():
+        trace = metrics.RequestTrace()
+        pipeline = iter_search_pipeline(raw_cv_text, location_input)
+        # Each pipeline step runs with this request's trace current, so the threads it starts inherit it
+        next_event = metrics.bind_trace(next, trace)
+        try:
+            with metrics.timed('request', route='/search_jobs_stream'):
+                for event_name, data in iter(lambda: next_event(pipeline, None), None):
+                    if event_name == 'done' and include_timings:
+                        data = dict(data, timings=trace.to_dict())
+                    yield _sse_event(event_name, data)
+        except Exception as e:
+            print(f"❌ Error in /search_jobs_stream: {e}")
+            traceback.print_exc()
+            yield _sse_event('error', {
+                'success': False,
+                'error': f'An error occurred during processing: {str(e)}',
+                'raw_cv_text': raw_cv_text
+            })
+        finally:
+            pipeline.close()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# --- Background search tasks ---
+# POST /search_tasks returns a task ID right away; the pipeline runs on search_task_manager's
+# worker pool and GET /search_tasks/<id> reports progress, the jobs scored so far and the result.
+# With several worker processes (serve.py), set TASK_STORE_DB_PATH so task status is shared
+# between them and a poll can be answered by any worker.
+TASK_STORE_DB_PATH = settings.get('TASK_STORE_DB_PATH', '')
+
+
+def _task_store(table, result_ttl_seconds):
+    return SQLiteCache(TASK_STORE_DB_PATH, table=table, ttl_seconds=result_ttl_seconds) if TASK_STORE_DB_PATH else None
+
+
+SEARCH_TASK_RESULT_TTL_SECONDS = settings.get_float('SEARCH_TASK_RESULT_TTL_SECONDS', 600)
+search_task_manager = TaskManager(
+    max_workers=settings.get_int('SEARCH_TASK_WORKERS', 4),
+    max_queue_depth=settings.get_int('SEARCH_TASK_MAX_QUEUE', 32),
+    result_ttl_seconds=SEARCH_TASK_RESULT_TTL_SECONDS,
+    thread_name_prefix='search-task',
+    shared_store=_task_store('search_tasks', SEARCH_TASK_RESULT_TTL_SECONDS)
+)
+
+
+def _run_search_task(task, raw_cv_text, location_input, include_timings=False):
+    with metrics.start_trace() as trace, metrics.timed('request', route='/search_tasks'):
+        for event_name, data in iter_search_pipeline(raw_cv_text, location_input, cancel_event=task.cancel_event):
+            if event_name == 'stage':
+                task.update(data)
+            elif event_name == 'job':
+                task.add_partial_result(data['job'])
+            elif event_name == 'done':
+                return dict(data, timings=trace.to_dict()) if include_timings else data
+    return None # Cancelled before the pipeline finished
+
+
+@app.route('/search_tasks', methods=['POST'])
+def create_search_task_route_handler():
+    """Same input as /search_jobs; queues the search and returns its task ID (202)."""
+    try:
+        raw_cv_text, location_input, error_response = _extract_cv_text_from_request()
+        if error_response:
+            return error_response
+        task = search_task_manager.submit('search_jobs', _run_search_task, raw_cv_text, location_input, _wants_timings())
+    except TaskQueueFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    except Exception as e:
+        print(f"❌ Error in /search_tasks: {e}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': f'An error occurred during processing: {str(e)}'}), 500
+
+    print(f"📥 Queued search task {task.id}")
+    return jsonify({'success': True, 'task_id': task.id, 'status': task.status,
+                    'status_url': f"/search_tasks/{task.id}"}), 202
+
+
+@app.route('/search_tasks/<task_id>', methods=['GET'])
+def search_task_status_route_handler(task_id):
+    task_data = search_task_manager.snapshot(task_id)
+    if task_data is None:
+        return jsonify({'success': False, 'error': 'Unknown or expired task ID.'}), 404
+    return jsonify({'success': True, 'task': task_data})
+
+
+@app.route('/search_tasks/<task_id>', methods=['DELETE'])
+def cancel_search_task_route_handler(task_id):
+    task_data = search_task_manager.cancel(task_id)
+    if task_data is None:
+        return jsonify({'success': False, 'error': 'Unknown or expired task ID.'}), 404
+    print(f"🛑 Cancellation requested for search task {task_id}")
+    return jsonify({'success': True, 'task': task_data})
+
+
+# --- Bulk matching ---
+@app.route('/bulk_search_jobs', methods=['POST'])
+def bulk_search_jobs_route_handler():
+    """
+    Many CVs at once: upload them as several `cv_files` and/or one `cv_archive` (.zip/.tar).
+    `location` applies to every CV; an optional `locations` JSON object maps file names to their own.
+    Streams one JSON line per CV (see bulk_matching.iter_bulk_results), then a summary line.
+    """
+    # Read lazily so nothing past BULK_MAX_CVS is loaded into memory
+    sources = [((file.filename, file.stream.read()) for file in request.files.getlist('cv_files')
+                if file and allowed_file(file.filename))]
+    archive = request.files.get('cv_archive')
+    try:
+        if archive and archive.filename:
+            if not is_archive(archive.filename):
+                return jsonify({'success': False, 'error': 'cv_archive must be a .zip or .tar archive.'}), 400
+            sources.append(iter_archive_cvs(archive.stream, archive.filename))
+        cv_files = limit_cvs(cv for source in sources for cv in source)
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Could not read the uploaded CVs: {str(e)}'}), 400
+    try:
+        locations = json.loads(request.form['locations']) if request.form.get('locations') else None
+        validate_locations(locations)
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Invalid locations: {str(e)}'}), 400
+    if not cv_files:
+        return jsonify({'success': False, 'error': 'No CV files (PDF, DOCX, DOC or TXT) found in the upload.'}), 400
+    location_input = request.form.get('location', 'Worldwide')
+    print(f"📦 Bulk matching {len(cv_files)} CVs for {location_input}")
+
+    def generate():
+        try:
+            for record in iter_bulk_results(cv_files, location_input, BRIGHT_DATA_CONFIG, locations):
+                yield json.dumps(record) + '\n'
+        except Exception as e:
+            print(f"❌ Error in /bulk_search_jobs: {e}")
+            traceback.print_exc()
+            yield json.dumps({'type': 'error', 'success': False, 'error': f'An error occurred during processing: {str(e)}'}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# --- CV tailoring service ---
+# Tailoring runs on its own worker pool; identical (CV, job) requests share one in-flight task
+# and finished results are cached (in SQLite too, shared by all worker processes, unless
+# TAILOR_CACHE_DB_PATH is empty), so repeat clicks don't cost another OpenAI call.
+TAILOR_TASK_RESULT_TTL_SECONDS = settings.get_float('TAILOR_TASK_RESULT_TTL_SECONDS', 600)
+TAILOR_CACHE_TTL_SECONDS = settings.get_float('TAILOR_CACHE_TTL_SECONDS', 24 * 3600)
+TAILOR_CACHE_DB_PATH = settings.get('TAILOR_CACHE_DB_PATH', CV_CACHE_DB_PATH)
+tailoring_service = TailoringService(
+    TaskManager(
+        max_workers=settings.get_int('TAILOR_WORKERS', 4),
+        max_queue_depth=settings.get_int('TAILOR_MAX_QUEUE', 32),
+        result_ttl_seconds=TAILOR_TASK_RESULT_TTL_SECONDS,
+        thread_name_prefix='tailor-task',
+        shared_store=_task_store('tailor_tasks', TAILOR_TASK_RESULT_TTL_SECONDS)
+    ),
+    TieredCache(
+        LRUCache(max_entries=settings.get_int('TAILOR_CACHE_MAX_ENTRIES', 500), ttl_seconds=TAILOR_CACHE_TTL_SECONDS),
+        SQLiteCache(TAILOR_CACHE_DB_PATH, table='tailored_cvs', ttl_seconds=TAILOR_CACHE_TTL_SECONDS,
+                    max_entries=settings.get_int('TAILOR_CACHE_DISK_ENTRIES', 5000)) if TAILOR_CACHE_DB_PATH else None
+    )
+)
+
+
+def _parse_tailor_request():
+    """Returns (original_cv_text, job_details, None) or (None, None, error_response)."""
+    data = request.get_json(silent=True)
+    if not data:
+        return None, None, (jsonify({'success': False, 'error': 'Invalid request: No JSON payload.'}), 400)
+
+    original_cv_text = data.get('original_cv_text')
+    job_details = data.get('job_details')
+
+    if not original_cv_text or not job_details:
+        return None, None, (jsonify({'success': False, 'error': 'Missing original_cv_text or job_details.'}), 400)
+    
+    if not job_details.get('title') or not job_details.get('company'):
+         return None, None, (jsonify({'success': False, 'error': 'Job details missing title or company.'}), 400)
+
+    if get_openai_client() is None:
+         return None, None, (jsonify({'success': False, 'error': 'OpenAI client (from ai_services) not configured on server.'}), 500)
+    return original_cv_text, job_details, None
+
+
+def _tailor_error_message(e):
+    error_message = str(e)
+    # A simple check for OpenAI related errors
+    if "OpenAI" in str(type(e)) or (hasattr(e, 'http_status') and e.http_status in [401, 429]):
+        error_message = f"OpenAI API Error: {getattr(e, 'message', str(e))}"
+    return f'Failed to tailor CV: {error_message}'
+
+
+@app.route('/tailor_cv', methods=['POST'])
+def tailor_cv_route_handler(): # Renamed function
+    try:
+        original_cv_text, job_details, error_response = _parse_tailor_request()
+        if error_response:
+            return error_response
         
         print(f"⚡ Request to tailor CV for job: {job_details.get('title')} at {job_details.get('company')}")
-        # tailor_cv_with_ai uses the client from ai_services
-        tailoring_results = tailor_cv_with_ai(original_cv_text, job_details)
-        return jsonify({'success': True, 'data': tailoring_results})
+        # Runs tailor_cv_with_ai through the tailoring service (cached, deduplicated) and waits for it
+        with metrics.start_trace() as trace, metrics.timed('request', route='/tailor_cv'):
+            tailoring_results = tailoring_service.tailor(original_cv_text, job_details)
+        response = {'success': True, 'data': tailoring_results}
+        if _wants_timings():
+            response['timings'] = trace.to_dict()
+        return jsonify(response)
 
+    except TaskQueueFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
     except Exception as e:
         print(f"❌ Error during CV tailoring in /tailor_cv: {e}")
         traceback.print_exc()
-        error_message = str(e)
-        # A simple check for OpenAI related errors
-        if "OpenAI" in str(type(e)) or (hasattr(e, 'http_status') and e.http_status in [401, 429]):
-            error_message = f"OpenAI API Error: {getattr(e, 'message', str(e))}"
-        return jsonify({'success': False, 'error': f'Failed to tailor CV: {error_message}'}), 500
+        return jsonify({'success': False, 'error': _tailor_error_message(e)}), 500
+
+
+@app.route('/tailor_cv_tasks', methods=['POST'])
+def create_tailor_task_route_handler():
+    """
+    Same JSON body as /tailor_cv. Returns the result straight away (200) if it is cached,
+    otherwise a task ID to poll (202); repeated requests for the same CV and job get the same task.
+    """
+    try:
+        original_cv_text, job_details, error_response = _parse_tailor_request()
+        if error_response:
+            return error_response
+        cached_result, task = tailoring_service.submit(original_cv_text, job_details)
+    except TaskQueueFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    except Exception as e:
+        print(f"❌ Error in /tailor_cv_tasks: {e}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': _tailor_error_message(e)}), 500
+
+    if task is None:
+        return jsonify({'success': True, 'status': 'succeeded', 'data': cached_result})
+    return jsonify({'success': True, 'task_id': task.id, 'status': task.status,
+                    'status_url': f"/tailor_cv_tasks/{task.id}"}), 202
+
+
+@app.route('/tailor_cv_tasks/<task_id>', methods=['GET'])
+def tailor_task_status_route_handler(task_id):
+    task = tailoring_service.task_manager.get(task_id)
+    task_data = tailoring_service.task_manager.snapshot(task_id, include_partial=False)
+    if task_data is None:
+        return jsonify({'success': False, 'error': 'Unknown or expired task ID.'}), 404
+    response = {'success': True, 'task_id': task_id, 'status': task_data['status'], 'progress': task_data['progress']}
+    if task_data['status'] == 'succeeded':
+        response['data'] = task_data['result']
+    elif task_data['status'] in ('failed', 'cancelled'):
+        response['success'] = False
+        if task is not None and task.exception:
+            response['error'] = _tailor_error_message(task.exception)
+        else: # Ran in another worker process; only the error text was shared
+            response['error'] = f"Failed to tailor CV: {task_data['error']}" if task_data['error'] else 'Tailoring was cancelled.'
+    return jsonify(response)
+
+@app.route('/tailor_cv_stream', methods=['POST'])
+def tailor_cv_stream_route_handler():
+    """
+    Same JSON body as /tailor_cv, streamed as Server-Sent Events: 'tailored_cv' events carry
+    text deltas, 'recommendation' events carry each finished recommendation and 'done' carries
+    the full result. A cached result is sent as a single 'done' event.
+    """
+    original_cv_text, job_details, error_response = _parse_tailor_request()
+    if error_response:
+        return error_response
+
+    print(f"⚡ Request to stream tailored CV for job: {job_details.get('title')} at {job_details.get('company')}")
+    cached_result = tailoring_service.get_cached(original_cv_text, job_details)
+
+    def generate():
+        if cached_result is not None:
+            print(f"♻️ Tailored CV served from cache for: {job_details.get('title')}")
+            yield _sse_event('done', {'success': True, 'data': cached_result})
+            return
+        try:
+            for event_name, value in tailor_cv_with_ai_stream(original_cv_text, job_details):
+                if event_name == 'tailored_cv':
+                    yield _sse_event('tailored_cv', {'delta': value})
+                elif event_name == 'recommendation':
+                    yield _sse_event('recommendation', {'text': value})
+                elif event_name == 'done':
+                    tailoring_service.store(original_cv_text, job_details, value)
+                    yield _sse_event('done', {'success': True, 'data': value})
+        except Exception as e:
+            print(f"❌ Error during CV tailoring in /tailor_cv_stream: {e}")
+            traceback.print_exc()
+            yield _sse_event('error', {'success': False, 'error': _tailor_error_message(e)})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/health')
 def health_route(): # Renamed function
     """Health check"""
-    # Use the password from BRIGHT_DATA_CONFIG which was populated from .env
-    bd_password_is_set = bool(BRIGHT_DATA_CONFIG.get('password') and \
-                              BRIGHT_DATA_CONFIG['password'] != 'YOUR_BRIGHTDATA_PASSWORD_PLACEHOLDER' and \
-                              BRIGHT_DATA_CONFIG['password'] is not None) # More robust check
-
     return jsonify({
         'status': 'healthy',
-        'openai_client_initialized_in_ai_services': bool(ai_services_openai_client),
-        'bright_data_proxy_password_configured': bd_password_is_set,
+        'worker_pid': os.getpid(),
+        'openai_client_initialized_in_ai_services': bool(settings.openai_api_key), # The client itself is created on first use
+        'bright_data_proxy_password_configured': bright_data_password_configured(BRIGHT_DATA_CONFIG),
+        'match_score_cache': match_score_cache.stats(),
+        'search_tasks': search_task_manager.stats(),
+        'job_store': job_store.stats() if job_store is not None else None,
+        'linkedin_response_cache': linkedin_response_cache.stats() if linkedin_response_cache is not None else None,
         'timestamp': datetime.now().isoformat()
     })
 
+# With several worker processes (serve.py), set METRICS_DB_PATH so /metrics reports the counters
+# and stage timings of all workers, whichever one answers the scrape.
+METRICS_DB_PATH = settings.get('METRICS_DB_PATH', '')
+if METRICS_DB_PATH:
+    metrics.share_across_processes(SQLiteCache(METRICS_DB_PATH, table='metrics'),
+                                   publish_interval=settings.get_float('METRICS_PUBLISH_INTERVAL_SECONDS', 5))
+
+# Cache, store and task-queue stats are exported as gauges on /metrics
+metrics.register_collector('match_score_cache', match_score_cache.stats)
+metrics.register_collector('cv_analysis_cache', cv_analysis_cache.stats)
+metrics.register_collector('tailoring_cache', tailoring_service.cache.stats)
+metrics.register_collector('search_tasks', search_task_manager.stats)
+metrics.register_collector('tailor_tasks', tailoring_service.task_manager.stats)
+if job_store is not None:
+    metrics.register_collector('job_store', job_store.stats)
+if linkedin_response_cache is not None:
+    metrics.register_collector('linkedin_response_cache', linkedin_response_cache.stats)
+
+
+@app.route('/metrics')
+def metrics_route():
+    """Prometheus scrape endpoint: stage timings, OpenAI token usage, proxy bytes and cache/queue stats."""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+if not settings.lazy_init:
+    warm_up()
+
 if __name__ == '__main__':
-    # Read FLASK_DEBUG from .env, default to False if not set or invalid
-    flask_debug_env = os.getenv("FLASK_DEBUG", "False").lower()
-    debug_mode = True if flask_debug_env == "true" else False
-    
-    port = int(os.environ.get("PORT", 8080))
+    debug_mode = settings.flask_debug # FLASK_DEBUG from .env, default False
+    port = settings.port
+    log_startup_summary()
     print(f"Running Flask app in {'DEBUG' if debug_mode else 'PRODUCTION (default)'} mode on port {port}")
-    app.run(debug=debug_mode, host='0.0.0.0', port=port)
\ No newline at end of file
+    app.run(debug=debug_mode, host='0.0.0.0', port=port)
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+CV Job Matcher - async (ASGI) serving mode.
+
+Runs the search and tailoring pipeline on one event loop: LinkedIn pages are fetched with
+httpx.AsyncClient and every OpenAI call goes through openai.AsyncOpenAI, so one process can hold
+hundreds of concurrent searches while they wait on I/O instead of one per worker thread. CV text
+extraction still runs in the cv_utils extraction worker processes, awaited from a thread.
+
+Needs Quart (pip install quart, which also installs the hypercorn ASGI server):
+    hypercorn asgi_app:app --bind 0.0.0.0:8080
+
+Serves /, /search_jobs, /search_jobs_stream, /tailor_cv, /health and /metrics with the same
+request and response formats as app.py. The background-task, bulk and /tailor_cv_stream
+endpoints are only served by the threaded app (python app.py).
+"""
+import asyncio
+import copy
+import traceback
+from datetime import datetime
+from quart import Quart, request, jsonify, render_template, make_response
+
+# Config, response helpers, caches and the /metrics collectors are shared with the threaded app
+from app import (BRIGHT_DATA_CONFIG, JOBS_TO_SCORE_LIMIT, SEARCH_MAX_RESULTS, tailoring_service, _apply_match_score,
+                 _add_people_search_url, _top_relevant_jobs, _sse_event, _tailor_error_message)
+from cv_utils import extract_cv_text_from_upload
+from ai_services import (analyze_cv_with_ai_async, score_jobs_concurrently_async, score_job_batch_async, tailor_cv_with_ai_async,
+                         get_async_openai_client, close_async_openai_client, match_score_cache, SCORING_MAX_IN_FLIGHT,
+                         SCORING_BATCH_SIZE)
+from linkedin_services import (search_linkedin_jobs_async, close_async_proxy_clients, job_store, linkedin_response_cache,
+                               bright_data_password_configured)
+from job_prefilter import prefilter_jobs
+import metrics
+from settings import settings
+
+app = Quart(__name__)
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+
+_tailoring_in_flight = {} # tailoring cache key -> asyncio.Task, so identical requests share one OpenAI call
+
+
+@app.after_request
+async def _allow_cors(response):
+    # Same open CORS policy as flask_cors.CORS(app) in app.py
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    return response
+
+
+@app.after_serving
+async def _close_clients():
+    await close_async_proxy_clients()
+    await close_async_openai_client()
+
+
+@app.route('/')
+async def index_route():
+    """Serve the main HTML page from templates folder"""
+    return await render_template('index.html')
+
+
+def _wants_timings():
+    return request.args.get('timings', '').lower() in ('1', 'true', 'yes')
+
+
+async def _extract_cv_text_from_request():
+    """Async version of app._extract_cv_text_from_request."""
+    files = await request.files
+    form = await request.form
+    if 'cv_file' not in files:
+        return None, None, (jsonify({'success': False, 'error': 'No file uploaded'}), 400)
+
+    file = files['cv_file']
+    location_input = form.get('location', 'Worldwide')
+    if not file or file.filename == '':
+        return None, None, (jsonify({'success': False, 'error': 'No file selected or file object missing.'}), 400)
+
+    with metrics.timed('cv_extraction'):
+        raw_cv_text, safe_filename = await asyncio.to_thread(extract_cv_text_from_upload, file)
+    if not safe_filename:
+        return None, None, (jsonify({'success': False, 'error': 'File type not allowed. Please upload a PDF, DOCX, DOC or TXT file.'}), 400)
+    if not raw_cv_text or len(raw_cv_text.strip()) < 30:
+        return None, None, (jsonify({'success': False, 'error': 'Could not extract sufficient text from CV. Please ensure it has readable content.'}), 400)
+
+    print(f"📄 CV text extracted: {len(raw_cv_text)} characters from {safe_filename}")
+    return raw_cv_text, location_input, None
+
+
+async def _analyze_cv(raw_cv_text):
+    if get_async_openai_client() is None:
+        raise Exception("OpenAI client (from ai_services) is not initialized. Cannot proceed with CV analysis.")
+    with metrics.timed('cv_analysis'):
+        cv_analysis = await analyze_cv_with_ai_async(raw_cv_text)
+    print(f"🤖 CV analysis: {cv_analysis.get('current_role', 'N/A')} with {cv_analysis.get('experience_years', 0)} years")
+    return cv_analysis
+
+
+@app.route('/search_jobs', methods=['POST'])
+async def search_jobs_route_handler():
+    raw_cv_text_for_response = "CV text not extracted due to an early error."
+    try:
+        with metrics.start_trace() as trace, metrics.timed('request', route='/search_jobs'):
+            raw_cv_text, location_input, error_response = await _extract_cv_text_from_request()
+            if error_response:
+                return error_response
+            raw_cv_text_for_response = raw_cv_text
+
+            cv_analysis = await _analyze_cv(raw_cv_text)
+            with metrics.timed('linkedin_search'):
+                linkedin_jobs_raw = await search_linkedin_jobs_async(cv_analysis, location_input, BRIGHT_DATA_CONFIG,
+                                                                     max_results=SEARCH_MAX_RESULTS)
+            print(f"🎯 Found {len(linkedin_jobs_raw)} LinkedIn jobs initially (asgi_app.py)")
+            with metrics.timed('prefilter'):
+                jobs_to_score = prefilter_jobs(linkedin_jobs_raw, cv_analysis)[:JOBS_TO_SCORE_LIMIT]
+
+            print(f"\n🤖 AI Scoring {len(jobs_to_score)} job matches concurrently...")
+            with metrics.timed('scoring'):
+                match_scores = await score_jobs_concurrently_async(jobs_to_score, cv_analysis)
+            relevant_jobs = [job for job, match_score in zip(jobs_to_score, match_scores) if _apply_match_score(job, match_score)]
+            relevant_jobs = [_add_people_search_url(job, location_input) for job in _top_relevant_jobs(relevant_jobs)]
+
+            response = {
+                'success': True, 'jobs': relevant_jobs,
+                'cv_analysis': cv_analysis,
+                'raw_cv_text': raw_cv_text,
+                'filtered_count': len(jobs_to_score) - len(relevant_jobs),
+                'prefiltered_count': len(linkedin_jobs_raw) - len(jobs_to_score)
+            }
+        if _wants_timings():
+            response['timings'] = trace.to_dict()
+        return jsonify(response)
+
+    except Exception as e:
+        print(f"❌ Error in /search_jobs (async): {e}")
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'An error occurred during processing: {str(e)}',
+            'raw_cv_text': raw_cv_text_for_response
+        }), 500
+
+
+async def aiter_search_pipeline(raw_cv_text, location_input):
+    """
+    app.iter_search_pipeline as an async generator with the same events. The LinkedIn search and
+    each scoring batch are tasks on the event loop that report back through one queue; closing the
+    generator (e.g. when the client disconnects) cancels them.
+    """
+    yield 'stage', {'stage': 'cv_analysis', 'message': 'Analyzing CV...'}
+    cv_analysis = await _analyze_cv(raw_cv_text)
+    yield 'cv_analysis', {'cv_analysis': cv_analysis, 'raw_cv_text': raw_cv_text}
+
+    yield 'stage', {'stage': 'linkedin_search', 'message': 'Searching LinkedIn for jobs...'}
+    events = asyncio.Queue() # ('jobs', jobs) / ('search_done', None) / ('search_failed', error) / ('scored', (batch, scores))
+    scoring_semaphore = asyncio.Semaphore(SCORING_MAX_IN_FLIGHT)
+    tasks = set()
+
+    async def _run_search():
+        try:
+            with metrics.timed('linkedin_search'):
+                await search_linkedin_jobs_async(cv_analysis, location_input, BRIGHT_DATA_CONFIG, max_results=SEARCH_MAX_RESULTS,
+                                                 on_new_jobs=lambda jobs: events.put_nowait(('jobs', jobs)))
+            events.put_nowait(('search_done', None))
+        except Exception as e:
+            events.put_nowait(('search_failed', e))
+
+    async def _score_batch(batch):
+        async with scoring_semaphore:
+            events.put_nowait(('scored', (batch, await score_job_batch_async(batch, cv_analysis))))
+
+    tasks.add(asyncio.create_task(_run_search()))
+    relevant_jobs = []
+    jobs_to_score_count = 0
+    prefiltered_count = 0
+    pending_batches = 0
+    search_finished = False
+    try:
+        while not search_finished or pending_batches:
+            kind, value = await events.get()
+            if kind == 'search_failed':
+                raise value
+            if kind == 'search_done':
+                search_finished = True
+                yield 'stage', {'stage': 'scoring', 'message': f'Scoring {jobs_to_score_count} jobs with AI...'}
+            elif kind == 'jobs':
+                # Each page is pre-filtered on arrival so scoring can start before the search ends
+                with metrics.timed('prefilter'):
+                    kept_jobs = prefilter_jobs(value, cv_analysis, min_keep=1)
+                new_jobs = kept_jobs[:JOBS_TO_SCORE_LIMIT - jobs_to_score_count]
+                prefiltered_count += len(value) - len(kept_jobs)
+                jobs_to_score_count += len(new_jobs)
+                for i in range(0, len(new_jobs), SCORING_BATCH_SIZE):
+                    tasks.add(asyncio.create_task(_score_batch(new_jobs[i:i + SCORING_BATCH_SIZE])))
+                    pending_batches += 1
+                if new_jobs:
+                    yield 'jobs_found', {'count': jobs_to_score_count}
+            elif kind == 'scored':
+                pending_batches -= 1
+                batch, batch_scores = value
+                for job, match_score in zip(batch, batch_scores):
+                    if _apply_match_score(job, match_score):
+                        relevant_jobs.append(_add_people_search_url(job, location_input))
+                        yield 'job', {'job': job}
+
+        relevant_jobs = _top_relevant_jobs(relevant_jobs)
+        yield 'done', {
+            'success': True, 'jobs': relevant_jobs,
+            'cv_analysis': cv_analysis,
+            'raw_cv_text': raw_cv_text,
+            'filtered_count': jobs_to_score_count - len(relevant_jobs),
+            'prefiltered_count': prefiltered_count
+        }
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@app.route('/search_jobs_stream', methods=['POST'])
+async def search_jobs_stream_route_handler():
+    """Same input as /search_jobs, but streams progress and each scored job as Server-Sent Events."""
+    try:
+        raw_cv_text, location_input, error_response = await _extract_cv_text_from_request()
+    except Exception as e:
+        print(f"❌ Error in /search_jobs_stream (async): {e}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': f'An error occurred during processing: {str(e)}'}), 500
+    if error_response:
+        return error_response
+
+    include_timings = _wants_timings()
+
+    async def generate():
+        pipeline = aiter_search_pipeline(raw_cv_text, location_input)
+        try:
+            with metrics.start_trace() as trace, metrics.timed('request', route='/search_jobs_stream'):
+                async for event_name, data in pipeline:
+                    if event_name == 'done' and include_timings:
+                        data = dict(data, timings=trace.to_dict())
+                    yield _sse_event(event_name, data)
+        except Exception as e:
+            print(f"❌ Error in /search_jobs_stream (async): {e}")
+            traceback.print_exc()
+            yield _sse_event('error', {
+                'success': False,
+                'error': f'An error occurred during processing: {str(e)}',
+                'raw_cv_text': raw_cv_text
+            })
+        finally:
+            await pipeline.aclose()
+
+    response = await make_response(generate(), {'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache',
+                                                 'X-Accel-Buffering': 'no'})
+    response.timeout = None # A search can stream for longer than Quart's default response timeout
+    return response
+
+
+async def _parse_tailor_request():
+    """Async version of app._parse_tailor_request."""
+    data = await request.get_json(silent=True)
+    if not data:
+        return None, None, (jsonify({'success': False, 'error': 'Invalid request: No JSON payload.'}), 400)
+    original_cv_text = data.get('original_cv_text')
+    job_details = data.get('job_details')
+    if not original_cv_text or not job_details:
+        return None, None, (jsonify({'success': False, 'error': 'Missing original_cv_text or job_details.'}), 400)
+    if not job_details.get('title') or not job_details.get('company'):
+        return None, None, (jsonify({'success': False, 'error': 'Job details missing title or company.'}), 400)
+    if get_async_openai_client() is None:
+        return None, None, (jsonify({'success': False, 'error': 'OpenAI client (from ai_services) not configured on server.'}), 500)
+    return original_cv_text, job_details, None
+
+
+async def _tailor(original_cv_text, job_details):
+    """Cached and deduplicated like TailoringService.tailor, with the OpenAI call awaited on the event loop."""
+    cached = await asyncio.to_thread(tailoring_service.get_cached, original_cv_text, job_details) # SQLite disk tier
+    if cached is not None:
+        print(f"♻️ Tailored CV served from cache for: {job_details.get('title')}")
+        return cached
+    key = tailoring_service.cache_key(original_cv_text, job_details)
+    task = _tailoring_in_flight.get(key)
+    if task is None:
+        # The OpenAI usage of a shared call is attributed to the request that started it
+        task = asyncio.create_task(tailor_cv_with_ai_async(original_cv_text, job_details))
+        _tailoring_in_flight[key] = task
+        task.add_done_callback(lambda _: _tailoring_in_flight.pop(key, None))
+    else:
+        print(f"🔁 Joining in-flight tailoring call for: {job_details.get('title')}")
+    # shield: one client disconnecting must not cancel the call for the others waiting on it
+    result = await asyncio.shield(task)
+    await asyncio.to_thread(tailoring_service.store, original_cv_text, job_details, result)
+    return copy.deepcopy(result)
+
+
+@app.route('/tailor_cv', methods=['POST'])
+async def tailor_cv_route_handler():
+    try:
+        original_cv_text, job_details, error_response = await _parse_tailor_request()
+        if error_response:
+            return error_response
+
+        print(f"⚡ Request to tailor CV for job: {job_details.get('title')} at {job_details.get('company')}")
+        with metrics.start_trace() as trace, metrics.timed('request', route='/tailor_cv'):
+            tailoring_results = await _tailor(original_cv_text, job_details)
+        response = {'success': True, 'data': tailoring_results}
+        if _wants_timings():
+            response['timings'] = trace.to_dict()
+        return jsonify(response)
+    except Exception as e:
+        print(f"❌ Error during CV tailoring in /tailor_cv (async): {e}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': _tailor_error_message(e)}), 500
+
+
+@app.route('/health')
+async def health_route():
+    """Health check"""
+    # The score cache and job store count their SQLite rows, so the stats are gathered in a worker thread
+    match_score_stats, job_store_stats = await asyncio.to_thread(
+        lambda: (match_score_cache.stats(), job_store.stats() if job_store is not None else None))
+    return jsonify({
+        'status': 'healthy',
+        'mode': 'asgi',
+        'openai_client_initialized_in_ai_services': bool(settings.openai_api_key), # The client itself is created on first use
+        'bright_data_proxy_password_configured': bright_data_password_configured(BRIGHT_DATA_CONFIG),
+        'match_score_cache': match_score_stats,
+        'tailoring_in_flight': len(_tailoring_in_flight),
+        'job_store': job_store_stats,
+        'linkedin_response_cache': linkedin_response_cache.stats() if linkedin_response_cache is not None else None,
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/metrics')
+async def metrics_route():
+    """Prometheus scrape endpoint (same registry as app.py's /metrics)."""
+    return await asyncio.to_thread(metrics.render_prometheus), 200, {'Content-Type': 'text/plain; version=0.0.4'}
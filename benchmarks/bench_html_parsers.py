@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark for linkedin_services.parse_linkedin_html backends.
+
+Parses the saved LinkedIn guest-API pages in benchmarks/fixtures/ with every available
+backend (bs4, lxml, selectolax), checks they all return the same jobs, and prints
+pages/sec and cards/sec for each.
+
+Usage:
+    python benchmarks/bench_html_parsers.py [--rounds 200]
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import linkedin_services # noqa: E402
+from bs4 import BeautifulSoup # noqa: E402
+
+FIXTURES_DIR = BENCH_DIR / 'fixtures'
+
+
+def load_fixtures():
+    return [path.read_text(encoding='utf-8') for path in sorted(FIXTURES_DIR.glob('linkedin_guest_search_page_*.html'))]
+
+
+def count_cards(pages):
+    # Card elements the parser has to walk (capped per page like the parser itself)
+    soup_cards = 0
+    for html in pages:
+        soup = BeautifulSoup(html, 'html.parser')
+        found = soup.find_all(['div', 'li'], class_=linkedin_services._CARD_CLASS_PATTERNS)
+        soup_cards += min(len(found), linkedin_services.MAX_CARDS_PER_PAGE)
+    return soup_cards
+
+
+def run_backend(backend, pages, rounds):
+    with contextlib.redirect_stdout(io.StringIO()): # parse_linkedin_html prints per page
+        results = [linkedin_services.parse_linkedin_html(html, 'Berlin', backend=backend) for html in pages]
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for html in pages:
+                linkedin_services.parse_linkedin_html(html, 'Berlin', backend=backend)
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=200, help='times each fixture is parsed per backend')
+    args = parser.parse_args()
+
+    pages = load_fixtures()
+    if not pages:
+        sys.exit(f"No fixtures found in {FIXTURES_DIR}")
+    cards_per_round = count_cards(pages)
+    print(f"Fixtures: {len(pages)} pages, {cards_per_round} cards per round, {args.rounds} rounds")
+
+    baseline = None
+    print(f"{'backend':<12}{'pages/sec':>12}{'cards/sec':>14}{'speedup':>10}  output")
+    for backend in linkedin_services.available_parser_backends():
+        results, elapsed = run_backend(backend, pages, args.rounds)
+        if baseline is None:
+            baseline = (results, elapsed)
+        same_output = 'matches bs4' if results == baseline[0] else 'DIFFERS from bs4'
+        pages_per_sec = len(pages) * args.rounds / elapsed
+        cards_per_sec = cards_per_round * args.rounds / elapsed
+        print(f"{backend:<12}{pages_per_sec:>12.1f}{cards_per_sec:>14.1f}{baseline[1] / elapsed:>9.1f}x  {same_output}")
+
+
+if __name__ == '__main__':
+    main()
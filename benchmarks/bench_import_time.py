@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Cold-start import time of the app's entry modules, measured with `python -X importtime`.
+
+Each target module is imported --repeat times, each time in a fresh interpreter. The script
+prints the median import time and wall-clock time, which lazily loaded libraries (openai,
+PyPDF2, docx, bs4, numpy, httpx) got imported anyway, and anything the import printed to stdout.
+It also lists the packages whose imports took the longest. Use --eager to measure with
+LAZY_INIT=false, --json to save the results for tracking, and --budget-ms to exit with an error
+when a target gets slower than the budget (e.g. in CI).
+
+Usage:
+    python benchmarks/bench_import_time.py [--targets app,bulk_matching] [--repeat 5] [--top 10]
+        [--eager] [--budget-ms 800] [--json results.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_TARGETS = ('app', 'ai_services', 'linkedin_services', 'cv_utils', 'bulk_matching', 'settings')
+LAZY_MODULES = ('openai', 'PyPDF2', 'docx', 'bs4', 'numpy', 'httpx')
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def import_once(target, eager):
+    """{'total_us', 'wall_ms', 'self_us': {module: us}, 'stdout'} for one fresh `import target`."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    if eager:
+        env['LAZY_INIT'] = 'false'
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {target}'], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f'exit code {result.returncode}')
+    self_us, total_us = {}, None
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        module = match.group(4)
+        self_us[module] = int(match.group(1))
+        if module == target and len(match.group(3)) == 1: # Top level of the tree
+            total_us = int(match.group(2))
+    return {'total_us': total_us or 0, 'wall_ms': wall_ms, 'self_us': self_us, 'stdout': result.stdout}
+
+
+def measure(target, repeat, eager):
+    runs = [import_once(target, eager) for _ in range(repeat)]
+    per_package = defaultdict(list)
+    for run in runs:
+        totals = defaultdict(int)
+        for module, us in run['self_us'].items():
+            totals[module.split('.')[0]] += us
+        for package, us in totals.items():
+            per_package[package].append(us)
+    return {
+        'import_ms': statistics.median(run['total_us'] for run in runs) / 1000,
+        'wall_ms': statistics.median(run['wall_ms'] for run in runs),
+        # importlib.import_module() imports aren't logged by -X importtime, but their submodules are
+        'lazy_modules_loaded': [m for m in LAZY_MODULES if any(name == m or name.startswith(m + '.') for name in runs[0]['self_us'])],
+        'stdout_lines': len(runs[0]['stdout'].splitlines()),
+        'packages_ms': {package: statistics.median(values) / 1000 for package, values in per_package.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', default=','.join(DEFAULT_TARGETS), help='comma-separated modules to import')
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per target (the median is reported)')
+    parser.add_argument('--top', type=int, default=10, help='slowest packages to list for the first target')
+    parser.add_argument('--eager', action='store_true', help='measure with LAZY_INIT=false')
+    parser.add_argument('--budget-ms', type=float, help='exit with status 1 if any import takes longer than this')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(',') if t.strip()]
+    print(f"Python {sys.version.split()[0]}, {'eager (LAZY_INIT=false)' if args.eager else 'lazy'} init, "
+          f"median of {args.repeat} fresh interpreters")
+    print(f"\n  {'module':<20}{'import ms':>10}{'wall ms':>9}{'stdout lines':>14}  lazy libraries loaded")
+    results, over_budget = {}, []
+    for target in targets:
+        try:
+            result = measure(target, args.repeat, args.eager)
+        except RuntimeError as e:
+            print(f"  {target:<20}  import failed: {e}")
+            continue
+        results[target] = result
+        print(f"  {target:<20}{result['import_ms']:>10.1f}{result['wall_ms']:>9.1f}{result['stdout_lines']:>14}  "
+              f"{', '.join(result['lazy_modules_loaded']) or '-'}")
+        if args.budget_ms and result['import_ms'] > args.budget_ms:
+            over_budget.append(target)
+
+    if results:
+        first = next(iter(results))
+        slowest = sorted(results[first]['packages_ms'].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        print(f"\nSlowest packages when importing {first} (ms, summed over their modules):")
+        for package, ms in slowest:
+            print(f"  {package:<28}{ms:>8.1f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({'python': sys.version.split()[0], 'eager': args.eager, 'results': results}, indent=2))
+    if over_budget:
+        sys.exit(f"\n❌ Over the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+
+
+if __name__ == '__main__':
+    main()
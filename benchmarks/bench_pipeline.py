@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark for /search_jobs and /tailor_cv, fully offline.
+
+Starts a fake OpenAI server and a fake LinkedIn proxy (see fake_services.py), points the app at
+them through OPENAI_BASE_URL, BRIGHTDATA_HOST/PORT, LINKEDIN_BASE_URL and PROXY_HEALTH_CHECK_URL,
+then drives the real Flask route handlers with 1..N concurrent users. For each concurrency level it
+prints throughput, p50/p95/p99 latency per endpoint, the mean time per pipeline stage (from
+?timings=1) and memory allocated while serving (tracemalloc peak and retained).
+
+By default every request uses a different CV and the caches are off ("cold"), so each search
+really runs CV analysis, the LinkedIn fetches and scoring. --warm keeps the caches on and reuses
+one CV, which measures the cached path instead.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--users 1,2,4,8] [--requests-per-user 3]
+        [--openai-latency-ms 150] [--openai-error-rate 0.05] [--linkedin-latency-ms 300] [--warm]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from fake_services import FakeOpenAIServer, FakeLinkedInProxy # noqa: E402
+
+SAMPLE_CV = """JANE DOE
+Senior Python Developer - Berlin, Germany
+
+SUMMARY
+Backend engineer with 7 years of experience building Python services, REST APIs and data pipelines.
+
+EXPERIENCE
+Senior Python Developer, Example GmbH (2020 - today)
+- Built Django and FastAPI services handling 2,000 requests per second.
+- Moved batch jobs to AWS with Docker and Terraform, cutting costs by 30%.
+Python Developer, Sample AG (2017 - 2020)
+- Maintained PostgreSQL-backed order processing and reporting.
+
+SKILLS
+Python, Django, FastAPI, PostgreSQL, Redis, AWS, Docker, Kubernetes, Terraform
+"""
+
+
+def configure_environment(openai_server, linkedin_proxy, warm, cache_dir):
+    """Points the app at the fake servers; must run before app is imported."""
+    os.environ.update({
+        'OPENAI_API_KEY': 'bench-key',
+        'OPENAI_BASE_URL': openai_server.base_url,
+        'BRIGHTDATA_ACTUAL_PASSWORD': 'bench-password',
+        'BRIGHTDATA_HOST': '127.0.0.1',
+        'BRIGHTDATA_PORT': str(linkedin_proxy.port),
+        'LINKEDIN_BASE_URL': 'http://linkedin.bench',
+        'PROXY_HEALTH_CHECK_URL': 'http://proxy-health.bench/ip',
+    })
+    # No client-side LinkedIn throttling unless asked for; it would dominate every run otherwise
+    os.environ.setdefault('LINKEDIN_REQUESTS_PER_SECOND', '1000')
+    os.environ.setdefault('LINKEDIN_RATE_BURST', '1000')
+    if warm:
+        os.environ['CV_CACHE_DB_PATH'] = os.path.join(cache_dir, 'ai_cache.sqlite3')
+        os.environ['JOB_STORE_DB_PATH'] = os.path.join(cache_dir, 'jobs.sqlite3')
+    else:
+        os.environ.update({'CV_CACHE_DB_PATH': '', 'JOB_STORE_DB_PATH': '', 'SCORE_CACHE_ENABLED': 'False',
+                           'LINKEDIN_RESPONSE_CACHE_ENABLED': 'False'})
+
+
+def import_app(openai_server, linkedin_proxy):
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    # A .env file is loaded with override=True on import; make sure nothing real is reached
+    base_url = str(getattr(app.get_openai_client(), 'base_url', ''))
+    if not base_url.startswith(openai_server.base_url):
+        sys.exit(f"OpenAI client points at {base_url or 'nothing'}, not the fake server; check OPENAI_BASE_URL in .env")
+    if app.BRIGHT_DATA_CONFIG['host'] != '127.0.0.1' or app.BRIGHT_DATA_CONFIG['port'] != str(linkedin_proxy.port):
+        sys.exit("Bright Data proxy is not the fake proxy; check BRIGHTDATA_HOST/BRIGHTDATA_PORT in .env")
+    return app
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class Results:
+    def __init__(self):
+        self.latencies = {} # endpoint -> [seconds]
+        self.errors = {} # endpoint -> count
+        self.stage_seconds = {} # stage -> [seconds per request]
+        self.tokens = []
+        self.cached_tokens = []
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, seconds, ok, timings=None):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            if timings:
+                for stage, entry in timings.get('stages', {}).items():
+                    self.stage_seconds.setdefault(stage, []).append(entry['total_seconds'])
+                self.tokens.append(timings.get('tokens', {}).get('total_tokens', 0))
+                self.cached_tokens.append(timings.get('tokens', {}).get('cached_prompt_tokens', 0))
+
+    @property
+    def requests(self):
+        return sum(len(values) for values in self.latencies.values())
+
+
+def run_user(client, user_index, requests_per_user, scenario, warm, results):
+    for i in range(requests_per_user):
+        cv_text = SAMPLE_CV if warm else f"{SAMPLE_CV}\nReference: user {user_index} request {i} {time.time_ns()}\n"
+        jobs = []
+        if scenario in ('search', 'both'):
+            start = time.perf_counter()
+            response = client.post('/search_jobs?timings=1', content_type='multipart/form-data',
+                                   data={'cv_file': (io.BytesIO(cv_text.encode('utf-8')), 'cv.txt'), 'location': 'Berlin'})
+            body = response.get_json(silent=True) or {}
+            results.add('search_jobs', time.perf_counter() - start, response.status_code == 200 and body.get('success'),
+                        body.get('timings'))
+            jobs = body.get('jobs') or []
+        if scenario in ('tailor', 'both'):
+            job = jobs[0] if jobs else {'title': 'Backend Engineer', 'company': 'Acme GmbH', 'location': 'Berlin',
+                                        'url': f'https://www.linkedin.com/jobs/view/backend-engineer-{user_index}{i}',
+                                        'description': 'Python, Django and AWS.'}
+            start = time.perf_counter()
+            response = client.post('/tailor_cv?timings=1', json={'original_cv_text': cv_text, 'job_details': job})
+            body = response.get_json(silent=True) or {}
+            results.add('tailor_cv', time.perf_counter() - start, response.status_code == 200 and body.get('success'),
+                        body.get('timings'))
+
+
+def run_level(app, users, args):
+    results = Results()
+    clients = [app.app.test_client() for _ in range(users)]
+    threads = [threading.Thread(target=run_user, args=(clients[u], u, args.requests_per_user, args.scenario, args.warm, results))
+               for u in range(users)]
+    if args.tracemalloc:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    memory = None
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory = ((peak - baseline) / 1024 / 1024, (current - baseline) / 1024 / 1024)
+    return results, elapsed, memory
+
+
+def print_level(users, results, elapsed, memory):
+    memory_text = f", peak alloc {memory[0]:.1f} MB, retained {memory[1]:.1f} MB" if memory else ''
+    print(f"\n{users} user(s): {results.requests} requests in {elapsed:.2f}s = {results.requests / elapsed:.2f} req/s{memory_text}")
+    print(f"  {'endpoint':<14}{'count':>7}{'errors':>8}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for endpoint, values in sorted(results.latencies.items()):
+        values = sorted(values)
+        print(f"  {endpoint:<14}{len(values):>7}{results.errors.get(endpoint, 0):>8}{statistics.mean(values):>9.3f}"
+              f"{percentile(values, 50):>9.3f}{percentile(values, 95):>9.3f}{percentile(values, 99):>9.3f}")
+    if results.stage_seconds:
+        stages = ', '.join(f"{stage} {statistics.mean(values):.3f}s" for stage, values in sorted(results.stage_seconds.items()))
+        # Stage times are summed over a request's parallel calls, so they can add up to more than its latency
+        print(f"  mean stage time per request: {stages}; {statistics.mean(results.tokens):.0f} OpenAI tokens "
+              f"({statistics.mean(results.cached_tokens):.0f} prompt tokens cached)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', default='1,2,4,8', help='comma-separated concurrency levels')
+    parser.add_argument('--requests-per-user', type=int, default=3)
+    parser.add_argument('--scenario', choices=('search', 'tailor', 'both'), default='both',
+                        help="'both' tailors the top job of each search")
+    parser.add_argument('--warm', action='store_true', help='keep caches on and reuse one CV')
+    parser.add_argument('--openai-latency-ms', type=float, default=150.0)
+    parser.add_argument('--openai-ms-per-token', type=float, default=1.0, help='extra latency per completion token')
+    parser.add_argument('--openai-error-rate', type=float, default=0.0, help='share of OpenAI calls that fail')
+    parser.add_argument('--openai-error-status', type=int, default=429)
+    parser.add_argument('--linkedin-latency-ms', type=float, default=300.0)
+    parser.add_argument('--linkedin-error-rate', type=float, default=0.0)
+    parser.add_argument('--linkedin-error-status', type=int, default=500)
+    parser.add_argument('--linkedin-pages-per-term', type=int, default=3)
+    parser.add_argument('--no-tracemalloc', dest='tracemalloc', action='store_false',
+                        help='skip allocation tracking (it slows Python code down noticeably)')
+    parser.add_argument('--verbose', action='store_true', help="show the app's log output")
+    args = parser.parse_args()
+
+    openai_server = FakeOpenAIServer(latency_ms=args.openai_latency_ms, ms_per_output_token=args.openai_ms_per_token,
+                                     error_rate=args.openai_error_rate, error_status=args.openai_error_status).start()
+    linkedin_proxy = FakeLinkedInProxy(latency_ms=args.linkedin_latency_ms, pages_per_term=args.linkedin_pages_per_term,
+                                       error_rate=args.linkedin_error_rate, error_status=args.linkedin_error_status).start()
+    with tempfile.TemporaryDirectory(prefix='bench-pipeline-') as cache_dir:
+        configure_environment(openai_server, linkedin_proxy, args.warm, cache_dir)
+        app = import_app(openai_server, linkedin_proxy)
+        print(f"Scenario: {args.scenario}, {'warm' if args.warm else 'cold'} caches, {args.requests_per_user} requests per user; "
+              f"OpenAI {args.openai_latency_ms:.0f} ms (+{args.openai_ms_per_token} ms/token, {args.openai_error_rate:.0%} errors), "
+              f"LinkedIn {args.linkedin_latency_ms:.0f} ms ({args.linkedin_error_rate:.0%} errors)")
+        for users in [int(u) for u in args.users.split(',') if u.strip()]:
+            with open(os.devnull, 'w') as devnull, \
+                    (contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)):
+                results, elapsed, memory = run_level(app, users, args)
+            print_level(users, results, elapsed, memory)
+        print(f"\nFake OpenAI: {openai_server.stats()}; fake LinkedIn proxy: {linkedin_proxy.stats()}")
+    openai_server.stop()
+    linkedin_proxy.stop()
+
+
+if __name__ == '__main__':
+    main()
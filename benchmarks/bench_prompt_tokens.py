@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Prompt size with and without CV compaction, fully offline.
+
+Sends the real CV analysis and CV tailoring prompts from ai_services.py to the fake OpenAI server
+(see fake_services.py) for each CV, once with PROMPT_COMPACTION_ENABLED off and once on, and prints
+the prompt tokens each call used. Each prompt is sent twice so the second call shows how much of it
+would be served from OpenAI's prompt cache. Token counts are exact when tiktoken is installed
+(pip install tiktoken) and estimated otherwise.
+
+Usage:
+    python benchmarks/bench_prompt_tokens.py [--cv path/to/cv.txt ...]
+        [--analysis-max-tokens 1500] [--tailor-max-tokens 3000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from fake_services import FakeOpenAIServer, FIXTURES_DIR # noqa: E402
+
+JOB = {'title': 'Senior Backend Engineer (Python)', 'company': 'Acme GmbH', 'location': 'Berlin, Germany',
+       'url': 'https://www.linkedin.com/jobs/view/senior-backend-engineer-3800000001',
+       'description': 'We are looking for a backend engineer to build our logistics platform with Python, Django, '
+                      'PostgreSQL and AWS. You will own services end to end and mentor other engineers.'}
+
+
+def import_ai_services(openai_server):
+    os.environ.update({'OPENAI_API_KEY': 'bench-key', 'OPENAI_BASE_URL': openai_server.base_url, 'CV_CACHE_DB_PATH': ''})
+    with contextlib.redirect_stdout(io.StringIO()):
+        import ai_services
+    base_url = str(getattr(ai_services.get_openai_client(), 'base_url', ''))
+    if not base_url.startswith(openai_server.base_url):
+        sys.exit(f"OpenAI client points at {base_url or 'nothing'}, not the fake server; check OPENAI_BASE_URL in .env")
+    return ai_services
+
+
+def measure(ai_services, cv_text, compaction):
+    """{stage: (prompt_tokens, cached_prompt_tokens on a repeat call, tokens saved by compaction)}"""
+    import metrics
+    ai_services.PROMPT_COMPACTION_ENABLED = compaction
+    calls = {
+        'cv_analysis': lambda: ai_services.analyze_cv_with_ai(cv_text, use_cache=False),
+        'tailoring': lambda: ai_services.tailor_cv_with_ai(cv_text, JOB),
+    }
+    results = {}
+    for stage, call in calls.items():
+        traces = []
+        for _ in range(2):
+            with contextlib.redirect_stdout(io.StringIO()), metrics.start_trace() as trace:
+                call()
+            traces.append(trace.tokens)
+        results[stage] = (traces[0]['prompt_tokens'], traces[1]['cached_prompt_tokens'], traces[0]['prompt_tokens_saved'])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cv', action='append', help='plain-text CV to measure (repeatable); default: the fixture CV')
+    parser.add_argument('--analysis-max-tokens', type=int, help='override CV_ANALYSIS_MAX_CV_TOKENS')
+    parser.add_argument('--tailor-max-tokens', type=int, help='override TAILOR_MAX_CV_TOKENS')
+    args = parser.parse_args()
+
+    openai_server = FakeOpenAIServer(latency_ms=0, ms_per_output_token=0).start()
+    ai_services = import_ai_services(openai_server)
+    if args.analysis_max_tokens:
+        ai_services.CV_ANALYSIS_MAX_CV_TOKENS = args.analysis_max_tokens
+    if args.tailor_max_tokens:
+        ai_services.TAILOR_MAX_CV_TOKENS = args.tailor_max_tokens
+    from prompt_utils import tiktoken
+    print(f"Token counts: {'tiktoken' if tiktoken else 'estimated (tiktoken not installed)'}; "
+          f"CV budgets: analysis {ai_services.CV_ANALYSIS_MAX_CV_TOKENS}, tailoring {ai_services.TAILOR_MAX_CV_TOKENS}")
+
+    for path in args.cv or [FIXTURES_DIR / 'sample_cv_long.txt']:
+        cv_text = Path(path).read_text(encoding='utf-8')
+        before = measure(ai_services, cv_text, compaction=False)
+        after = measure(ai_services, cv_text, compaction=True)
+        print(f"\n{path}")
+        print(f"  {'stage':<13}{'off':>8}{'on':>8}{'saved':>8}{'cached on repeat':>18}")
+        for stage in before:
+            off_tokens, on_tokens = before[stage][0], after[stage][0]
+            saving = 1 - on_tokens / off_tokens if off_tokens else 0
+            print(f"  {stage:<13}{off_tokens:>8}{on_tokens:>8}{saving:>8.0%}{after[stage][1]:>18}")
+    openai_server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Throughput of the multi-process launcher (serve.py) by worker count, fully offline.
+
+For each worker count, starts `serve.py --workers N` against the fake OpenAI server and fake
+LinkedIn proxy (see fake_services.py) with fresh SQLite caches, then sends /search_jobs over HTTP
+from --users concurrent clients in two rounds:
+  new CVs  - every request uses a CV the server has not seen before;
+  repeat   - the same CVs again; they usually reach a different worker than the first time, so
+             the number of OpenAI calls shows whether the workers share their caches.
+
+Usage (needs Gunicorn: pip install gunicorn):
+    python benchmarks/bench_workers.py [--workers 1,4] [--users 16] [--requests-per-user 3]
+        [--openai-latency-ms 150] [--linkedin-latency-ms 300]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import requests
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from fake_services import FakeOpenAIServer, FakeLinkedInProxy # noqa: E402
+from bench_pipeline import SAMPLE_CV, configure_environment, percentile # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers, port, log_file):
+    process = subprocess.Popen([sys.executable, str(BENCH_DIR.parent / 'serve.py'), '--workers', str(workers),
+                                '--bind', f'127.0.0.1:{port}'], cwd=BENCH_DIR.parent, stdout=log_file, stderr=log_file)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"serve.py exited with code {process.returncode}; see {log_file.name}")
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/health', timeout=1).ok:
+                return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    sys.exit(f"serve.py did not come up within 60s; see {log_file.name}")
+
+
+def run_round(base_url, cv_texts, users):
+    """Sends every CV in cv_texts once, `users` at a time. Returns (elapsed, latencies, errors, worker pids)."""
+    latencies, errors, worker_pids = [], 0, Counter()
+    lock = threading.Lock()
+    pending = list(enumerate(cv_texts))
+
+    def run_user():
+        nonlocal errors
+        session = requests.Session()
+        while True:
+            with lock:
+                if not pending:
+                    return
+                _, cv_text = pending.pop()
+            start = time.perf_counter()
+            try:
+                response = session.post(f'{base_url}/search_jobs', files={'cv_file': ('cv.txt', cv_text.encode('utf-8'))},
+                                        data={'location': 'Berlin'}, timeout=300)
+                ok = response.ok and response.json().get('success')
+            except (requests.RequestException, ValueError):
+                ok = False
+            pid = session.get(f'{base_url}/health', timeout=10).json().get('worker_pid')
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                errors += 0 if ok else 1
+                worker_pids[pid] += 1
+
+    threads = [threading.Thread(target=run_user) for _ in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sorted(latencies), errors, worker_pids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,4', help='comma-separated worker counts')
+    parser.add_argument('--users', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--requests-per-user', type=int, default=3)
+    parser.add_argument('--openai-latency-ms', type=float, default=150.0)
+    parser.add_argument('--linkedin-latency-ms', type=float, default=300.0)
+    args = parser.parse_args()
+
+    openai_server = FakeOpenAIServer(latency_ms=args.openai_latency_ms).start()
+    linkedin_proxy = FakeLinkedInProxy(latency_ms=args.linkedin_latency_ms).start()
+    cv_texts = [f"{SAMPLE_CV}\nReference: request {i}\n" for i in range(args.users * args.requests_per_user)]
+    print(f"{len(cv_texts)} searches per round, {args.users} concurrent clients; "
+          f"OpenAI {args.openai_latency_ms:.0f} ms, LinkedIn {args.linkedin_latency_ms:.0f} ms")
+    print(f"\n  {'workers':<9}{'round':<9}{'req/s':>8}{'p50':>8}{'p95':>8}{'errors':>8}{'OpenAI calls':>14}{'workers hit':>13}")
+    for workers in [int(w) for w in args.workers.split(',') if w.strip()]:
+        with tempfile.TemporaryDirectory(prefix='bench-workers-') as cache_dir, \
+                open(os.path.join(cache_dir, 'serve.log'), 'w') as log_file:
+            configure_environment(openai_server, linkedin_proxy, True, cache_dir)
+            os.environ['TASK_STORE_DB_PATH'] = os.path.join(cache_dir, 'tasks.sqlite3')
+            port = free_port()
+            process = start_server(workers, port, log_file)
+            try:
+                for round_name in ('new CVs', 'repeat'):
+                    calls_before = openai_server.stats()['requests']
+                    elapsed, latencies, errors, worker_pids = run_round(f'http://127.0.0.1:{port}', cv_texts, args.users)
+                    openai_calls = openai_server.stats()['requests'] - calls_before
+                    print(f"  {workers:<9}{round_name:<9}{len(latencies) / elapsed:>8.2f}{percentile(latencies, 50):>8.3f}"
+                          f"{percentile(latencies, 95):>8.3f}{errors:>8}{openai_calls:>14}{len(worker_pids):>13}")
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+    openai_server.stop()
+    linkedin_proxy.stop()
+
+
+if __name__ == '__main__':
+    main()
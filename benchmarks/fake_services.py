@@ -0,0 +1,267 @@
+"""
+Local stand-ins for OpenAI and LinkedIn (through the Bright Data proxy), used by bench_pipeline.py.
+
+FakeOpenAIServer answers POST /v1/chat/completions with canned but well-formed responses for the
+three prompts in ai_services.py (CV analysis, single/batch match scoring, CV tailoring), after a
+configurable latency, and can inject errors (e.g. 429s) at a given rate. Like OpenAI's prompt
+caching, prompt prefixes of 1024+ tokens it has seen before are reported as cached_tokens.
+
+FakeLinkedInProxy is an HTTP proxy: the app is pointed at it through BRIGHTDATA_HOST/PORT and
+requests plain-http LINKEDIN_BASE_URL / PROXY_HEALTH_CHECK_URL URLs, which arrive here in
+absolute form. Search pages are the recorded guest-API HTML from benchmarks/fixtures/, with
+job IDs and company names varied per search term so terms don't all collapse into the same postings.
+"""
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+_JOB_ID_RE = re.compile(r'\b(3800000\d{3})\b')
+_COMPANY_RE = re.compile(r'(<h4 class="base-search-card__subtitle">\s*<a[^>]*>\s*)([^<]+?)(\s*</a>)')
+_BATCH_JOB_RE = re.compile(r'\[JOB (\d+)\]\s*- Title: (.*)')
+_TITLE_RE = re.compile(r'- Title: (.*)')
+_PAIR_RE = re.compile(r'- (P\d+): candidate (C\d+), job (J\d+)')
+_JOB_BLOCK_RE = re.compile(r'\[JOB (J?\d+)\]\s*- Title: (.*)')
+
+CV_ANALYSIS = {
+    'current_role': 'Senior Python Developer',
+    'experience_years': 7,
+    'technical_skills': ['Python', 'Django', 'PostgreSQL', 'AWS', 'Docker'],
+    'industry': 'Software',
+    'career_level': 'Senior',
+    'target_job_titles': ['Backend Engineer', 'Python Engineer', 'Software Engineer', 'Platform Engineer', 'Data Engineer'],
+    'key_achievements': ['Led migration to microservices', 'Cut API latency by 40%'],
+}
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class _BaseFakeServer:
+    """Runs a handler class on 127.0.0.1:<free port> in a daemon thread."""
+
+    handler_class = None
+
+    def __init__(self, latency_ms=0.0, jitter=0.2, error_rate=0.0, error_status=429, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.errors_injected = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        handler = type('Handler', (self.handler_class,), {'fake': self})
+        self._httpd = _QuietServer(('127.0.0.1', 0), handler)
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name=type(self).__name__, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _next_request(self):
+        """Counts the request and returns (inject_error, jitter_factor)."""
+        with self._lock:
+            self.requests += 1
+            inject_error = self._random.random() < self.error_rate
+            if inject_error:
+                self.errors_injected += 1
+            return inject_error, 1 + self._random.uniform(-self.jitter, self.jitter)
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'errors_injected': self.errors_injected}
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Keep-alive, like the real services
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        body = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _approx_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _score_for(title):
+    # Deterministic per title, spread over 0.2-0.95 so some jobs fall below the relevance cut-off
+    return round(0.2 + (zlib.crc32(title.strip().encode('utf-8')) % 76) / 100, 2)
+
+
+class _OpenAIHandler(_QuietHandler):
+    fake = None
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send(404, json.dumps({'error': {'message': f'Unknown path {self.path}'}}))
+            return
+        if payload.get('stream'):
+            self._send(400, json.dumps({'error': {'message': 'Streaming is not supported by the fake server.'}}))
+            return
+
+        inject_error, jitter_factor = self.fake._next_request()
+        messages = payload.get('messages') or []
+        system = next((m.get('content', '') for m in messages if m.get('role') == 'system'), '')
+        prompt = next((m.get('content', '') for m in messages if m.get('role') == 'user'), '')
+        content = self.fake.completion_content(system, prompt)
+        prompt_tokens = sum(_approx_tokens(m.get('content', '')) for m in messages)
+        cached_tokens = self.fake.cached_prompt_tokens(messages)
+        completion_tokens = _approx_tokens(content)
+        time.sleep(self.fake.latency_seconds(completion_tokens) * jitter_factor)
+
+        if inject_error:
+            self._send(self.fake.error_status, json.dumps({'error': {'message': 'Injected error', 'type': 'fake_error'}}),
+                       headers={'retry-after': '0'})
+            return
+        self._send(200, json.dumps({
+            'id': f'chatcmpl-fake-{self.fake.requests}', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': payload.get('model', 'gpt-4o'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens,
+                      'prompt_tokens_details': {'cached_tokens': cached_tokens}},
+        }))
+
+
+class FakeOpenAIServer(_BaseFakeServer):
+    """
+    Fake chat completions endpoint. Each call takes latency_ms plus ms_per_output_token for every
+    completion token (+/- jitter); error_rate of calls get error_status instead of a result.
+    """
+
+    handler_class = _OpenAIHandler
+    CACHE_MIN_CHARS = 1024 * 4 # Prompts under ~1024 tokens are never cached
+    CACHE_BLOCK_CHARS = 128 * 4 # Cache hits grow in 128-token steps
+
+    def __init__(self, latency_ms=150.0, ms_per_output_token=1.0, **kwargs):
+        self.ms_per_output_token = ms_per_output_token
+        self._seen_prefixes = set()
+        super().__init__(latency_ms=latency_ms, **kwargs)
+
+    def cached_prompt_tokens(self, messages):
+        """Tokens of the longest previously seen prompt prefix (0 below the caching minimum)."""
+        text = '\n'.join(m.get('content', '') for m in messages)
+        prefixes = [hash(text[:end]) for end in range(self.CACHE_MIN_CHARS, len(text) + 1, self.CACHE_BLOCK_CHARS)]
+        with self._lock:
+            cached_chars = 0
+            for i, prefix in enumerate(prefixes):
+                if prefix not in self._seen_prefixes:
+                    break
+                cached_chars = self.CACHE_MIN_CHARS + i * self.CACHE_BLOCK_CHARS
+            self._seen_prefixes.update(prefixes)
+        return cached_chars // 4
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.port}/v1'
+
+    def latency_seconds(self, completion_tokens):
+        return (self.latency_ms + self.ms_per_output_token * completion_tokens) / 1000
+
+    def completion_content(self, system, prompt):
+        if 'career analyst' in system:
+            return json.dumps(CV_ANALYSIS)
+        if 'resume writer' in system:
+            title = re.search(r'Title: (.*)', prompt)
+            title = title.group(1).strip() if title else 'the role'
+            body = '\n'.join(f'- Delivered outcome {i} relevant to {title}.' for i in range(40))
+            return json.dumps({
+                'tailored_cv': f'JANE DOE\nSenior Python Developer\n\nEXPERIENCE\n{body}',
+                'recommendations': [f'Highlight experience {i} for {title}.' for i in range(5)],
+            })
+        pairs = _PAIR_RE.findall(prompt)
+        if pairs: # Multi-candidate scoring (bulk matching)
+            titles = dict(_JOB_BLOCK_RE.findall(prompt))
+            return json.dumps({'results': [
+                {'id': pair_id, 'match_score': _score_for(titles.get(job_id, '') + candidate_id),
+                 'reasoning': 'Skills overlap with the role.', 'is_relevant': _score_for(titles.get(job_id, '') + candidate_id) >= 0.3}
+                for pair_id, candidate_id, job_id in pairs
+            ]})
+        batch_jobs = _BATCH_JOB_RE.findall(prompt)
+        if batch_jobs:
+            return json.dumps({'results': [
+                {'id': job_id, 'match_score': _score_for(title), 'reasoning': 'Skills overlap with the role.',
+                 'is_relevant': _score_for(title) >= 0.3}
+                for job_id, title in batch_jobs
+            ]})
+        title = _TITLE_RE.search(prompt)
+        score = _score_for(title.group(1) if title else '')
+        return json.dumps({'match_score': score, 'reasoning': 'Skills overlap with the role.', 'is_relevant': score >= 0.3})
+
+
+def load_recorded_pages(fixtures_dir=FIXTURES_DIR):
+    return [path.read_text(encoding='utf-8') for path in sorted(Path(fixtures_dir).glob('linkedin_guest_search_page_*.html'))]
+
+
+class _LinkedInProxyHandler(_QuietHandler):
+    fake = None
+
+    def do_GET(self):
+        inject_error, jitter_factor = self.fake._next_request()
+        url = urlsplit(self.path) # Absolute-form request line, as sent to an HTTP proxy
+        time.sleep(self.fake.latency_ms / 1000 * jitter_factor)
+        if url.path == '/ip':
+            self._send(200, json.dumps({'origin': '127.0.0.1'}))
+            return
+        if inject_error:
+            self._send(self.fake.error_status, 'Injected error', content_type='text/plain')
+            return
+        if not url.path.endswith('/seeMoreJobPostings/search'):
+            self._send(404, 'Not found', content_type='text/plain')
+            return
+        params = parse_qs(url.query)
+        keywords = params.get('keywords', [''])[0]
+        page_num = int(params.get('pageNum', ['0'])[0])
+        self._send(200, self.fake.page_html(keywords, page_num), content_type='text/html; charset=utf-8')
+
+
+class FakeLinkedInProxy(_BaseFakeServer):
+    """
+    HTTP proxy serving recorded guest-API search pages: pages_per_term pages per search term, then
+    an empty page (what LinkedIn returns past the last result). Also answers the proxy health check.
+    """
+
+    handler_class = _LinkedInProxyHandler
+
+    def __init__(self, pages=None, pages_per_term=3, latency_ms=300.0, **kwargs):
+        self.pages = pages if pages is not None else load_recorded_pages()
+        if not self.pages:
+            raise Exception(f"No recorded LinkedIn pages found in {FIXTURES_DIR}")
+        self.pages_per_term = pages_per_term
+        super().__init__(latency_ms=latency_ms, **kwargs)
+
+    def page_html(self, keywords, page_num):
+        if page_num >= self.pages_per_term:
+            return ''
+        variant = zlib.crc32(keywords.lower().encode('utf-8')) % 9000 + 1000
+        html = self.pages[page_num % len(self.pages)]
+        # Distinct job IDs and companies per (term, page); the same term always gets the same jobs
+        html = _JOB_ID_RE.sub(lambda m: str(int(m.group(1)) + (variant * 100 + page_num) * 1000), html)
+        return _COMPANY_RE.sub(lambda m: f"{m.group(1)}{m.group(2)} {variant}{m.group(3)}", html)
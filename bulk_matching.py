@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Bulk CV matching for career-services batches: many CVs against LinkedIn in one run.
+
+CVs (a directory, a .zip/.tar archive or uploaded files) are extracted and analyzed in parallel.
+Candidates with the same location and overlapping search terms are then grouped, so each group's
+LinkedIn queries are fetched once for all of its members. Jobs are pre-filtered per candidate and
+scored in multi-candidate LLM calls (ai_services.score_pairs_concurrently). One JSON record per CV
+is produced as soon as its group is done, followed by a summary record.
+
+CLI:
+    python bulk_matching.py CVS_DIR_OR_ARCHIVE [--location Berlin] [--locations-file map.json] [--output results.jsonl]
+"""
+import os
+import sys
+import json
+import time
+import tarfile
+import zipfile
+import argparse
+import contextlib
+from itertools import islice
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from werkzeug.utils import secure_filename
+
+from cv_utils import allowed_file, extract_cv_text_from_bytes, CV_EXTRACTION_WORKERS
+from ai_services import analyze_cv_with_ai, score_pairs_concurrently
+from linkedin_services import build_search_terms, search_linkedin_terms, bright_data_config_from_env
+from job_prefilter import prefilter_jobs
+from job_store import normalize_text
+import metrics
+from settings import settings
+
+BULK_MAX_CVS = settings.get_int('BULK_MAX_CVS', 500)
+BULK_MAX_CV_BYTES = settings.get_int('BULK_MAX_CV_BYTES', 10 * 1024 * 1024) # Larger archive members are skipped
+BULK_MAX_UPLOAD_BYTES = settings.get_int('BULK_MAX_UPLOAD_MB', 256) * 1024 * 1024 # Request size limit of /bulk_search_jobs
+BULK_ANALYSIS_CONCURRENCY = settings.get_int('BULK_ANALYSIS_CONCURRENCY', 4)
+# A candidate joins a group when this share of its search terms is already searched for by the group
+BULK_GROUP_MIN_OVERLAP = settings.get_float('BULK_GROUP_MIN_OVERLAP', 0.3)
+BULK_GROUP_MAX_CANDIDATES = settings.get_int('BULK_GROUP_MAX_CANDIDATES', 20)
+BULK_GROUP_MAX_TERMS = settings.get_int('BULK_GROUP_MAX_TERMS', 10)
+BULK_GROUP_CONCURRENCY = settings.get_int('BULK_GROUP_CONCURRENCY', 2)
+BULK_SEARCH_MAX_JOBS = settings.get_int('BULK_SEARCH_MAX_JOBS', 60) # Unique jobs fetched per group
+BULK_JOBS_PER_CANDIDATE = settings.get_int('BULK_JOBS_PER_CANDIDATE', 15) # Jobs scored per CV after the pre-filter
+RELEVANT_JOBS_LIMIT = 15
+MIN_RELEVANT_SCORE = 0.35 # Same cut-off as /search_jobs
+MIN_CV_TEXT_CHARS = 30
+
+
+def _archive_member_allowed(name, size):
+    base_name = os.path.basename(name)
+    if not base_name or base_name.startswith('.') or '__MACOSX' in name or not allowed_file(base_name):
+        return False
+    if size > BULK_MAX_CV_BYTES:
+        print(f"⚠️ Skipping {name}: {size} bytes is over BULK_MAX_CV_BYTES")
+        return False
+    return True
+
+
+def _iter_zip(source):
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and _archive_member_allowed(info.filename, info.file_size):
+                yield info.filename, archive.read(info)
+
+
+def _iter_tar(source):
+    with tarfile.open(fileobj=source) as archive:
+        for member in archive:
+            if member.isfile() and _archive_member_allowed(member.name, member.size):
+                yield member.name, archive.extractfile(member).read()
+
+
+def iter_archive_cvs(source, filename):
+    """(name, bytes) for every CV file in a .zip or .tar(.gz/.bz2/.xz) archive given as a binary stream."""
+    if filename.lower().endswith('.zip'):
+        return _iter_zip(source)
+    return _iter_tar(source)
+
+
+def is_archive(filename):
+    return filename.lower().endswith(('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz'))
+
+
+def iter_cv_files(path):
+    """(name, bytes) for every CV in a directory (recursively) or archive, in a stable order."""
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                if _archive_member_allowed(os.path.relpath(file_path, path), os.path.getsize(file_path)):
+                    with open(file_path, 'rb') as f:
+                        yield os.path.relpath(file_path, path), f.read()
+    elif is_archive(path):
+        with open(path, 'rb') as f:
+            yield from iter_archive_cvs(f, path)
+    else:
+        raise Exception(f"{path} is neither a directory nor a .zip/.tar archive")
+
+
+def _prepare_candidate(name, data, location):
+    """Extracts and analyzes one CV; returns a candidate dict with either cv_analysis or error set."""
+    candidate = {'cv_file': name, 'location': location, 'cv_analysis': None, 'error': None}
+    try:
+        safe_name = secure_filename(os.path.basename(name)) or f"cv.{name.rsplit('.', 1)[1].lower()}"
+        with metrics.timed('cv_extraction'):
+            cv_text = extract_cv_text_from_bytes(data, safe_name)
+        if not cv_text or len(cv_text.strip()) < MIN_CV_TEXT_CHARS:
+            candidate['error'] = 'Could not extract sufficient text from CV.'
+            return candidate
+        with metrics.timed('cv_analysis'):
+            candidate['cv_analysis'] = analyze_cv_with_ai(cv_text)
+        candidate['search_terms'] = build_search_terms(candidate['cv_analysis'])
+        print(f"📄 {name}: {candidate['cv_analysis'].get('current_role', 'Unknown role')} ({len(cv_text)} characters)")
+    except Exception as e:
+        print(f"❌ Could not process CV {name}: {e}")
+        candidate['error'] = f'CV processing failed: {e}'
+    return candidate
+
+
+def limit_cvs(cv_files):
+    """The first BULK_MAX_CVS (name, bytes) pairs as a list; the rest of the iterable is not read."""
+    cv_files = list(islice(cv_files, BULK_MAX_CVS + 1))
+    if len(cv_files) > BULK_MAX_CVS:
+        print(f"⚠️ More than {BULK_MAX_CVS} CVs given; only the first {BULK_MAX_CVS} (BULK_MAX_CVS) are processed")
+        cv_files = cv_files[:BULK_MAX_CVS]
+    return cv_files
+
+
+def validate_locations(locations):
+    """Raises unless `locations` is None or a JSON object mapping file names to location strings."""
+    if locations is None:
+        return
+    if not isinstance(locations, dict):
+        raise Exception("locations must be a JSON object mapping CV file names to locations")
+    for name, value in locations.items():
+        if not isinstance(value, str):
+            raise Exception(f"The location for {name} must be a string")
+
+
+def prepare_candidates(cv_files, location, locations=None):
+    """
+    Extracts and analyzes CVs in parallel (each extraction runs in its own process, see cv_utils).
+    Returns candidate dicts in input order; `locations` maps a CV file name to its own location.
+    """
+    cv_files = limit_cvs(cv_files)
+    locations = locations or {}
+    workers = max(1, min(max(BULK_ANALYSIS_CONCURRENCY, CV_EXTRACTION_WORKERS), len(cv_files) or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-cv') as executor:
+        futures = [executor.submit(metrics.bind_trace(_prepare_candidate), name, data,
+                                   locations.get(name) or locations.get(os.path.basename(name)) or location)
+                   for name, data in cv_files]
+        return [future.result() for future in futures]
+
+
+def group_candidates(candidates):
+    """
+    Greedily groups candidates by location and search-term overlap. Returns a list of
+    {'location', 'members', 'search_terms'}; the group's terms are the ones most shared by its members.
+    """
+    groups = []
+    for candidate in candidates:
+        terms = {normalize_text(term) for term in candidate['search_terms']}
+        location_key = normalize_text(candidate['location'])
+        best_group, best_overlap = None, 0.0
+        for group in groups:
+            if group['location_key'] != location_key or len(group['members']) >= BULK_GROUP_MAX_CANDIDATES:
+                continue
+            overlap = len(terms & group['term_keys']) / len(terms) if terms else 0.0
+            if overlap >= BULK_GROUP_MIN_OVERLAP and overlap > best_overlap:
+                best_group, best_overlap = group, overlap
+        if best_group is None:
+            best_group = {'location': candidate['location'], 'location_key': location_key, 'members': [], 'term_keys': set()}
+            groups.append(best_group)
+        best_group['members'].append(candidate)
+        best_group['term_keys'] |= terms
+
+    for group in groups:
+        term_counts, display_terms = Counter(), {}
+        for member in group['members']:
+            for term in member['search_terms']:
+                term_counts[normalize_text(term)] += 1
+                display_terms.setdefault(normalize_text(term), term)
+        # Most-shared terms first; Counter keeps first-seen order among equal counts
+        group['search_terms'] = [display_terms[key] for key, _ in term_counts.most_common(BULK_GROUP_MAX_TERMS)]
+    return groups
+
+
+def _candidate_record(candidate, jobs=None, group_index=None, error=None):
+    record = {'type': 'candidate', 'cv_file': candidate['cv_file'], 'location': candidate['location'],
+              'success': error is None and candidate['error'] is None}
+    if candidate['cv_analysis'] is not None:
+        record['cv_analysis'] = candidate['cv_analysis']
+    if group_index is not None:
+        record['group'] = group_index
+    if record['success']:
+        record['jobs'] = jobs
+    else:
+        record['error'] = error or candidate['error']
+    return record
+
+
+def match_group(group, group_index, bright_data_config):
+    """Searches LinkedIn once for the group, scores each member's best jobs and returns one record per member."""
+    members = group['members']
+    print(f"\n👥 Group {group_index}: {len(members)} candidate(s) in {group['location']}, terms {group['search_terms']}")
+    try:
+        with metrics.timed('linkedin_search'):
+            jobs = search_linkedin_terms(group['search_terms'], group['location'], bright_data_config, BULK_SEARCH_MAX_JOBS)
+    except Exception as e:
+        return [_candidate_record(member, group_index=group_index, error=str(e)) for member in members]
+
+    pairs, pair_owner = [], []
+    with metrics.timed('prefilter'):
+        for member_index, member in enumerate(members):
+            for job in prefilter_jobs(jobs, member['cv_analysis'], min_keep=1)[:BULK_JOBS_PER_CANDIDATE]:
+                pairs.append((job, member['cv_analysis']))
+                pair_owner.append(member_index)
+    print(f"🤖 Group {group_index}: scoring {len(pairs)} candidate/job pairs from {len(jobs)} jobs")
+    with metrics.timed('scoring'):
+        scored = score_pairs_concurrently(pairs)
+
+    jobs_by_member = [[] for _ in members]
+    for member_index, (job, _), (score, reasoning) in zip(pair_owner, pairs, scored):
+        if score is None:
+            # Same default as /search_jobs when scoring fails
+            jobs_by_member[member_index].append(dict(job, match_score=0.3, match_reasoning='Error during AI scoring process.'))
+        elif score > MIN_RELEVANT_SCORE:
+            jobs_by_member[member_index].append(dict(job, match_score=score, match_reasoning=reasoning))
+    return [
+        _candidate_record(member, sorted(member_jobs, key=lambda j: j['match_score'], reverse=True)[:RELEVANT_JOBS_LIMIT], group_index)
+        for member, member_jobs in zip(members, jobs_by_member)
+    ]
+
+
+def iter_bulk_results(cv_files, location, bright_data_config=None, locations=None):
+    """
+    Runs the whole batch and yields JSON-serializable records: one {'type': 'candidate', ...} per
+    CV (failed CVs first, then each group as it finishes) and a final {'type': 'summary', ...}.
+    """
+    started_at = time.perf_counter()
+    bright_data_config = bright_data_config or bright_data_config_from_env()
+    candidates = prepare_candidates(cv_files, location, locations)
+    ready = [c for c in candidates if c['cv_analysis'] is not None]
+    for candidate in candidates:
+        if candidate['cv_analysis'] is None:
+            yield _candidate_record(candidate)
+
+    groups = group_candidates(ready)
+    print(f"👥 {len(ready)} candidate(s) in {len(groups)} search group(s)")
+    succeeded = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(BULK_GROUP_CONCURRENCY, len(groups) or 1)), thread_name_prefix='bulk-group') as executor:
+        futures = [executor.submit(metrics.bind_trace(match_group), group, i, bright_data_config) for i, group in enumerate(groups)]
+        for future in as_completed(futures):
+            for record in future.result():
+                succeeded += record['success']
+                yield record
+
+    yield {'type': 'summary', 'cvs': len(candidates), 'succeeded': succeeded, 'failed': len(candidates) - succeeded,
+           'groups': len(groups),
+           'elapsed_seconds': round(time.perf_counter() - started_at, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='directory of CVs, or a .zip/.tar archive')
+    parser.add_argument('--location', default='Worldwide', help='job search location for every CV')
+    parser.add_argument('--locations-file', help='JSON object mapping CV file names to their own location')
+    parser.add_argument('--output', default='-', help='JSONL output file (default: stdout)')
+    args = parser.parse_args()
+
+    locations = None
+    if args.locations_file:
+        with open(args.locations_file, encoding='utf-8') as f:
+            locations = json.load(f)
+        try:
+            validate_locations(locations)
+        except Exception as e:
+            sys.exit(f"❌ {args.locations_file}: {e}")
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        # Progress logs go to stderr so stdout carries only JSONL
+        with contextlib.redirect_stdout(sys.stderr):
+            for record in iter_bulk_results(iter_cv_files(args.path), args.location, locations=locations):
+                output.write(json.dumps(record) + '\n')
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
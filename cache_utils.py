@@ -0,0 +1,325 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+def stable_hash(*parts):
+    """sha256 hex digest over the given string parts (joined with a separator that can't appear in normal text)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def connect_sqlite(db_path):
+    """
+    SQLite connection shared by a process's threads. WAL mode lets several worker processes read
+    the same database file while one of them writes; `timeout` covers waits for the write lock.
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL") # Safe with WAL; skips an fsync per commit
+    return conn
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with an optional per-entry TTL (seconds)."""
+
+    def __init__(self, max_entries=256, ttl_seconds=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict() # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            stored_at, value = entry
+            if self.ttl_seconds and time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0}
+
+
+class SQLiteCache:
+    """
+    On-disk JSON value cache in a single SQLite table.
+    Entries older than ttl_seconds are treated as missing; once more than max_entries are
+    stored, the least recently used ones are evicted. Worker processes forked after the cache
+    was created (see serve.py) each open their own connection to the same file.
+    """
+
+    def __init__(self, db_path, table='cache', ttl_seconds=None, max_entries=10000):
+        self.db_path = db_path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.prune_every = max(1, (max_entries or 0) // 1000) # Lets the table overshoot max_entries by at most 0.1%
+        self._writes_since_prune = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._pid = None # The database is opened (and created) on first use
+
+    @property
+    def _conn(self):
+        # A connection inherited through fork() must not be used; reopen it in the new process
+        if self._pid != os.getpid():
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            conn = connect_sqlite(self.db_path)
+            with conn:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_accessed ON {self.table} (accessed_at)")
+            self._connection = conn
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            value, stored_at = row
+            with self._conn:
+                if self.ttl_seconds and now - stored_at > self.ttl_seconds:
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self.misses += 1
+                    return default
+                self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key, value):
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        # Both deletes scan the table, so with large tables they run once every prune_every writes
+        self._writes_since_prune += 1
+        if self._writes_since_prune < self.prune_every:
+            return
+        self._writes_since_prune = 0
+        if self.ttl_seconds:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE stored_at < ?", (now - self.ttl_seconds,))
+        if self.max_entries:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def values(self):
+        """Every unexpired value, e.g. the snapshots several processes stored; not counted as hits."""
+        with self._lock:
+            if self.ttl_seconds:
+                rows = self._conn.execute(f"SELECT value FROM {self.table} WHERE stored_at >= ?",
+                                          (time.time() - self.ttl_seconds,)).fetchall()
+            else:
+                rows = self._conn.execute(f"SELECT value FROM {self.table}").fetchall()
+        return [json.loads(value) for value, in rows]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'entries': len(self), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0}
+
+
+class TieredCache:
+    """In-process LRU in front of an optional SQLite tier; disk hits are promoted into memory."""
+
+    def __init__(self, memory_tier, disk_tier=None):
+        self.memory = memory_tier
+        self.disk = disk_tier
+
+    def get(self, key, default=None):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except sqlite3.Error as e:
+                print(f"⚠️ Disk cache read failed ({self.disk.db_path}): {e}")
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+                return value
+        return default
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except sqlite3.Error as e:
+                print(f"⚠️ Disk cache write failed ({self.disk.db_path}): {e}")
+
+    def delete(self, key):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        return {'memory': self.memory.stats(), 'disk': self.disk.stats() if self.disk is not None else None}
+
+
+def normalize_url(url, drop_params=()):
+    """Cache key form of a URL: lower-cased scheme/host, sorted query parameters, `drop_params` removed, no fragment."""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in drop_params)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ''))
+
+
+class ResponseCache:
+    """
+    Thread-safe in-memory cache of HTTP response bodies, zlib-compressed and bounded by max_bytes
+    (least recently used entries are evicted first). An entry is served as-is for ttl_seconds;
+    after that it is kept only so its ETag/Last-Modified can be used to revalidate it with a
+    conditional request (see revalidation_headers()/revalidated()).
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl_seconds=600, drop_params=()):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.drop_params = tuple(drop_params)
+        self._entries = OrderedDict() # key -> [stored_at, compressed_body, etag, last_modified]
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def _key(self, url):
+        return normalize_url(url, self.drop_params)
+
+    def get(self, url):
+        """The cached body if it is still fresh, otherwise None."""
+        key = self._key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            compressed = entry[1]
+        return zlib.decompress(compressed).decode('utf-8')
+
+    def revalidation_headers(self, url):
+        """If-None-Match / If-Modified-Since headers for a stale entry that has validators, else {}."""
+        with self._lock:
+            entry = self._entries.get(self._key(url))
+        headers = {}
+        if entry is not None:
+            if entry[2]:
+                headers['If-None-Match'] = entry[2]
+            if entry[3]:
+                headers['If-Modified-Since'] = entry[3]
+        return headers
+
+    def revalidated(self, url):
+        """Marks the entry fresh again after a 304 Not Modified and returns its body (None if it was evicted meanwhile)."""
+        with self._lock:
+            key = self._key(url)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry[0] = time.time()
+            self._entries.move_to_end(key)
+            self.revalidations += 1
+            compressed = entry[1]
+        return zlib.decompress(compressed).decode('utf-8')
+
+    def set(self, url, body, etag=None, last_modified=None):
+        compressed = zlib.compress(body.encode('utf-8'), 6)
+        if len(compressed) > self.max_bytes:
+            return
+        with self._lock:
+            key = self._key(url)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[key] = [time.time(), compressed, etag, last_modified]
+            self._bytes += len(compressed)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'entries': len(self._entries), 'compressed_bytes': self._bytes, 'hits': self.hits,
+                'misses': self.misses, 'revalidations': self.revalidations,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0}
@@ -1,88 +1,184 @@
+import io
+import multiprocessing
 import os
-import PyPDF2
-import docx
+import threading
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from settings import settings
 
-# This can be a global or passed from app.config
-UPLOAD_FOLDER_PATH = 'uploads' # Relative to where script is run, or make absolute
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'doc', 'docx'}
 
-# Ensure uploads directory exists when module is loaded or functions are called
-os.makedirs(UPLOAD_FOLDER_PATH, exist_ok=True)
-
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def save_uploaded_file(file, upload_folder_override=None):
-    """Saves the uploaded file to the UPLOAD_FOLDER_PATH or an override path."""
-    target_folder = upload_folder_override if upload_folder_override else UPLOAD_FOLDER_PATH
-    os.makedirs(target_folder, exist_ok=True) # Ensure it exists
 
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(target_folder, unique_filename)
-        try:
-            file.save(filepath)
-            return filepath, unique_filename
-        except Exception as e:
-            print(f"Error saving file {unique_filename} to {filepath}: {e}")
-            return None, None
-    return None, None
+# Extraction limits: the AI prompts only need the first part of a CV, and a huge or malformed
+# upload must not tie up a request worker.
+CV_MAX_CHARS = settings.get_int('CV_MAX_CHARS', 30000)
+CV_MAX_PAGES = settings.get_int('CV_MAX_PAGES', 10)
+CV_EXTRACTION_TIMEOUT = settings.get_float('CV_EXTRACTION_TIMEOUT', 20) # seconds
+CV_EXTRACTION_WORKERS = settings.get_int('CV_EXTRACTION_WORKERS', 2) # 0 extracts in the calling thread
+TXT_READ_CHUNK_CHARS = 64 * 1024
+
+# Each extraction runs in its own process, so a timeout kills only that upload's parse;
+# this caps how many of those processes run at once.
+_extraction_slots = threading.BoundedSemaphore(max(1, CV_EXTRACTION_WORKERS))
+
+
+# The iter_* extractors accept a file path or a binary file-like object (e.g. an upload stream)
 
+def iter_pdf_text(source, max_pages=None):
+    """Yields the text of each PDF page, stopping after max_pages pages."""
+    import PyPDF2 # PyPDF2 and python-docx are imported on first use, usually in an extraction worker
+    max_pages = CV_MAX_PAGES if max_pages is None else max_pages
+    pdf_reader = PyPDF2.PdfReader(source)
+    for page_number, page in enumerate(pdf_reader.pages):
+        if max_pages and page_number >= max_pages:
+            print(f"✂️ PDF has more than {max_pages} pages; extracting the first {max_pages} only")
+            break
+        page_text = page.extract_text()
+        if page_text: # PyPDF2 can return None
+            yield page_text + "\n\f" # Form feed marks the page break (see prompt_utils.normalize_cv_lines)
 
-def extract_text_from_pdf(file_path):
+def iter_docx_text(source):
+    import docx
+    doc = docx.Document(source)
+    for paragraph in doc.paragraphs:
+        yield paragraph.text + "\n"
+
+def iter_txt_text(source, chunk_chars=TXT_READ_CHUNK_CHARS):
+    if isinstance(source, (str, os.PathLike)):
+        file = open(source, 'r', encoding='utf-8')
+    else:
+        file = io.TextIOWrapper(source, encoding='utf-8')
     try:
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text: # PyPDF2 can return None
-                    text += page_text
-            return text
+        while True:
+            chunk = file.read(chunk_chars)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        if isinstance(file, io.TextIOWrapper) and file.buffer is source:
+            file.detach() # Leave the caller's stream open
+        else:
+            file.close()
+
+def join_text_chunks(chunks, max_chars=None):
+    """Joins text chunks once, stopping (and closing the generator) as soon as max_chars is reached."""
+    max_chars = CV_MAX_CHARS if max_chars is None else max_chars
+    parts = []
+    total = 0
+    try:
+        for chunk in chunks:
+            if max_chars and total + len(chunk) >= max_chars:
+                parts.append(chunk[:max_chars - total])
+                if total + len(chunk) > max_chars:
+                    print(f"✂️ CV text truncated to {max_chars} characters")
+                break
+            parts.append(chunk)
+            total += len(chunk)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+    return ''.join(parts)
+
+
+def extract_text_from_pdf(source, max_chars=None, max_pages=None):
+    try:
+        return join_text_chunks(iter_pdf_text(source, max_pages), max_chars)
     except Exception as e:
         print(f"Error extracting PDF: {e}")
         return ""
 
-def extract_text_from_docx(file_path):
+def extract_text_from_docx(source, max_chars=None):
     try:
-        doc = docx.Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
+        return join_text_chunks(iter_docx_text(source), max_chars)
     except Exception as e:
         print(f"Error extracting DOCX: {e}")
         return ""
 
-def extract_text_from_txt(file_path):
+def extract_text_from_txt(source, max_chars=None):
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
+        return join_text_chunks(iter_txt_text(source), max_chars)
     except Exception as e:
         print(f"Error extracting TXT: {e}")
         return ""
 
-def extract_cv_text_from_file(file_path, filename): # Renamed from your single file's extract_cv_text
+def _extract_cv_text_inline(source, filename):
     extension = filename.rsplit('.', 1)[1].lower()
     
     if extension == 'pdf':
-        return extract_text_from_pdf(file_path)
+        return extract_text_from_pdf(source)
     elif extension == 'docx':
-        return extract_text_from_docx(file_path)
+        return extract_text_from_docx(source)
     elif extension in ['txt', 'doc']:
-        return extract_text_from_txt(file_path)
+        return extract_text_from_txt(source)
     else:
         print(f"Unsupported file type for text extraction: {extension}")
         return ""
 
-def cleanup_file(filepath):
-    if filepath and os.path.exists(filepath):
+def _extract_cv_text_from_bytes(data, filename):
+    return _extract_cv_text_inline(io.BytesIO(data), filename)
+
+def _extraction_process_main(connection, fn, args):
+    try:
+        connection.send(fn(*args))
+    finally:
+        connection.close()
+
+def _extract_in_process(fn, args, filename, timeout):
+    """Runs fn(*args) in a new process and kills it after `timeout` seconds; other uploads are unaffected."""
+    timeout = CV_EXTRACTION_TIMEOUT if timeout is None else timeout
+    with _extraction_slots:
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_extraction_process_main, args=(sender, fn, args), daemon=True)
         try:
-            os.remove(filepath)
-            print(f"🗑️ Removed temp file: {filepath}")
-        except Exception as e_rm:
-            print(f"⚠️ Error removing temp file {filepath}: {e_rm}")
\ No newline at end of file
+            process.start()
+            sender.close() # Only the child writes; EOF on the receiver then means it died
+            if not receiver.poll(timeout):
+                print(f"⏱️ CV text extraction for {filename} timed out after {timeout:.0f}s; stopping its worker process")
+                return ""
+            return receiver.recv()
+        except (EOFError, OSError):
+            print(f"❌ CV extraction worker for {filename} exited without a result")
+            return ""
+        finally:
+            receiver.close()
+            sender.close()
+            if process.is_alive():
+                process.kill()
+            if process.pid is not None:
+                process.join()
+
+def extract_cv_text_from_file(file_path, filename, timeout=None): # Renamed from your single file's extract_cv_text
+    """
+    Extracts at most CV_MAX_CHARS characters (and CV_MAX_PAGES PDF pages) of text.
+    Runs in a worker process that is killed after `timeout` seconds (default CV_EXTRACTION_TIMEOUT);
+    returns "" if extraction fails or times out.
+    """
+    if CV_EXTRACTION_WORKERS <= 0:
+        return _extract_cv_text_inline(file_path, filename)
+    return _extract_in_process(_extract_cv_text_inline, (file_path, filename), filename, timeout)
+
+def extract_cv_text_from_upload(file, timeout=None):
+    """
+    Same as extract_cv_text_from_file, but reads a Werkzeug FileStorage without writing it to disk.
+    Werkzeug already keeps small uploads in memory and spools large ones to a temporary file;
+    the stream is parsed in place, or its bytes are handed to the extraction worker process.
+    Returns (text, safe_filename), or ("", None) if the file type is not allowed.
+    """
+    if not (file and allowed_file(file.filename)):
+        return "", None
+    filename = secure_filename(file.filename)
+    if '.' not in filename: # secure_filename can strip everything but the extension
+        filename = f"cv.{file.filename.rsplit('.', 1)[1].lower()}"
+    file.stream.seek(0)
+    if CV_EXTRACTION_WORKERS <= 0:
+        return _extract_cv_text_inline(file.stream, filename), filename
+    return _extract_in_process(_extract_cv_text_from_bytes, (file.stream.read(), filename), filename, timeout), filename
+
+def extract_cv_text_from_bytes(data, filename, timeout=None):
+    """Same as extract_cv_text_from_file for a CV already in memory (e.g. read from an archive)."""
+    if CV_EXTRACTION_WORKERS <= 0:
+        return _extract_cv_text_inline(io.BytesIO(data), filename)
+    return _extract_in_process(_extract_cv_text_from_bytes, (data, filename), filename, timeout)
+
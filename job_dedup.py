@@ -0,0 +1,125 @@
+"""
+Duplicate detection for job postings, so the same role is only scored once.
+
+A posting is a duplicate when it has the same LinkedIn job ID as one already seen (whatever the
+host, slug or tracking parameters), the same normalized title + company + location, or, for the
+same company, a near-identical title/location/snippet (64-bit SimHash within
+DEDUP_SIMHASH_MAX_DISTANCE bits).
+"""
+import re
+import zlib
+import threading
+from urllib.parse import urlsplit, parse_qs
+from settings import settings
+
+DEDUP_SIMHASH_MAX_DISTANCE = settings.get_int('DEDUP_SIMHASH_MAX_DISTANCE', 3)
+
+_SIMHASH_BITS = 64
+_SIMHASH_BANDS = 4 # Any two hashes within 3 bits share at least one identical 16-bit band
+_BAND_BITS = _SIMHASH_BITS // _SIMHASH_BANDS
+_JOB_ID_RE = re.compile(r'(\d{6,})/?$')
+_GENDER_TAG_RE = re.compile(r'\((?:[mwfdxh]\s*/\s*)+[mwfdxh]\)|\b(?:[mwfdxh]/){1,3}[mwfdxh]\b', re.IGNORECASE)
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+_PLACEHOLDER_RE = re.compile(r'^Details for .* available on LinkedIn', re.IGNORECASE)
+
+
+def linkedin_job_id(url):
+    """Numeric LinkedIn job ID from a /jobs/view/<slug>-<id> URL or a currentJobId parameter, else None."""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    current_job_id = parse_qs(parts.query).get('currentJobId')
+    if current_job_id and current_job_id[0].isdigit():
+        return current_job_id[0]
+    if '/jobs/view/' in parts.path:
+        match = _JOB_ID_RE.search(parts.path)
+        if match:
+            return match.group(1)
+    return None
+
+
+def job_url_key(url):
+    """Identity key for a job URL: 'linkedin:<id>' when an ID can be read from it, else the URL without query."""
+    job_id = linkedin_job_id(url)
+    return f"linkedin:{job_id}" if job_id else (url or '').split('?')[0].rstrip('/')
+
+
+def _normalize(value):
+    return _NON_WORD_RE.sub(' ', str(value or '').lower()).strip()
+
+
+def normalize_title(title):
+    """Lower-cased title without punctuation or gender tags such as (m/w/d)."""
+    return _normalize(_GENDER_TAG_RE.sub(' ', str(title or '')))
+
+
+def job_fingerprint(job):
+    return '|'.join((normalize_title(job.get('title')), _normalize(job.get('company')), _normalize(job.get('location'))))
+
+
+def simhash(text):
+    """64-bit SimHash over word unigrams and bigrams."""
+    words = _normalize(text).split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    weights = [0] * _SIMHASH_BITS
+    for feature in features:
+        h = zlib.crc32(feature.encode('utf-8')) | (zlib.crc32(feature[::-1].encode('utf-8')) << 32)
+        for bit in range(_SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return value
+
+
+def _job_simhash(job):
+    description = job.get('description') or ''
+    if _PLACEHOLDER_RE.match(description):
+        description = ''
+    return simhash(f"{normalize_title(job.get('title'))} {job.get('location') or ''} {description}")
+
+
+class JobDedupIndex:
+    """Thread-safe index of the jobs seen so far in one search; add() says whether a job is new."""
+
+    def __init__(self, max_distance=None):
+        self.max_distance = DEDUP_SIMHASH_MAX_DISTANCE if max_distance is None else max_distance
+        self._url_keys = set()
+        self._fingerprints = set()
+        self._bands = {} # (company, band_index, band_value) -> [simhash, ...]
+        self._lock = threading.Lock()
+        self.duplicates = {'url': 0, 'fingerprint': 0, 'simhash': 0}
+
+    def add(self, job):
+        """Records the job and returns True, or returns False if it duplicates one already added."""
+        url_key = job_url_key(job.get('url'))
+        fingerprint = job_fingerprint(job)
+        company = _normalize(job.get('company'))
+        job_hash = _job_simhash(job) if self.max_distance >= 0 else None
+        with self._lock:
+            if url_key in self._url_keys:
+                self.duplicates['url'] += 1
+                return False
+            if fingerprint in self._fingerprints:
+                self.duplicates['fingerprint'] += 1
+                return False
+            band_keys = []
+            if job_hash is not None:
+                band_keys = [(company, i, (job_hash >> (i * _BAND_BITS)) & ((1 << _BAND_BITS) - 1)) for i in range(_SIMHASH_BANDS)]
+                for band_key in band_keys:
+                    for other_hash in self._bands.get(band_key, ()):
+                        if bin(job_hash ^ other_hash).count('1') <= self.max_distance:
+                            self.duplicates['simhash'] += 1
+                            return False
+            self._url_keys.add(url_key)
+            self._fingerprints.add(fingerprint)
+            for band_key in band_keys:
+                self._bands.setdefault(band_key, []).append(job_hash)
+            return True
+
+
+def dedupe_jobs(jobs, index=None):
+    """Jobs in order with duplicates (by ID, fingerprint or SimHash) removed."""
+    index = JobDedupIndex() if index is None else index
+    return [job for job in jobs if index.add(job)]
@@ -0,0 +1,98 @@
+"""
+Local pre-filter that ranks jobs against the CV analysis before any OpenAI scoring call.
+
+Texts are turned into hashed TF-IDF vectors (word unigrams, word bigrams and character
+trigrams) with NumPy, and every job is compared to the candidate profile with a single
+matrix-vector product. Only the most similar jobs are sent on to the LLM scorer. NumPy is
+imported on the first pre-filter run rather than with this module.
+"""
+import re
+import math
+import zlib
+from settings import settings
+
+PREFILTER_ENABLED = settings.get_bool('PREFILTER_ENABLED', True)
+PREFILTER_KEEP_RATIO = settings.get_float('PREFILTER_KEEP_RATIO', 0.5) # share of jobs kept for LLM scoring
+PREFILTER_MIN_KEEP = settings.get_int('PREFILTER_MIN_KEEP', 8) # never keep fewer than this many jobs
+PREFILTER_HASH_DIM = settings.get_int('PREFILTER_HASH_DIM', 2 ** 14)
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_PLACEHOLDER_RE = re.compile(r"^Details for .* available on LinkedIn", re.IGNORECASE)
+
+
+def _text_features(text):
+    """Hashed feature indices for a text: words, adjacent word pairs and character trigrams of each word."""
+    words = [w.rstrip('.') for w in _TOKEN_RE.findall((text or '').lower())]
+    words = [w for w in words if w]
+    grams = list(words)
+    grams.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for w in words:
+        padded = f"<{w}>"
+        grams.extend(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return [zlib.crc32(g.encode('utf-8')) % PREFILTER_HASH_DIM for g in grams]
+
+
+def _as_text(value):
+    if isinstance(value, (list, tuple)):
+        return ' '.join(str(item) for item in value)
+    return str(value) if value is not None else ''
+
+
+def cv_profile_text(cv_analysis):
+    """The CV fields the pre-filter matches on; role and target titles are repeated to weigh them more."""
+    titles = f"{_as_text(cv_analysis.get('current_role'))} {_as_text(cv_analysis.get('target_job_titles'))}"
+    return ' '.join([titles, titles, _as_text(cv_analysis.get('technical_skills')), _as_text(cv_analysis.get('industry'))])
+
+
+def job_text(job):
+    title = job.get('title') or ''
+    description = job.get('description') or ''
+    if _PLACEHOLDER_RE.match(description): # No snippet was scraped; the placeholder only repeats title/company
+        description = ''
+    return f"{title} {title} {description}"
+
+
+def _tfidf_matrix(texts):
+    """Rows are L2-normalized hashed TF-IDF vectors (sublinear tf, smoothed idf over the given texts)."""
+    import numpy as np
+    counts = np.zeros((len(texts), PREFILTER_HASH_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        features = _text_features(text)
+        if features:
+            np.add.at(counts[row], features, 1.0)
+    tf = np.log1p(counts)
+    df = np.count_nonzero(counts, axis=0)
+    idf = np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0
+    weighted = tf * idf.astype(np.float32)
+    norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return weighted / norms
+
+
+def job_similarities(jobs, cv_analysis):
+    """Cosine similarity of every job to the CV profile, as a NumPy array in job order."""
+    import numpy as np
+    if not jobs:
+        return np.zeros(0, dtype=np.float32)
+    matrix = _tfidf_matrix([cv_profile_text(cv_analysis)] + [job_text(job) for job in jobs])
+    return matrix[1:] @ matrix[0]
+
+
+def prefilter_jobs(jobs, cv_analysis, keep_ratio=None, min_keep=None):
+    """
+    Returns the jobs worth sending to the LLM scorer, most similar first: the top
+    ceil(keep_ratio * len(jobs)) jobs, but at least min_keep. Jobs are returned unchanged when
+    the pre-filter is disabled or would not drop anything.
+    """
+    keep_ratio = PREFILTER_KEEP_RATIO if keep_ratio is None else keep_ratio
+    min_keep = PREFILTER_MIN_KEEP if min_keep is None else min_keep
+    keep = max(min_keep, math.ceil(keep_ratio * len(jobs)))
+    if not PREFILTER_ENABLED or keep >= len(jobs):
+        return list(jobs)
+
+    similarities = job_similarities(jobs, cv_analysis)
+    order = (-similarities).argsort(kind='stable')[:keep]
+    kept = [jobs[i] for i in order]
+    print(f"🧮 Pre-filter kept {len(kept)}/{len(jobs)} jobs for AI scoring "
+          f"(similarity cut-off {similarities[order[-1]]:.2f})")
+    return kept
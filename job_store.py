@@ -0,0 +1,123 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from cache_utils import connect_sqlite
+
+_JOB_FIELDS = ('url', 'title', 'company', 'location', 'description', 'source', 'posted_date', 'salary')
+
+
+def normalize_text(value):
+    """Lower-cased, whitespace-collapsed form used for search terms, locations and titles."""
+    return re.sub(r'\s+', ' ', str(value or '')).strip().lower()
+
+
+class JobStore:
+    """
+    SQLite store of parsed LinkedIn postings plus the result pages they came from.
+
+    `jobs` holds one row per job URL (indexed by normalized title, location and fetch time);
+    `search_pages` remembers which job URLs a (search term, location, page) returned and when,
+    so a page fetched less than page_ttl_seconds ago can be served without going through the proxy.
+    Rows older than retention_seconds are pruned on write. The database is opened in WAL mode and
+    reopened in each forked worker process, so all workers share the stored pages.
+    """
+
+    def __init__(self, db_path, page_ttl_seconds=3600, retention_seconds=7 * 24 * 3600):
+        self.db_path = db_path
+        self.page_ttl_seconds = page_ttl_seconds
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self.page_hits = 0
+        self.page_misses = 0
+        self._pid = None # The database is opened (and created) on first use
+
+    @property
+    def _conn(self):
+        # Same as SQLiteCache._conn: one connection per process
+        if self._pid != os.getpid():
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            conn = connect_sqlite(self.db_path)
+            conn.row_factory = sqlite3.Row
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs ("
+                    "url TEXT PRIMARY KEY, title TEXT, title_norm TEXT, company TEXT, location TEXT, location_norm TEXT, "
+                    "description TEXT, source TEXT, posted_date TEXT, salary TEXT, "
+                    "first_seen_at REAL NOT NULL, fetched_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_title_norm ON jobs (title_norm)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_location_norm ON jobs (location_norm)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_fetched_at ON jobs (fetched_at)")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS search_pages ("
+                    "term_norm TEXT NOT NULL, location_norm TEXT NOT NULL, page_num INTEGER NOT NULL, "
+                    "job_urls TEXT NOT NULL, fetched_at REAL NOT NULL, "
+                    "PRIMARY KEY (term_norm, location_norm, page_num))"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_search_pages_fetched_at ON search_pages (fetched_at)")
+            self._connection = conn
+            self._pid = os.getpid()
+        return self._connection
+
+    def get_page(self, search_term, location, page_num, max_age_seconds=None):
+        """Jobs from a stored result page in their original order, or None if it is missing or stale."""
+        max_age_seconds = self.page_ttl_seconds if max_age_seconds is None else max_age_seconds
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_urls, fetched_at FROM search_pages WHERE term_norm = ? AND location_norm = ? AND page_num = ?",
+                (normalize_text(search_term), normalize_text(location), page_num)
+            ).fetchone()
+            if row is None or time.time() - row['fetched_at'] > max_age_seconds:
+                self.page_misses += 1
+                return None
+            job_urls = json.loads(row['job_urls'])
+            jobs_by_url = {}
+            if job_urls:
+                placeholders = ','.join('?' * len(job_urls))
+                for job_row in self._conn.execute(f"SELECT * FROM jobs WHERE url IN ({placeholders})", job_urls):
+                    jobs_by_url[job_row['url']] = {field: job_row[field] for field in _JOB_FIELDS}
+            if len(jobs_by_url) != len(set(job_urls)): # Some postings were pruned; refetch the page
+                self.page_misses += 1
+                return None
+            self.page_hits += 1
+        return [jobs_by_url[url] for url in job_urls]
+
+    def save_page(self, search_term, location, page_num, jobs):
+        """Stores a freshly fetched result page and upserts its jobs."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO jobs (url, title, title_norm, company, location, location_norm, description, source, "
+                "posted_date, salary, first_seen_at, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET title = excluded.title, title_norm = excluded.title_norm, "
+                "company = excluded.company, location = excluded.location, location_norm = excluded.location_norm, "
+                "description = excluded.description, source = excluded.source, salary = excluded.salary, "
+                "fetched_at = excluded.fetched_at",
+                [(job['url'], job.get('title'), normalize_text(job.get('title')), job.get('company'),
+                  job.get('location'), normalize_text(job.get('location')), job.get('description'),
+                  job.get('source'), job.get('posted_date'), job.get('salary'), now, now) for job in jobs]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_pages (term_norm, location_norm, page_num, job_urls, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (normalize_text(search_term), normalize_text(location), page_num, json.dumps([job['url'] for job in jobs]), now)
+            )
+            self._prune(now)
+
+    def _prune(self, now):
+        if self.retention_seconds:
+            cutoff = now - self.retention_seconds
+            self._conn.execute("DELETE FROM search_pages WHERE fetched_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM jobs WHERE fetched_at < ?", (cutoff,))
+
+    def stats(self):
+        with self._lock:
+            jobs = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            pages = self._conn.execute("SELECT COUNT(*) FROM search_pages").fetchone()[0]
+        lookups = self.page_hits + self.page_misses
+        return {'jobs': jobs, 'pages': pages, 'page_hits': self.page_hits, 'page_misses': self.page_misses,
+                'page_hit_rate': (self.page_hits / lookups) if lookups else 0.0}
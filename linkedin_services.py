@@ -1,106 +1,717 @@
 import requests
 import re
+import json
 import time
-import random # Ensure random is imported
-from urllib.parse import quote, urlencode
+import os
+import sqlite3
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import quote, urlencode, urlsplit
 from datetime import datetime
-from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from job_store import JobStore
+from cache_utils import ResponseCache
+from job_dedup import JobDedupIndex, job_url_key
+from search_planner import SearchTermPlanner, WAIT
+import metrics
+from settings import settings
 
+httpx = None # Imported by get_async_proxy_client(); only the async search (asgi_app.py) needs it
 
-def parse_linkedin_html(html_content, location_fallback): # Name matches your single file
+# --- Fetch scheduler configuration ---
+# Search terms are fetched concurrently over one connection pool; instead of fixed sleeps
+# between pages, every request to a host takes a token from that host's bucket.
+LINKEDIN_FETCH_CONCURRENCY = settings.get_int('LINKEDIN_FETCH_CONCURRENCY', 4)
+LINKEDIN_REQUESTS_PER_SECOND = settings.get_float('LINKEDIN_REQUESTS_PER_SECOND', 1.0)
+LINKEDIN_RATE_BURST = settings.get_float('LINKEDIN_RATE_BURST', 2)
+# Processes sharing the limit above; serve.py sets it to its worker count, since every worker
+# process has its own buckets
+LINKEDIN_RATE_PROCESSES = max(1, settings.get_int('LINKEDIN_RATE_PROCESSES', 1))
+# Page budget for the search-term planner (see search_planner.py)
+LINKEDIN_MAX_REQUESTS = settings.get_int('LINKEDIN_MAX_REQUESTS', 18) # LinkedIn requests per search
+LINKEDIN_MAX_PAGES_PER_TERM = settings.get_int('LINKEDIN_MAX_PAGES_PER_TERM', 5)
+LINKEDIN_TERM_OVERLAP_THRESHOLD = settings.get_float('LINKEDIN_TERM_OVERLAP_THRESHOLD', 0.8) # drop a term once this share of a page is already known
+LINKEDIN_SEARCH_TIME_BUDGET_SECONDS = settings.get_float('LINKEDIN_SEARCH_TIME_BUDGET_SECONDS', 60)
+LINKEDIN_POOL_CONNECTIONS = settings.get_int('LINKEDIN_POOL_CONNECTIONS', 4)
+LINKEDIN_POOL_MAXSIZE = settings.get_int('LINKEDIN_POOL_MAXSIZE', 16)
+# How long a successful (or failed) proxy health check is trusted before probing again.
+PROXY_HEALTH_TTL_SECONDS = settings.get_float('PROXY_HEALTH_TTL_SECONDS', 300)
+PROXY_HEALTH_FAILURE_TTL_SECONDS = settings.get_float('PROXY_HEALTH_FAILURE_TTL_SECONDS', 30)
+# Endpoints, overridable so the offline benchmark (benchmarks/bench_pipeline.py) can point them at local servers
+LINKEDIN_BASE_URL = settings.get('LINKEDIN_BASE_URL', 'https://www.linkedin.com').rstrip('/')
+PROXY_HEALTH_CHECK_URL = settings.get('PROXY_HEALTH_CHECK_URL', 'https://httpbin.org/ip')
+
+# --- Job store ---
+# Parsed result pages are kept in SQLite; a (term, location, page) fetched within
+# JOB_STORE_PAGE_TTL_SECONDS is read from the store instead of going through the proxy.
+# Set JOB_STORE_DB_PATH to an empty value to always fetch.
+JOB_STORE_DB_PATH = settings.get('JOB_STORE_DB_PATH', os.path.join('cache', 'jobs.sqlite3'))
+JOB_STORE_PAGE_TTL_SECONDS = settings.get_float('JOB_STORE_PAGE_TTL_SECONDS', 3600)
+JOB_STORE_RETENTION_SECONDS = settings.get_float('JOB_STORE_RETENTION_SECONDS', 7 * 24 * 3600)
+job_store = JobStore(JOB_STORE_DB_PATH, JOB_STORE_PAGE_TTL_SECONDS, JOB_STORE_RETENTION_SECONDS) if JOB_STORE_DB_PATH else None
+
+# --- Response cache ---
+# Raw guest-API HTML keyed by normalized URL, below the job store: a fresh hit skips the proxy and
+# the rate limiter; a stale entry with an ETag/Last-Modified is revalidated with a conditional GET.
+LINKEDIN_RESPONSE_CACHE_ENABLED = settings.get_bool('LINKEDIN_RESPONSE_CACHE_ENABLED', True)
+LINKEDIN_RESPONSE_CACHE_TTL_SECONDS = settings.get_float('LINKEDIN_RESPONSE_CACHE_TTL_SECONDS', 600)
+LINKEDIN_RESPONSE_CACHE_MAX_BYTES = settings.get_int('LINKEDIN_RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+linkedin_response_cache = ResponseCache(
+    max_bytes=LINKEDIN_RESPONSE_CACHE_MAX_BYTES, ttl_seconds=LINKEDIN_RESPONSE_CACHE_TTL_SECONDS,
+    drop_params=('trk',) # Tracking parameter; doesn't change the results
+) if LINKEDIN_RESPONSE_CACHE_ENABLED else None
+
+
+# --- HTML parser backends ---
+# LINKEDIN_HTML_PARSER picks the backend: 'lxml' (default, listed in requirements.txt),
+# 'selectolax' (optional, fastest; pip install selectolax) or 'bs4' (the original
+# BeautifulSoup + html.parser path, also used as the fallback if another backend fails).
+LINKEDIN_HTML_PARSER = settings.get('LINKEDIN_HTML_PARSER', 'lxml').lower()
+MAX_CARDS_PER_PAGE = 15
+
+# Precompiled once at import instead of per card
+_CARD_CLASS_PATTERNS = [
+    re.compile(r'job-search-card', re.I),
+    re.compile(r'base-card', re.I),
+    re.compile(r'job-result-card', re.I), 
+    re.compile(r'job-card-container', re.I) 
+]
+_JOB_VIEW_HREF_RE = re.compile(r'/jobs/view/')
+_TITLE_CLASS_RE = re.compile(r'base-search-card__title', re.I)
+_COMPANY_CLASS_RE = re.compile(r'base-search-card__subtitle', re.I)
+_COMPANY_FALLBACK_CLASS_RE = re.compile(r'job-card-container__company-name', re.I)
+_LOCATION_CLASS_RE = re.compile(r'job-search-card__location', re.I)
+_SNIPPET_CLASS_RE = re.compile(r'job-search-card__snippet|base-search-card__snippet', re.I)
+_FULL_LINK_CLASS_RE = re.compile(r'base-card__full-link', re.I)
+
+
+def _build_job(title, company, job_location_text, job_description_text, job_url_final, parsed_urls_on_page):
+    """Shared by every backend: normalizes the job URL and builds the job dict, or returns None to skip the card."""
+    if job_url_final.startswith('/'): 
+        job_url_final = f"https://www.linkedin.com{job_url_final.split('?')[0]}"
+    elif "linkedin.com/jobs/view/" not in job_url_final:
+        return None
+
+    job_url_final = job_url_final.split('?')[0] 
+
+    url_key = job_url_key(job_url_final) # Same job ID under another host/slug counts as the same card
+    if not (title and company and job_url_final) or url_key in parsed_urls_on_page:
+        return None
+    parsed_urls_on_page.add(url_key)
+    
+    final_description = job_description_text if job_description_text else \
+                        f"Details for {title} at {company} available on LinkedIn. Please visit the job URL for the full description."
+
+    return {
+        'title': title, 'company': company, 'location': job_location_text,
+        'description': final_description,
+        'url': job_url_final, 'source': 'LinkedIn',
+        'posted_date': datetime.now().strftime('%Y-%m-%d'), 
+        'salary': 'Not specified' 
+    }
+
+
+def _parse_linkedin_html_bs4(html_content, location_fallback):
+    from bs4 import BeautifulSoup # Only needed by this backend and as the fallback parser
     jobs = []
-    try:
-        # from bs4 import BeautifulSoup # Moved to top-level import
-        soup = BeautifulSoup(html_content, 'html.parser')
-        job_cards = soup.find_all(['div', 'li'], class_=[
-            re.compile(r'job-search-card', re.I),
-            re.compile(r'base-card', re.I),
-            re.compile(r'job-result-card', re.I), 
-            re.compile(r'job-card-container', re.I) 
-        ])
-        
-        if not job_cards: 
-            job_cards = soup.select('ul.jobs-search__results-list > li') or \
-                        soup.select('div.job-search-results > ul > li')
+    soup = BeautifulSoup(html_content, 'html.parser')
+    job_cards = soup.find_all(['div', 'li'], class_=_CARD_CLASS_PATTERNS)
+    
+    if not job_cards: 
+        job_cards = soup.select('ul.jobs-search__results-list > li') or \
+                    soup.select('div.job-search-results > ul > li')
 
-        print(f"🔍 Found {len(job_cards)} potential job elements in HTML snippet (linkedin_services.py)")
-        
-        parsed_urls_on_page = set()
+    print(f"🔍 Found {len(job_cards)} potential job elements in HTML snippet (linkedin_services.py, bs4)")
+    
+    parsed_urls_on_page = set()
 
-        for card in job_cards[:15]: 
-            try:
-                title_elem = card.find('a', href=re.compile(r'/jobs/view/'))
-                if not title_elem:
-                    title_elem = card.find(['h3', 'h2'], class_=re.compile(r'base-search-card__title', re.I))
+    for card in job_cards[:MAX_CARDS_PER_PAGE]: 
+        try:
+            title_elem = card.find('a', href=_JOB_VIEW_HREF_RE)
+            if not title_elem:
+                title_elem = card.find(['h3', 'h2'], class_=_TITLE_CLASS_RE)
 
-                company_elem = card.find(['h4','a'], class_=re.compile(r'base-search-card__subtitle', re.I))
-                if not company_elem:
-                     company_elem = card.find(class_=re.compile(r'job-card-container__company-name', re.I))
+            company_elem = card.find(['h4','a'], class_=_COMPANY_CLASS_RE)
+            if not company_elem:
+                 company_elem = card.find(class_=_COMPANY_FALLBACK_CLASS_RE)
 
+            location_elem = card.find(class_=_LOCATION_CLASS_RE)
+            job_location_text = location_elem.get_text(strip=True) if location_elem else location_fallback
+            
+            description_elem = card.find(class_=_SNIPPET_CLASS_RE)
+            job_description_text = description_elem.get_text(strip=True) if description_elem else None
 
-                location_elem = card.find(class_=re.compile(r'job-search-card__location', re.I))
-                job_location_text = location_elem.get_text(strip=True) if location_elem else location_fallback
+            if title_elem and company_elem:
+                title = title_elem.get_text(strip=True)
+                company = company_elem.get_text(strip=True)
                 
-                description_elem = card.find(class_=re.compile(r'job-search-card__snippet|base-search-card__snippet', re.I))
-                job_description_text = description_elem.get_text(strip=True) if description_elem else None
-
-                if title_elem and company_elem:
-                    title = title_elem.get_text(strip=True)
-                    company = company_elem.get_text(strip=True)
-                    
-                    # Simpler URL extraction logic from your original
-                    job_url_final = ''
-                    if title_elem.name == 'a' and title_elem.get('href'):
-                        job_url_final = title_elem.get('href')
-                    else:
-                        link_in_card = card.find('a', href=re.compile(r'/jobs/view/'))
-                        if link_in_card:
-                            job_url_final = link_in_card.get('href','')
-                    
-                    if not job_url_final: 
-                        url_container = card.find(class_=re.compile(r'base-card__full-link', re.I))
-                        if url_container and url_container.get('href'):
-                            job_url_final = url_container.get('href')
-                    
-                    if job_url_final.startswith('/'): 
-                        job_url_final = f"https://www.linkedin.com{job_url_final.split('?')[0]}"
-                    elif "linkedin.com/jobs/view/" not in job_url_final:
-                        continue 
-
-                    job_url_final = job_url_final.split('?')[0] 
-
-                    if title and company and job_url_final and job_url_final not in parsed_urls_on_page:
-                        parsed_urls_on_page.add(job_url_final)
-                        
-                        final_description = job_description_text if job_description_text else \
-                                            f"Details for {title} at {company} available on LinkedIn. Please visit the job URL for the full description."
-
-                        job = {
-                            'title': title, 'company': company, 'location': job_location_text,
-                            'description': final_description,
-                            'url': job_url_final, 'source': 'LinkedIn',
-                            'posted_date': datetime.now().strftime('%Y-%m-%d'), 
-                            'salary': 'Not specified' 
-                        }
-                        jobs.append(job)
+                # Simpler URL extraction logic from your original
+                job_url_final = ''
+                if title_elem.name == 'a' and title_elem.get('href'):
+                    job_url_final = title_elem.get('href')
+                else:
+                    link_in_card = card.find('a', href=_JOB_VIEW_HREF_RE)
+                    if link_in_card:
+                        job_url_final = link_in_card.get('href','')
+                
+                if not job_url_final: 
+                    url_container = card.find(class_=_FULL_LINK_CLASS_RE)
+                    if url_container and url_container.get('href'):
+                        job_url_final = url_container.get('href')
+                
+                job = _build_job(title, company, job_location_text, job_description_text, job_url_final, parsed_urls_on_page)
+                if job:
+                    jobs.append(job)
+        except Exception as e:
+            # print(f"Error parsing individual job card: {e}")
+            continue
+    return jobs
+
+
+def _xpath_class_contains(fragment):
+    # Case-insensitive substring match on @class, same as the bs4 path's re.I class patterns
+    return f"contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{fragment}')"
+
+try:
+    import lxml.html
+    from lxml import etree
+
+    _LXML_CARDS = etree.XPath(
+        "//*[self::div or self::li][" +
+        " or ".join(_xpath_class_contains(c) for c in ('job-search-card', 'base-card', 'job-result-card', 'job-card-container')) +
+        "]"
+    )
+    _LXML_FALLBACK_CARDS = etree.XPath(
+        "//ul[contains(concat(' ', normalize-space(@class), ' '), ' jobs-search__results-list ')]/li"
+    )
+    _LXML_FALLBACK_CARDS_2 = etree.XPath(
+        "//div[contains(concat(' ', normalize-space(@class), ' '), ' job-search-results ')]/ul/li"
+    )
+    _LXML_JOB_LINK = etree.XPath(".//a[contains(@href, '/jobs/view/')][1]")
+    _LXML_TITLE = etree.XPath(f".//*[self::h3 or self::h2][{_xpath_class_contains('base-search-card__title')}][1]")
+    _LXML_COMPANY = etree.XPath(f"(.//*[self::h4 or self::a][{_xpath_class_contains('base-search-card__subtitle')}])[1]")
+    _LXML_COMPANY_FALLBACK = etree.XPath(f"(.//*[{_xpath_class_contains('job-card-container__company-name')}])[1]")
+    _LXML_LOCATION = etree.XPath(f"(.//*[{_xpath_class_contains('job-search-card__location')}])[1]")
+    _LXML_SNIPPET = etree.XPath(
+        f"(.//*[{_xpath_class_contains('job-search-card__snippet')} or {_xpath_class_contains('base-search-card__snippet')}])[1]"
+    )
+    _LXML_FULL_LINK = etree.XPath(f"(.//*[{_xpath_class_contains('base-card__full-link')}])[1]")
+except ImportError:
+    lxml = None
+
+
+def _lxml_text(elem):
+    # Equivalent of BeautifulSoup's get_text(strip=True)
+    return ''.join(part.strip() for part in elem.itertext())
+
+def _first(xpath, node):
+    found = xpath(node)
+    return found[0] if found else None
+
+def _parse_linkedin_html_lxml(html_content, location_fallback):
+    jobs = []
+    if not html_content or not html_content.strip():
+        return jobs
+    root = lxml.html.document_fromstring(html_content)
+    job_cards = _LXML_CARDS(root) or _LXML_FALLBACK_CARDS(root) or _LXML_FALLBACK_CARDS_2(root)
+    print(f"🔍 Found {len(job_cards)} potential job elements in HTML snippet (linkedin_services.py, lxml)")
+
+    parsed_urls_on_page = set()
+    for card in job_cards[:MAX_CARDS_PER_PAGE]:
+        job_link = _first(_LXML_JOB_LINK, card)
+        title_elem = job_link if job_link is not None else _first(_LXML_TITLE, card)
+        company_elem = _first(_LXML_COMPANY, card)
+        if company_elem is None:
+            company_elem = _first(_LXML_COMPANY_FALLBACK, card)
+        if title_elem is None or company_elem is None:
+            continue
+
+        location_elem = _first(_LXML_LOCATION, card)
+        job_location_text = _lxml_text(location_elem) if location_elem is not None else location_fallback
+        description_elem = _first(_LXML_SNIPPET, card)
+        job_description_text = _lxml_text(description_elem) if description_elem is not None else None
+
+        job_url_final = job_link.get('href', '') if job_link is not None else ''
+        if not job_url_final:
+            url_container = _first(_LXML_FULL_LINK, card)
+            if url_container is not None and url_container.get('href'):
+                job_url_final = url_container.get('href')
+
+        job = _build_job(_lxml_text(title_elem), _lxml_text(company_elem), job_location_text,
+                         job_description_text, job_url_final, parsed_urls_on_page)
+        if job:
+            jobs.append(job)
+    return jobs
+
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+def _css_class_contains(tags, *fragments):
+    # :is() keeps matches unique and in document order (a plain selector list can repeat nodes)
+    tag_part = f":is({', '.join(tags)})" if tags else ''
+    return tag_part + ':is(' + ', '.join(f'[class*="{fragment}" i]' for fragment in fragments) + ')'
+
+_SLX_CARDS = _css_class_contains(('div', 'li'), 'job-search-card', 'base-card', 'job-result-card', 'job-card-container')
+_SLX_FALLBACK_CARDS = 'ul.jobs-search__results-list > li'
+_SLX_FALLBACK_CARDS_2 = 'div.job-search-results > ul > li'
+_SLX_JOB_LINK = 'a[href*="/jobs/view/"]'
+_SLX_TITLE = _css_class_contains(('h3', 'h2'), 'base-search-card__title')
+_SLX_COMPANY = _css_class_contains(('h4', 'a'), 'base-search-card__subtitle')
+_SLX_COMPANY_FALLBACK = _css_class_contains((), 'job-card-container__company-name')
+_SLX_LOCATION = _css_class_contains((), 'job-search-card__location')
+_SLX_SNIPPET = _css_class_contains((), 'job-search-card__snippet', 'base-search-card__snippet')
+_SLX_FULL_LINK = _css_class_contains((), 'base-card__full-link')
+
+def _slx_text(node):
+    return node.text(deep=True, separator='', strip=True)
+
+def _parse_linkedin_html_selectolax(html_content, location_fallback):
+    jobs = []
+    tree = LexborHTMLParser(html_content or '')
+    job_cards = tree.css(_SLX_CARDS) or tree.css(_SLX_FALLBACK_CARDS) or tree.css(_SLX_FALLBACK_CARDS_2)
+    print(f"🔍 Found {len(job_cards)} potential job elements in HTML snippet (linkedin_services.py, selectolax)")
+
+    parsed_urls_on_page = set()
+    for card in job_cards[:MAX_CARDS_PER_PAGE]:
+        job_link = card.css_first(_SLX_JOB_LINK)
+        title_elem = job_link if job_link is not None else card.css_first(_SLX_TITLE)
+        company_elem = card.css_first(_SLX_COMPANY)
+        if company_elem is None:
+            company_elem = card.css_first(_SLX_COMPANY_FALLBACK)
+        if title_elem is None or company_elem is None:
+            continue
+
+        location_elem = card.css_first(_SLX_LOCATION)
+        job_location_text = _slx_text(location_elem) if location_elem is not None else location_fallback
+        description_elem = card.css_first(_SLX_SNIPPET)
+        job_description_text = _slx_text(description_elem) if description_elem is not None else None
+
+        job_url_final = (job_link.attributes.get('href') or '') if job_link is not None else ''
+        if not job_url_final:
+            url_container = card.css_first(_SLX_FULL_LINK)
+            if url_container is not None and url_container.attributes.get('href'):
+                job_url_final = url_container.attributes.get('href')
+
+        job = _build_job(_slx_text(title_elem), _slx_text(company_elem), job_location_text,
+                         job_description_text, job_url_final, parsed_urls_on_page)
+        if job:
+            jobs.append(job)
+    return jobs
+
+
+_PARSER_BACKENDS = {
+    'bs4': _parse_linkedin_html_bs4,
+    'lxml': _parse_linkedin_html_lxml,
+    'selectolax': _parse_linkedin_html_selectolax,
+}
+
+def available_parser_backends():
+    backends = ['bs4']
+    if lxml is not None:
+        backends.append('lxml')
+    if LexborHTMLParser is not None:
+        backends.append('selectolax')
+    return backends
+
+
+def parse_linkedin_html(html_content, location_fallback, backend=None): # Name matches your single file
+    backend = (backend or LINKEDIN_HTML_PARSER).lower()
+    if backend != 'bs4':
+        if backend in available_parser_backends():
+            try:
+                return _PARSER_BACKENDS[backend](html_content, location_fallback)
             except Exception as e:
-                # print(f"Error parsing individual job card: {e}")
-                continue
+                print(f"⚠️ {backend} parser failed ({e}), falling back to BeautifulSoup")
+        else:
+            print(f"⚠️ HTML parser backend '{backend}' is not available, falling back to BeautifulSoup")
+    try:
+        return _parse_linkedin_html_bs4(html_content, location_fallback)
     except ImportError:
         raise Exception("BeautifulSoup not installed. Run: pip install beautifulsoup4 lxml")
     except Exception as e:
         raise Exception(f"HTML parsing error: {e}")
-    return jobs
 
 
-def search_linkedin_jobs(cv_analysis, location, bright_data_config_passed, max_results=25): # Renamed param
-    print(f"🔍 Searching LinkedIn for: {cv_analysis.get('current_role', 'Professional')} in {location} (linkedin_services.py)")
-    
-    jobs = []
-    all_job_urls = set()
-    
+LINKEDIN_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1', 'Connection': 'keep-alive', 'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document', 'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none', 'Sec-Fetch-User': '?1', 'Cache-Control': 'max-age=0'
+}
+
+# --- Process-wide proxy sessions ---
+# One long-lived requests.Session per proxy configuration, so keep-alive connections (and their
+# TLS handshakes through the proxy) are reused across /search_jobs calls. The adapter's urllib3
+# connection pool is thread-safe, so concurrent fetches share it.
+_proxy_sessions = {}
+_proxy_sessions_lock = threading.Lock()
+_proxy_health = {} # proxy_url -> (checked_at, healthy, detail)
+_proxy_health_probes = {} # proxy_url -> Future resolved when the probe in flight finishes
+_proxy_health_lock = threading.Lock() # Guards the two dicts above; never held during a probe
+
+def bright_data_config_from_env():
+    """Bright Data proxy settings; the password is BRIGHTDATA_ACTUAL_PASSWORD from .env."""
+    return settings.bright_data_config()
+
+def _build_proxy_url(bright_data_config):
+    return f"http://{bright_data_config['username']}-country-us:{bright_data_config['password']}@{bright_data_config['host']}:{bright_data_config['port']}"
+
+def get_proxy_session(bright_data_config):
+    """Returns (session, proxies) for this proxy config, creating the shared session on first use."""
+    proxy_url = _build_proxy_url(bright_data_config)
+    proxies = {'http': proxy_url, 'https': proxy_url}
+    with _proxy_sessions_lock:
+        session = _proxy_sessions.get(proxy_url)
+        if session is None:
+            session = requests.Session()
+            session.verify = False 
+            session.headers.update(LINKEDIN_HEADERS)
+            retry_strategy = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+            adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=LINKEDIN_POOL_CONNECTIONS,
+                                  pool_maxsize=LINKEDIN_POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _proxy_sessions[proxy_url] = session
+            print(f"🔌 Created shared proxy session (pool size {LINKEDIN_POOL_MAXSIZE})")
+    return session, proxies
+
+def close_proxy_sessions():
+    with _proxy_sessions_lock:
+        for session in _proxy_sessions.values():
+            session.close()
+        _proxy_sessions.clear()
+
+def check_proxy_health(session, proxies, force=False):
+    """
+    Probes the proxy via PROXY_HEALTH_CHECK_URL (httpbin) at most once per PROXY_HEALTH_TTL_SECONDS (failures are
+    re-checked after PROXY_HEALTH_FAILURE_TTL_SECONDS). Raises if the proxy is unhealthy.
+    """
+    proxy_url = proxies['https']
+    while True:
+        claim = _claim_proxy_probe(proxy_url, force)
+        if claim is None:
+            return True
+        probe, is_owner = claim
+        if is_owner:
+            break
+        probe.result() # Another thread is probing; then use its cached result
+        force = False
+    try:
+        test_response = session.get(PROXY_HEALTH_CHECK_URL, proxies=proxies, timeout=15)
+        with _proxy_health_lock:
+            return _record_proxy_health(proxy_url, test_response.status_code, test_response.text)
+    finally:
+        _end_proxy_probe(proxy_url, probe)
+
+def _claim_proxy_probe(proxy_url, force):
+    """
+    None if a recent check passed (raises if it failed). Otherwise (probe, is_owner): the owner probes
+    the proxy and then calls _end_proxy_probe; everyone else waits for `probe` and checks again.
+    """
+    with _proxy_health_lock:
+        if not force and _cached_proxy_health(proxy_url):
+            return None
+        probe = _proxy_health_probes.get(proxy_url)
+        if probe is not None:
+            return probe, False
+        probe = _proxy_health_probes[proxy_url] = Future()
+        return probe, True
+
+def _end_proxy_probe(proxy_url, probe):
+    with _proxy_health_lock:
+        _proxy_health_probes.pop(proxy_url, None)
+    probe.set_result(None)
+
+def _cached_proxy_health(proxy_url):
+    """True if a recent check passed, raises if a recent check failed, False if the proxy needs probing. Call with _proxy_health_lock held."""
+    cached = _proxy_health.get(proxy_url)
+    if not cached:
+        return False
+    checked_at, healthy, detail = cached
+    ttl = PROXY_HEALTH_TTL_SECONDS if healthy else PROXY_HEALTH_FAILURE_TTL_SECONDS
+    if time.time() - checked_at >= ttl:
+        return False
+    if not healthy:
+        raise Exception(detail)
+    return True
+
+def _record_proxy_health(proxy_url, status_code, text):
+    print(f"🔧 Proxy test: {status_code}")
+    if status_code == 200:
+        try:
+            origin = json.loads(text).get('origin', 'unknown')
+        except ValueError:
+            origin = 'unknown'
+        print(f"✅ Proxy working! IP: {origin}")
+        _proxy_health[proxy_url] = (time.time(), True, None)
+        return True
+    detail = f"Proxy test failed with status: {status_code}. Response: {text[:200]}"
+    _proxy_health[proxy_url] = (time.time(), False, detail)
+    raise Exception(detail)
+
+def invalidate_proxy_health(proxies):
+    """Forces the next search to re-probe the proxy, e.g. after a ProxyError."""
+    with _proxy_health_lock:
+        _proxy_health.pop(proxies['https'], None)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Takes a token and returns 0, or returns the seconds until one will be available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, stop_event=None):
+        """Blocks until a token is available. Returns False if stop_event was set while waiting."""
+        while True:
+            wait_seconds = self._take()
+            if not wait_seconds:
+                return True
+            if stop_event is not None:
+                if stop_event.wait(wait_seconds):
+                    return False
+            else:
+                time.sleep(wait_seconds)
+
+    async def acquire_async(self, stop_event=None):
+        """acquire() for coroutines; stop_event is an asyncio.Event. Shares the bucket with threaded callers."""
+        while True:
+            wait_seconds = self._take()
+            if not wait_seconds:
+                return True
+            if stop_event is None:
+                await asyncio.sleep(wait_seconds)
+                continue
+            try:
+                await asyncio.wait_for(stop_event.wait(), wait_seconds)
+                return False
+            except asyncio.TimeoutError:
+                pass
+
+
+_host_rate_limiters = {}
+_host_rate_limiters_lock = threading.Lock()
+
+def get_host_rate_limiter(url):
+    """One TokenBucket per host, shared by every search in this process; the process gets its share of the configured rate."""
+    host = urlsplit(url).netloc
+    with _host_rate_limiters_lock:
+        if host not in _host_rate_limiters:
+            # A bucket needs room for at least one token, so with many workers the total burst can exceed LINKEDIN_RATE_BURST
+            _host_rate_limiters[host] = TokenBucket(LINKEDIN_REQUESTS_PER_SECOND / LINKEDIN_RATE_PROCESSES,
+                                                    max(1.0, LINKEDIN_RATE_BURST / LINKEDIN_RATE_PROCESSES))
+        return _host_rate_limiters[host]
+
+
+def _stored_page(search_term, location, page_num):
+    if job_store is None:
+        return None
+    try:
+        return job_store.get_page(search_term, location, page_num)
+    except sqlite3.Error as e_store:
+        print(f"⚠️ Job store read failed ({job_store.db_path}): {e_store}")
+        return None
+
+
+def _save_stored_page(search_term, location, page_num, jobs):
+    if job_store is None:
+        return
+    try:
+        job_store.save_page(search_term, location, page_num, jobs)
+    except sqlite3.Error as e_store:
+        print(f"⚠️ Job store write failed ({job_store.db_path}): {e_store}")
+
+
+def _search_page_url(search_term, location, page_num):
+    linkedin_params = {
+        'keywords': search_term, 'location': location,
+        'trk': 'public_jobs_jobs-search-bar_search-submit',
+        'position': 1, 'pageNum': page_num, 'start': page_num * 25
+    }
+    return f"{LINKEDIN_BASE_URL}/jobs-guest/jobs/api/seeMoreJobPostings/search?" + urlencode(linkedin_params)
+
+
+def _timed_proxy_get(session, url, proxies, headers=None):
+    with metrics.timed('linkedin_fetch'):
+        response = session.get(url, proxies=proxies, timeout=30, allow_redirects=True, headers=headers)
+    metrics.record_proxy_bytes(len(response.content))
+    metrics.inc('linkedin_responses', 1, 'LinkedIn responses by status code', status=response.status_code)
+    return response
+
+
+def _fetch_page_html(session, proxies, url, label, stop_event, before_network_fetch=None):
+    """
+    Returns (html, from_network) with the page HTML from the response cache or the network; html is
+    None if the page could not be fetched (non-200 status or the fetch was stopped). Cache hits
+    skip the proxy and the rate limiter.
+    """
+    if linkedin_response_cache is not None:
+        cached_html = linkedin_response_cache.get(url)
+        if cached_html is not None:
+            print(f"♻️ {label} served from the response cache")
+            return cached_html, False
+
+    if before_network_fetch is not None:
+        before_network_fetch()
+    if not get_host_rate_limiter(url).acquire(stop_event):
+        return None, False
+    headers = linkedin_response_cache.revalidation_headers(url) if linkedin_response_cache is not None else {}
+    response = _timed_proxy_get(session, url, proxies, headers=headers or None)
+    print(f"📡 LinkedIn response for {label}: {response.status_code}")
+    if response.status_code == 304 and linkedin_response_cache is not None:
+        html = linkedin_response_cache.revalidated(url)
+        if html is not None:
+            return html, True
+        if not get_host_rate_limiter(url).acquire(stop_event): # Entry was evicted meanwhile; refetch it
+            return None, False
+        response = _timed_proxy_get(session, url, proxies)
+    if response.status_code != 200:
+        print(f"❌ LinkedIn returned status: {response.status_code}. Content: {response.text[:200]}")
+        return None, True
+    if linkedin_response_cache is not None:
+        linkedin_response_cache.set(url, response.text, etag=response.headers.get('ETag'),
+                                    last_modified=response.headers.get('Last-Modified'))
+    return response.text, True
+
+
+def _fetch_search_terms_concurrently(session, proxies, search_terms, location, max_jobs, on_new_jobs=None, cancel_event=None,
+                                     before_network_fetch=None):
+    """
+    Fetches result pages for the search terms on LINKEDIN_FETCH_CONCURRENCY workers over the shared
+    session. A SearchTermPlanner picks each next (term, page): pages of one term stay sequential,
+    high-yield terms get more pages, terms that mostly repeat earlier results are dropped, and the
+    search stops at `max_jobs` unique jobs, the request/time budget or `cancel_event`.
+    Results are returned in search-term order, not completion order; `on_new_jobs(jobs)` is
+    additionally called from the worker threads with each page's new jobs.
+    Pages still fresh in the job store are read from it; `before_network_fetch()` is called
+    before each page that has to be fetched (e.g. to check the proxy).
+    """
+    dedup_index = JobDedupIndex() # Same job ID, same title/company/location, or a near-identical repost
+    jobs_by_term = [[] for _ in search_terms]
+    state_lock = threading.Lock()
+    stop_event = threading.Event()
+    total_found = [0]
+    planner = _new_search_planner(search_terms, max_jobs)
+
+    def _fetch_page(i_term, search_term, page_num):
+        """Fetches and merges one page; returns (cards_on_page, new_jobs, from_network) or None if paging this term failed."""
+        if page_num == 0:
+            print(f"\n🔍 Search {i_term+1}: '{search_term}' in {location}")
+        from_network = False
+        linkedin_jobs_page = _stored_page(search_term, location, page_num)
+        if linkedin_jobs_page is not None:
+            print(f"♻️ Page {page_num + 1} of '{search_term}' served from the job store ({len(linkedin_jobs_page)} jobs)")
+        
+        # This try-except is for individual LinkedIn requests
+        try:
+            if linkedin_jobs_page is None:
+                linkedin_url = _search_page_url(search_term, location, page_num)
+                html, from_network = _fetch_page_html(session, proxies, linkedin_url, f"page {page_num + 1} of '{search_term}'",
+                                                      stop_event, before_network_fetch)
+                if html is None:
+                    return None # Stop paging this search term
+                with metrics.timed('linkedin_parse'):
+                    linkedin_jobs_page = parse_linkedin_html(html, location) # Call the correct parse function
+                _save_stored_page(search_term, location, page_num, linkedin_jobs_page)
+        except requests.exceptions.ProxyError as e_proxy:
+            print(f"❌ Proxy error for LinkedIn: {e_proxy}")
+            invalidate_proxy_health(proxies)
+            stop_event.set() # A broken proxy affects every term, so stop them all
+            raise Exception("LinkedIn proxy error. Check proxy or network.")
+        except requests.exceptions.RequestException as e_req:
+            print(f"❌ Network error during LinkedIn search: {e_req}")
+            return None # Stop paging this search term
+
+        new_jobs_count = 0
+        with state_lock:
+            new_jobs_start = len(jobs_by_term[i_term])
+            for job_item in linkedin_jobs_page:
+                if total_found[0] >= max_jobs:
+                    stop_event.set()
+                    break
+                if dedup_index.add(job_item):
+                    jobs_by_term[i_term].append(job_item)
+                    total_found[0] += 1
+                    new_jobs_count += 1
+            if total_found[0] >= max_jobs:
+                stop_event.set()
+            total_unique = total_found[0]
+        if on_new_jobs and new_jobs_count:
+            on_new_jobs(jobs_by_term[i_term][new_jobs_start:])
+
+        print(f"✅ Added {new_jobs_count} new jobs from page {page_num + 1} of '{search_term}' (total unique: {total_unique})")
+        return len(linkedin_jobs_page), new_jobs_count, from_network
+
+    def _worker():
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                stop_event.set()
+            planned = planner.next_page(stop_event)
+            if planned is None:
+                return
+            i_term, search_term, page_num = planned
+            outcome = None
+            try:
+                outcome = _fetch_page(i_term, search_term, page_num)
+            finally:
+                if outcome is None:
+                    planner.record(i_term, page_num, 0, 0, from_network=True, failed=True)
+                else:
+                    planner.record(i_term, page_num, *outcome[:2], from_network=outcome[2])
+
+    workers = max(1, min(LINKEDIN_FETCH_CONCURRENCY, len(search_terms)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='linkedin-fetch') as executor:
+        futures = [executor.submit(metrics.bind_trace(_worker)) for _ in range(workers)]
+        errors = [future.exception() for future in futures]
+    first_error = next((e for e in errors if e is not None), None)
+    if first_error is not None:
+        raise first_error
+    _log_search_summary(dedup_index, planner)
+    return [job for term_jobs in jobs_by_term for job in term_jobs]
+
+
+def _new_search_planner(search_terms, max_jobs):
+    return SearchTermPlanner(
+        search_terms, max_jobs, max_requests=LINKEDIN_MAX_REQUESTS, max_pages_per_term=LINKEDIN_MAX_PAGES_PER_TERM,
+        overlap_threshold=LINKEDIN_TERM_OVERLAP_THRESHOLD, time_budget_seconds=LINKEDIN_SEARCH_TIME_BUDGET_SECONDS
+    )
+
+
+def _log_search_summary(dedup_index, planner):
+    if any(dedup_index.duplicates.values()):
+        print(f"🧹 Skipped duplicate postings: {dedup_index.duplicates}")
+    plan = planner.summary()
+    print(f"🧭 Search plan: {plan['network_requests']} LinkedIn requests, {plan['jobs']} jobs, stopped: {plan['stop_reason']}")
+    for term_plan in plan['terms']:
+        if term_plan['pages']:
+            print(f"   '{term_plan['term']}': {term_plan['pages']} pages, {term_plan['new_jobs']} new jobs ({term_plan['stop_reason'] or 'budget'})")
+
+
+def build_search_terms(cv_analysis, max_terms=6):
+    """LinkedIn search terms for a CV analysis: current role, target titles and skill + role combinations."""
     search_terms = []
     current_role = cv_analysis.get('current_role', '')
     if current_role:
@@ -119,93 +730,48 @@ def search_linkedin_jobs(cv_analysis, location, bright_data_config_passed, max_r
                     search_terms.append(f"{skill_clean} Engineer") 
     
     search_terms = list(dict.fromkeys([term.strip() for term in search_terms if term and len(term.strip()) > 3]))
+    return search_terms[:max_terms] if max_terms else search_terms
+
+
+def search_linkedin_jobs(cv_analysis, location, bright_data_config_passed, max_results=25, on_new_jobs=None, cancel_event=None): # Renamed param
+    print(f"🔍 Searching LinkedIn for: {cv_analysis.get('current_role', 'Professional')} in {location} (linkedin_services.py)")
+    search_terms = build_search_terms(cv_analysis)
     print(f"🎯 Smart search terms: {search_terms}")
-    
-    # Use the passed config
-    if not bright_data_config_passed['password'] or bright_data_config_passed['password'] == 'YOUR_BRIGHTDATA_PASSWORD_PLACEHOLDER_FROM_APP_PY': # Use a distinct placeholder if needed
+    jobs = search_linkedin_terms(search_terms, location, bright_data_config_passed, max_results * 2,
+                                 on_new_jobs=on_new_jobs, cancel_event=cancel_event)
+    print(f"\n📊 Total jobs found before AI scoring: {len(jobs)}")
+    return jobs
+
+
+_BRIGHT_DATA_PASSWORD_PLACEHOLDERS = ('YOUR_BRIGHTDATA_PASSWORD_PLACEHOLDER', 'YOUR_BRIGHTDATA_PASSWORD_PLACEHOLDER_FROM_APP_PY')
+
+def bright_data_password_configured(bright_data_config):
+    """True if the config has a real proxy password (not empty or a placeholder); used by the /health routes too."""
+    password = bright_data_config.get('password')
+    return bool(password) and password not in _BRIGHT_DATA_PASSWORD_PLACEHOLDERS
+
+
+def _check_bright_data_password(bright_data_config_passed):
+    if not bright_data_password_configured(bright_data_config_passed):
         raise Exception("Bright Data password not configured or is placeholder. Update in .env (BRIGHTDATA_ACTUAL_PASSWORD).")
 
+
+def search_linkedin_terms(search_terms, location, bright_data_config_passed, max_jobs, on_new_jobs=None, cancel_event=None):
+    """Fetches result pages for the given search terms through the proxy; returns up to max_jobs unique jobs."""
+    jobs = []
+    # Use the passed config
+    _check_bright_data_password(bright_data_config_passed)
+
     try:
-        proxy_url = f"http://{bright_data_config_passed['username']}-country-us:{bright_data_config_passed['password']}@{bright_data_config_passed['host']}:{bright_data_config_passed['port']}"
-        proxies = {'http': proxy_url, 'https': proxy_url}
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            # ... (rest of headers from your working file)
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1', 'Connection': 'keep-alive', 'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document', 'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none', 'Sec-Fetch-User': '?1', 'Cache-Control': 'max-age=0'
-        }
-        
+        session, proxies = get_proxy_session(bright_data_config_passed)
         print(f"🌐 Using proxy: {bright_data_config_passed['username'].split('-zone-')[0]}-country-us@{bright_data_config_passed['host']}:{bright_data_config_passed['port']}")
         
-        session = requests.Session()
-        session.verify = False 
-        session.headers.update(headers)
-        
-        # from requests.adapters import HTTPAdapter # Moved to top
-        # from urllib3.util.retry import Retry # Moved to top
-        retry_strategy = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        
-        # This try-except is for the proxy test itself
+        # This try-except is for the proxy health check itself (cached for PROXY_HEALTH_TTL_SECONDS).
+        # It only runs once a page actually has to be fetched, not for pages served from the job store.
         try:
-            test_response = session.get("https://httpbin.org/ip", proxies=proxies, timeout=15)
-            print(f"🔧 Proxy test: {test_response.status_code}")
-            
-            if test_response.status_code == 200:
-                print(f"✅ Proxy working! IP: {test_response.json().get('origin', 'unknown')}")
-                
-                for i_term, search_term in enumerate(search_terms[:6]): 
-                    if len(jobs) >= max_results * 2: break
-                    print(f"\n🔍 Search {i_term+1}: '{search_term}' in {location}")
-                    
-                    for page_num in range(0, 3): 
-                        if len(jobs) >= max_results * 2: break
-                        
-                        linkedin_params = {
-                            'keywords': search_term, 'location': location,
-                            'trk': 'public_jobs_jobs-search-bar_search-submit',
-                            'position': 1, 'pageNum': page_num, 'start': page_num * 25
-                        }
-                        linkedin_url = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?" + urlencode(linkedin_params)
-                        
-                        # This try-except is for individual LinkedIn requests
-                        try:
-                            response = session.get(linkedin_url, proxies=proxies, timeout=30, allow_redirects=True)
-                            print(f"📡 LinkedIn response for page {page_num + 1} of '{search_term}': {response.status_code}")
-                            
-                            if response.status_code == 200:
-                                linkedin_jobs_page = parse_linkedin_html(response.text, location) # Call the correct parse function
-                                new_jobs_count = 0
-                                for job_item in linkedin_jobs_page:
-                                    if job_item['url'] not in all_job_urls:
-                                        all_job_urls.add(job_item['url'])
-                                        jobs.append(job_item)
-                                        new_jobs_count += 1
-                                
-                                print(f"✅ Added {new_jobs_count} new jobs from page {page_num + 1} (total unique: {len(jobs)})")
-                                if not new_jobs_count and page_num > 0: 
-                                    print("   No new jobs found on this page, moving to next search term.")
-                                    break 
-                            else:
-                                print(f"❌ LinkedIn returned status: {response.status_code}. Content: {response.text[:200]}")
-                                break # Break from pages loop for this search term
-                        except requests.exceptions.ProxyError as e_proxy:
-                            print(f"❌ Proxy error for LinkedIn: {e_proxy}")
-                            # Depending on severity, you might want to break all searches or just this term
-                            raise Exception("LinkedIn proxy error. Check proxy or network.") # Re-raise to stop
-                        except requests.exceptions.RequestException as e_req:
-                            print(f"❌ Network error during LinkedIn search: {e_req}")
-                            break # Break from pages loop for this search term
-                        time.sleep(random.uniform(3, 6)) 
-                    time.sleep(random.uniform(5, 10)) # Between search terms
-            else: # Proxy test failed
-                raise Exception(f"Proxy test failed with status: {test_response.status_code}. Response: {test_response.text[:200]}")
+            jobs = _fetch_search_terms_concurrently(session, proxies, search_terms, location, max_jobs,
+                                                    on_new_jobs=on_new_jobs, cancel_event=cancel_event,
+                                                    before_network_fetch=lambda: check_proxy_health(session, proxies))
         except Exception as e_proxy_setup: # Catches proxy test failure or session setup issues
             print(f"Proxy connection or setup error: {e_proxy_setup}")
             raise # Re-raise to indicate failure to the main app
@@ -216,5 +782,220 @@ def search_linkedin_jobs(cv_analysis, location, bright_data_config_passed, max_r
         # For now, re-raising to make it clear in app.py that the search failed.
         raise Exception(f"LinkedIn search process failed: {e_main_search}")
     
+    return jobs[:max_jobs]
+
+
+# --- Async search (asgi_app.py) ---
+# The same planner, caches, job store and per-host rate limiters as the threaded search above, but
+# every fetch is a coroutine on one shared httpx.AsyncClient per proxy, so a single event loop can
+# keep many searches waiting on LinkedIn without a thread each. SQLite and HTML parsing run in
+# the default thread pool via asyncio.to_thread.
+LINKEDIN_ASYNC_MAX_CONNECTIONS = settings.get_int('LINKEDIN_ASYNC_MAX_CONNECTIONS', 100)
+_RETRY_STATUSES = (429, 500, 502, 503, 504) # Same as the threaded session's urllib3 Retry
+_ASYNC_FETCH_ATTEMPTS = 4
+
+_async_proxy_clients = {} # proxy_url -> httpx.AsyncClient; only used from the event loop thread
+
+def get_async_proxy_client(bright_data_config):
+    """Returns (client, proxy_url) for this proxy config, creating the shared AsyncClient on first use."""
+    global httpx
+    if httpx is None:
+        try:
+            import httpx
+        except ImportError:
+            raise Exception("The async search needs httpx (pip install httpx).")
+    proxy_url = _build_proxy_url(bright_data_config)
+    client = _async_proxy_clients.get(proxy_url)
+    if client is None:
+        client = httpx.AsyncClient(
+            proxy=proxy_url, verify=False, headers=LINKEDIN_HEADERS, timeout=30, follow_redirects=True,
+            limits=httpx.Limits(max_connections=LINKEDIN_ASYNC_MAX_CONNECTIONS, max_keepalive_connections=LINKEDIN_POOL_MAXSIZE)
+        )
+        _async_proxy_clients[proxy_url] = client
+        print(f"🔌 Created shared async proxy client (up to {LINKEDIN_ASYNC_MAX_CONNECTIONS} connections)")
+    return client, proxy_url
+
+async def close_async_proxy_clients():
+    clients = list(_async_proxy_clients.values())
+    _async_proxy_clients.clear()
+    for client in clients:
+        await client.aclose()
+
+async def check_proxy_health_async(client, proxy_url, force=False):
+    """check_proxy_health for the async client; shares its cached result and in-flight probe with the threaded search."""
+    while True:
+        claim = _claim_proxy_probe(proxy_url, force)
+        if claim is None:
+            return True
+        probe, is_owner = claim
+        if is_owner:
+            break
+        # shield: a cancelled waiter must not cancel the probe's future for everyone else
+        await asyncio.shield(asyncio.wrap_future(probe))
+        force = False
+    try:
+        test_response = await client.get(PROXY_HEALTH_CHECK_URL, timeout=15)
+        with _proxy_health_lock:
+            return _record_proxy_health(proxy_url, test_response.status_code, test_response.text)
+    finally:
+        _end_proxy_probe(proxy_url, probe)
+
+
+async def _timed_proxy_get_async(client, url, headers=None):
+    for attempt in range(_ASYNC_FETCH_ATTEMPTS):
+        with metrics.timed('linkedin_fetch'):
+            response = await client.get(url, headers=headers)
+        metrics.record_proxy_bytes(len(response.content))
+        metrics.inc('linkedin_responses', 1, 'LinkedIn responses by status code', status=response.status_code)
+        if response.status_code not in _RETRY_STATUSES or attempt == _ASYNC_FETCH_ATTEMPTS - 1:
+            return response
+        await asyncio.sleep(2 ** attempt)
+    return response
+
+
+async def _fetch_page_html_async(client, url, label, stop_event, before_network_fetch=None):
+    """_fetch_page_html for the async client; before_network_fetch is a coroutine function."""
+    if linkedin_response_cache is not None:
+        cached_html = linkedin_response_cache.get(url)
+        if cached_html is not None:
+            print(f"♻️ {label} served from the response cache")
+            return cached_html, False
+
+    if before_network_fetch is not None:
+        await before_network_fetch()
+    if not await get_host_rate_limiter(url).acquire_async(stop_event):
+        return None, False
+    headers = linkedin_response_cache.revalidation_headers(url) if linkedin_response_cache is not None else {}
+    response = await _timed_proxy_get_async(client, url, headers=headers or None)
+    print(f"📡 LinkedIn response for {label}: {response.status_code}")
+    if response.status_code == 304 and linkedin_response_cache is not None:
+        html = linkedin_response_cache.revalidated(url)
+        if html is not None:
+            return html, True
+        if not await get_host_rate_limiter(url).acquire_async(stop_event): # Entry was evicted meanwhile; refetch it
+            return None, False
+        response = await _timed_proxy_get_async(client, url)
+    if response.status_code != 200:
+        print(f"❌ LinkedIn returned status: {response.status_code}. Content: {response.text[:200]}")
+        return None, True
+    if linkedin_response_cache is not None:
+        linkedin_response_cache.set(url, response.text, etag=response.headers.get('ETag'),
+                                    last_modified=response.headers.get('Last-Modified'))
+    return response.text, True
+
+
+async def _fetch_search_terms_async(client, proxy_url, search_terms, location, max_jobs, on_new_jobs=None, cancel_event=None,
+                                    before_network_fetch=None):
+    """
+    _fetch_search_terms_concurrently as LINKEDIN_FETCH_CONCURRENCY coroutines. `cancel_event` is an
+    asyncio.Event; `on_new_jobs(jobs)` is called on the event loop with each page's new jobs.
+    """
+    dedup_index = JobDedupIndex()
+    jobs_by_term = [[] for _ in search_terms]
+    stop_event = asyncio.Event()
+    progress_event = asyncio.Event() # Set whenever a page is recorded, so waiting workers re-check the planner
+    total_found = [0]
+    planner = _new_search_planner(search_terms, max_jobs)
+
+    async def _fetch_page(i_term, search_term, page_num):
+        """Fetches and merges one page; returns (cards_on_page, new_jobs, from_network) or None if paging this term failed."""
+        if page_num == 0:
+            print(f"\n🔍 Search {i_term+1}: '{search_term}' in {location}")
+        from_network = False
+        linkedin_jobs_page = await asyncio.to_thread(_stored_page, search_term, location, page_num)
+        if linkedin_jobs_page is not None:
+            print(f"♻️ Page {page_num + 1} of '{search_term}' served from the job store ({len(linkedin_jobs_page)} jobs)")
+        try:
+            if linkedin_jobs_page is None:
+                linkedin_url = _search_page_url(search_term, location, page_num)
+                html, from_network = await _fetch_page_html_async(client, linkedin_url, f"page {page_num + 1} of '{search_term}'",
+                                                                  stop_event, before_network_fetch)
+                if html is None:
+                    return None # Stop paging this search term
+                with metrics.timed('linkedin_parse'):
+                    linkedin_jobs_page = await asyncio.to_thread(parse_linkedin_html, html, location)
+                await asyncio.to_thread(_save_stored_page, search_term, location, page_num, linkedin_jobs_page)
+        except httpx.ProxyError as e_proxy:
+            print(f"❌ Proxy error for LinkedIn: {e_proxy}")
+            invalidate_proxy_health({'https': proxy_url})
+            stop_event.set() # A broken proxy affects every term, so stop them all
+            raise Exception("LinkedIn proxy error. Check proxy or network.")
+        except httpx.HTTPError as e_req:
+            print(f"❌ Network error during LinkedIn search: {e_req}")
+            return None # Stop paging this search term
+
+        # No lock needed: nothing below awaits, so pages are merged one at a time
+        new_jobs_count = 0
+        new_jobs_start = len(jobs_by_term[i_term])
+        for job_item in linkedin_jobs_page:
+            if total_found[0] >= max_jobs:
+                break
+            if dedup_index.add(job_item):
+                jobs_by_term[i_term].append(job_item)
+                total_found[0] += 1
+                new_jobs_count += 1
+        if total_found[0] >= max_jobs:
+            stop_event.set()
+        if on_new_jobs and new_jobs_count:
+            on_new_jobs(jobs_by_term[i_term][new_jobs_start:])
+        print(f"✅ Added {new_jobs_count} new jobs from page {page_num + 1} of '{search_term}' (total unique: {total_found[0]})")
+        return len(linkedin_jobs_page), new_jobs_count, from_network
+
+    async def _worker():
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                stop_event.set()
+            planned = planner.poll_next_page(stop_event.is_set())
+            if planned is None:
+                return
+            if planned is WAIT:
+                progress_event.clear()
+                try:
+                    await asyncio.wait_for(progress_event.wait(), 0.5) # A page in flight may still open up more work
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            i_term, search_term, page_num = planned
+            outcome = None
+            try:
+                outcome = await _fetch_page(i_term, search_term, page_num)
+            finally:
+                if outcome is None:
+                    planner.record(i_term, page_num, 0, 0, from_network=True, failed=True)
+                else:
+                    planner.record(i_term, page_num, *outcome[:2], from_network=outcome[2])
+                progress_event.set()
+
+    workers = max(1, min(LINKEDIN_FETCH_CONCURRENCY, len(search_terms)))
+    errors = await asyncio.gather(*(_worker() for _ in range(workers)), return_exceptions=True)
+    first_error = next((e for e in errors if isinstance(e, BaseException)), None)
+    if first_error is not None:
+        raise first_error
+    _log_search_summary(dedup_index, planner)
+    return [job for term_jobs in jobs_by_term for job in term_jobs]
+
+
+async def search_linkedin_jobs_async(cv_analysis, location, bright_data_config_passed, max_results=25, on_new_jobs=None, cancel_event=None):
+    """search_linkedin_jobs for asyncio callers (see _fetch_search_terms_async)."""
+    print(f"🔍 Searching LinkedIn for: {cv_analysis.get('current_role', 'Professional')} in {location} (async)")
+    search_terms = build_search_terms(cv_analysis)
+    print(f"🎯 Smart search terms: {search_terms}")
+    jobs = await search_linkedin_terms_async(search_terms, location, bright_data_config_passed, max_results * 2,
+                                             on_new_jobs=on_new_jobs, cancel_event=cancel_event)
     print(f"\n📊 Total jobs found before AI scoring: {len(jobs)}")
-    return jobs[:max_results * 2]
\ No newline at end of file
+    return jobs
+
+
+async def search_linkedin_terms_async(search_terms, location, bright_data_config_passed, max_jobs, on_new_jobs=None, cancel_event=None):
+    _check_bright_data_password(bright_data_config_passed)
+    try:
+        client, proxy_url = get_async_proxy_client(bright_data_config_passed)
+        jobs = await _fetch_search_terms_async(client, proxy_url, search_terms, location, max_jobs,
+                                               on_new_jobs=on_new_jobs, cancel_event=cancel_event,
+                                               before_network_fetch=lambda: check_proxy_health_async(client, proxy_url))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e_main_search:
+        print(f"General LinkedIn search error: {e_main_search}")
+        raise Exception(f"LinkedIn search process failed: {e_main_search}")
+    return jobs[:max_jobs]
@@ -0,0 +1,349 @@
+"""
+Process-wide metrics plus an optional per-request trace.
+
+Stage timings, OpenAI token usage and proxy bytes are always added to the process-wide
+registry rendered at /metrics (Prometheus text format). While a RequestTrace is active (see
+start_trace()), they are also added to that trace so a route can return a per-request breakdown.
+Worker threads don't inherit the trace automatically: wrap functions submitted to executors with
+bind_trace().
+With several worker processes, share_across_processes() makes /metrics report the counters and
+stage histograms summed over all of them, whichever worker answers the scrape.
+"""
+import os
+import re
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+METRIC_PREFIX = 'ai_job_finder_'
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_current_trace = contextvars.ContextVar('request_trace', default=None)
+_lock = threading.Lock()
+_counters = {} # (name, labels) -> value
+_histograms = {} # labels -> [bucket_counts, count, sum] for the stage duration histogram
+_collectors = {} # name -> callable returning a (possibly nested) dict of numbers
+_help = {}
+_shared_store = None # Set by share_across_processes()
+_publish_interval = 5.0
+_dirty = False # Updated since this process last published its snapshot
+_process = None # (pid, key of this process's snapshot in _shared_store)
+_publisher_pid = None # Process whose publisher thread is running
+
+
+class RequestTrace:
+    """Timings and usage collected while handling one request (possibly across threads)."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.stages = {} # stage -> {'count', 'total_seconds', 'max_seconds'}
+        self.tokens = {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0, 'cached_prompt_tokens': 0,
+                       'prompt_tokens_saved': 0} # Saved = cut by prompt compaction before sending
+        self.openai_calls = 0
+        self.proxy_bytes = 0
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage, seconds):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            entry['count'] += 1
+            entry['total_seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+
+    def add_tokens(self, prompt_tokens, completion_tokens, total_tokens, cached_prompt_tokens=0):
+        with self._lock:
+            self.openai_calls += 1
+            self.tokens['prompt_tokens'] += prompt_tokens
+            self.tokens['completion_tokens'] += completion_tokens
+            self.tokens['total_tokens'] += total_tokens
+            self.tokens['cached_prompt_tokens'] += cached_prompt_tokens
+
+    def add_tokens_saved(self, count):
+        with self._lock:
+            self.tokens['prompt_tokens_saved'] += count
+
+    def add_proxy_bytes(self, count):
+        with self._lock:
+            self.proxy_bytes += count
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'total_seconds': round(time.perf_counter() - self.started_at, 4),
+                'stages': {stage: {'count': v['count'], 'total_seconds': round(v['total_seconds'], 4),
+                                   'max_seconds': round(v['max_seconds'], 4)} for stage, v in self.stages.items()},
+                'openai_calls': self.openai_calls,
+                'tokens': dict(self.tokens),
+                'proxy_bytes': self.proxy_bytes,
+            }
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace():
+    """Makes a new RequestTrace current for the duration of the block and yields it."""
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def bind_trace(fn, trace=None):
+    """Wraps fn so it runs with the caller's trace (or `trace`) current, e.g. on an executor thread."""
+    trace = current_trace() if trace is None else trace
+    if trace is None:
+        return fn
+
+    def _run_with_trace(*args, **kwargs):
+        token = _current_trace.set(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_trace.reset(token)
+    return _run_with_trace
+
+
+def _labels_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, value=1, help_text=None, **labels):
+    """Adds value to counter `name` (exported as <prefix><name>_total)."""
+    with _lock:
+        key = (name, _labels_key(labels))
+        _counters[key] = _counters.get(key, 0) + value
+        if help_text:
+            _help.setdefault(name, help_text)
+        _mark_updated()
+
+
+def observe_stage(stage, seconds, **labels):
+    labels = dict(labels, stage=stage)
+    with _lock:
+        key = _labels_key(labels)
+        entry = _histograms.get(key)
+        if entry is None:
+            entry = _histograms[key] = [[0] * len(STAGE_BUCKETS), 0, 0.0]
+        for i, bound in enumerate(STAGE_BUCKETS):
+            if seconds <= bound:
+                entry[0][i] += 1
+        entry[1] += 1
+        entry[2] += seconds
+        _mark_updated()
+    trace = current_trace()
+    if trace is not None:
+        trace.add_stage(stage, seconds)
+
+
+@contextmanager
+def timed(stage, **labels):
+    """Times the block as one occurrence of `stage` (also recorded if the block raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start, **labels)
+
+
+def record_openai_usage(response, model=None):
+    """Adds the token usage of an OpenAI response (or a final streamed chunk) to the counters and trace."""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    model = model or getattr(response, 'model', None) or 'unknown'
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    total_tokens = getattr(usage, 'total_tokens', 0) or (prompt_tokens + completion_tokens)
+    # Prompt tokens served from OpenAI's prompt cache (a subset of prompt_tokens, billed at a discount)
+    cached_prompt_tokens = getattr(getattr(usage, 'prompt_tokens_details', None), 'cached_tokens', 0) or 0
+    inc('openai_requests', 1, 'OpenAI chat completions with reported usage', model=model)
+    inc('openai_tokens', prompt_tokens, 'OpenAI tokens used', model=model, kind='prompt')
+    inc('openai_tokens', completion_tokens, 'OpenAI tokens used', model=model, kind='completion')
+    inc('openai_tokens', cached_prompt_tokens, 'OpenAI tokens used', model=model, kind='cached_prompt')
+    trace = current_trace()
+    if trace is not None:
+        trace.add_tokens(prompt_tokens, completion_tokens, total_tokens, cached_prompt_tokens)
+
+
+def record_prompt_compaction(stage, original_tokens, compacted_tokens):
+    saved = max(0, original_tokens - compacted_tokens)
+    inc('prompt_compaction_runs', 1, 'CV texts compacted before prompting', stage=stage)
+    inc('prompt_compaction_tokens_saved', saved, 'Prompt tokens removed by CV compaction', stage=stage)
+    trace = current_trace()
+    if trace is not None:
+        trace.add_tokens_saved(saved)
+
+
+def record_proxy_bytes(count, host='linkedin'):
+    inc('proxy_bytes', count, 'Response bytes received through the proxy', host=host)
+    trace = current_trace()
+    if trace is not None:
+        trace.add_proxy_bytes(count)
+
+
+def share_across_processes(store, publish_interval=5.0):
+    """
+    Aggregates counters and stage histograms over every process using `store` (e.g. a
+    cache_utils.SQLiteCache on a file all serve.py workers open): each process writes a snapshot of
+    its own registry there at most every publish_interval seconds, and render_prometheus() sums
+    the snapshots. Snapshots of exited workers are kept, so the totals never go down. Collector
+    gauges still describe the process that renders them.
+    """
+    global _shared_store, _publish_interval
+    with _lock:
+        _shared_store = store
+        _publish_interval = publish_interval
+
+
+def reset():
+    """Clears this process's counters and histograms and, if shared, every process's snapshot (serve.py calls it before forking)."""
+    global _dirty
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _dirty = False
+        store = _shared_store
+    if store is not None:
+        store.clear()
+
+
+def _process_key():
+    """Key of this process's snapshot; a new one after fork(), so workers don't overwrite each other."""
+    global _process
+    if _process is None or _process[0] != os.getpid():
+        _process = (os.getpid(), f"{os.getpid()}:{time.time()}")
+    return _process[1]
+
+
+def _mark_updated():
+    # Called with _lock held. Starts this process's publisher on its first update (threads don't survive fork())
+    global _dirty, _publisher_pid
+    if _shared_store is None:
+        return
+    if _publisher_pid != os.getpid():
+        _publisher_pid = os.getpid()
+        threading.Thread(target=_publish_loop, name='metrics-publisher', daemon=True).start()
+    _dirty = True
+
+
+def _publish_loop():
+    while True:
+        time.sleep(_publish_interval)
+        if _dirty:
+            _publish_snapshot()
+
+
+def _publish_snapshot():
+    global _dirty
+    with _lock:
+        _dirty = False
+        store = _shared_store
+        snapshot = {
+            'counters': [[name, labels, value] for (name, labels), value in _counters.items()],
+            'histograms': [[labels, list(v[0]), v[1], v[2]] for labels, v in _histograms.items()],
+            'help': dict(_help),
+        }
+    if store is None:
+        return
+    try:
+        store.set(_process_key(), snapshot)
+    except Exception as e:
+        print(f"⚠️ Could not publish metrics to the shared store: {e}")
+
+
+def _merged_snapshots(store):
+    """Counters, histograms and help texts summed over the snapshots of all processes."""
+    counters, histograms, help_texts = {}, {}, {}
+    for snapshot in store.values():
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for labels, buckets, count, total in snapshot['histograms']:
+            key = tuple(map(tuple, labels))
+            merged = histograms.get(key, ([0] * len(STAGE_BUCKETS), 0, 0.0))
+            histograms[key] = ([a + b for a, b in zip(merged[0], buckets)], merged[1] + count, merged[2] + total)
+        help_texts.update(snapshot['help'])
+    return counters, histograms, help_texts
+
+
+def register_collector(name, fn):
+    """fn() returns a dict (may be nested) whose numeric leaves are exported as gauges at scrape time."""
+    with _lock:
+        _collectors[name] = fn
+
+
+def _metric_name(*parts):
+    return METRIC_PREFIX + re.sub(r'[^a-zA-Z0-9_]', '_', '_'.join(p for p in parts if p)).lower()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _flatten(prefix, value, out):
+    if isinstance(value, bool):
+        out.append((prefix, int(value)))
+    elif isinstance(value, (int, float)):
+        out.append((prefix, value))
+    elif isinstance(value, dict):
+        for key, child in value.items():
+            _flatten(f"{prefix}_{key}" if prefix else str(key), child, out)
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: (list(v[0]), v[1], v[2]) for k, v in _histograms.items()}
+        collectors = dict(_collectors)
+        help_texts = dict(_help)
+        store = _shared_store
+    if store is not None:
+        _publish_snapshot() # So this process's own numbers are current
+        try:
+            counters, histograms, help_texts = _merged_snapshots(store)
+        except Exception as e:
+            print(f"⚠️ Could not read metrics from the shared store, reporting this worker only: {e}")
+
+    for name in sorted({name for name, _ in counters}):
+        metric = _metric_name(name, 'total')
+        if name in help_texts:
+            lines.append(f"# HELP {metric} {help_texts[name]}")
+        lines.append(f"# TYPE {metric} counter")
+        for (counter_name, labels), value in sorted(counters.items()):
+            if counter_name == name:
+                lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+    if histograms:
+        metric = _metric_name('stage_duration_seconds')
+        lines.append(f"# HELP {metric} Time spent per pipeline stage")
+        lines.append(f"# TYPE {metric} histogram")
+        for labels, (buckets, count, total) in sorted(histograms.items()):
+            for bound, bucket_count in zip(STAGE_BUCKETS, buckets):
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', str(bound)),))} {bucket_count}")
+            lines.append(f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total:.6f}")
+
+    for name, fn in sorted(collectors.items()):
+        try:
+            values = []
+            _flatten('', fn() or {}, values)
+        except Exception as e:
+            print(f"⚠️ Metrics collector '{name}' failed: {e}")
+            continue
+        for field, value in values:
+            metric = _metric_name(name, field)
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+    return '\n'.join(lines) + '\n'
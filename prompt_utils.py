@@ -0,0 +1,202 @@
+"""
+Prompt-building helpers: local token counting and CV text compaction.
+
+count_tokens uses tiktoken when it is installed (optional; pip install tiktoken) and a
+characters-per-token estimate otherwise. compact_cv_text leaves a CV that already fits its token
+budget untouched. A longer one is tidied (whitespace, page numbers and headers/footers repeated at
+page breaks, boilerplate) and, if it is still over the budget, loses the least useful sections
+(references, hobbies, ...) before the ends of the remaining ones are trimmed.
+"""
+import re
+import threading
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+CHARS_PER_TOKEN_ESTIMATE = 4 # Typical for English text with OpenAI tokenizers
+
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+PAGE_BREAK = '\f' # cv_utils ends every extracted PDF page with a form feed
+PAGE_EDGE_LINES = 2 # Non-blank lines at the top and bottom of a page that can be a header/footer
+
+# Only removed at the top or bottom of a page
+_PAGE_NUMBER_RES = [re.compile(p, re.IGNORECASE) for p in (
+    r'^(page\s*)?\d{1,3}\s*(of|/)\s*\d{1,3}$', # "Page 2 of 3", "2/3"
+    r'^page\s*\d{1,3}$',
+    r'^-?\s*\d{1,3}\s*-?$', # Bare page numbers; 4 digits would be a year
+)]
+# Removed anywhere
+_BOILERPLATE_RES = [re.compile(p, re.IGNORECASE) for p in (
+    r'^(curriculum vitae|resume|résumé|cv|lebenslauf)$',
+    r'^references?\s+(are\s+)?(available\s+)?(up)?on\s+request\.?$',
+    r'^[\W_]+$', # Rulers and stray bullets
+)]
+
+# Lower number = kept longer when the CV has to be cut. Text before the first heading
+# (name, title, contact line) counts as 'header'.
+SECTION_PRIORITIES = {
+    'header': 0, 'summary': 1, 'experience': 1, 'skills': 1,
+    'projects': 2, 'education': 2, 'certifications': 2,
+    'languages': 3, 'other': 3, 'publications': 3, 'awards': 3,
+    'volunteering': 4, 'interests': 5, 'references': 6,
+}
+_SECTION_HEADINGS = {
+    'summary': ('summary', 'profile', 'professional summary', 'about me', 'objective', 'career objective', 'personal statement'),
+    'experience': ('experience', 'work experience', 'professional experience', 'employment', 'employment history',
+                   'work history', 'career history', 'berufserfahrung'),
+    'skills': ('skills', 'technical skills', 'core skills', 'key skills', 'competencies', 'core competencies', 'technologies',
+               'tech stack', 'kenntnisse'),
+    'projects': ('projects', 'selected projects', 'key projects'),
+    'education': ('education', 'academic background', 'qualifications', 'ausbildung'),
+    'certifications': ('certifications', 'certificates', 'licenses', 'training', 'courses'),
+    'languages': ('languages', 'sprachen'),
+    'publications': ('publications', 'talks'),
+    'awards': ('awards', 'honors', 'honours', 'achievements'),
+    'volunteering': ('volunteering', 'volunteer experience', 'voluntary work'),
+    'interests': ('interests', 'hobbies', 'hobbies and interests', 'personal interests', 'hobbys'),
+    'references': ('references', 'referees', 'referenzen'),
+}
+_HEADING_TO_SECTION = {heading: section for section, headings in _SECTION_HEADINGS.items() for heading in headings}
+
+
+def _get_encoding(model):
+    if tiktoken is None:
+        return None
+    with _encodings_lock:
+        if model not in _encodings:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except Exception: # Unknown model, or the BPE file can't be downloaded (offline)
+                try:
+                    _encodings[model] = tiktoken.get_encoding('o200k_base')
+                except Exception:
+                    _encodings[model] = None
+        return _encodings[model]
+
+
+def count_tokens(text, model='gpt-4o'):
+    """Tokens in text for the given model (exact with tiktoken, estimated without)."""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, round(len(text) / CHARS_PER_TOKEN_ESTIMATE))
+
+
+def count_message_tokens(messages, model='gpt-4o'):
+    # ~4 tokens of chat formatting per message, as in OpenAI's cookbook
+    return sum(count_tokens(m.get('content', ''), model) + 4 for m in messages) + 2
+
+
+def _dedupe_key(line):
+    return re.sub(r'\W+', ' ', line).strip().lower()
+
+
+def _page_edges(lines):
+    """{line index: 'top' or 'bottom'} for the first and last PAGE_EDGE_LINES non-blank lines of a page."""
+    non_blank = [i for i, line in enumerate(lines) if line]
+    edges = {i: 'bottom' for i in non_blank[-PAGE_EDGE_LINES:]}
+    edges.update({i: 'top' for i in non_blank[:PAGE_EDGE_LINES]})
+    return edges
+
+
+def normalize_cv_lines(text):
+    """
+    CV text as a list of tidy lines: whitespace collapsed, boilerplate removed, page numbers and
+    running headers/footers removed from the top and bottom of pages, a line repeated right below
+    itself kept once, and at most one blank line in a row. Page breaks are form feeds (PAGE_BREAK);
+    text without them is one page. A header (footer) is a line found at the top (bottom) of two or
+    more pages; its first occurrence is kept (on the first page it is usually the name line).
+    """
+    pages = []
+    for page in (text or '').replace('\r\n', '\n').replace('\r', '\n').split(PAGE_BREAK):
+        pages.append([re.sub(r'[ \t\u00a0\v]+', ' ', line).strip() for line in page.split('\n')])
+    page_edges = [_page_edges(page) for page in pages]
+    pages_with_edge_line = {}
+    for page, edges in zip(pages, page_edges):
+        for edge_key in {(side, _dedupe_key(page[i])) for i, side in edges.items()}:
+            pages_with_edge_line[edge_key] = pages_with_edge_line.get(edge_key, 0) + 1
+
+    lines, seen_running, previous_key = [], set(), None
+    for page, edges in zip(pages, page_edges):
+        for i, line in enumerate(page):
+            if not line:
+                if lines and lines[-1]:
+                    lines.append('')
+                continue
+            if any(pattern.match(line) for pattern in _BOILERPLATE_RES):
+                continue
+            key = _dedupe_key(line)
+            if i in edges:
+                if any(pattern.match(line) for pattern in _PAGE_NUMBER_RES):
+                    continue
+                if pages_with_edge_line.get((edges[i], key), 0) > 1 and len(key) > 3:
+                    if key in seen_running:
+                        continue
+                    seen_running.add(key)
+            if key == previous_key and len(key) > 3:
+                continue
+            previous_key = key
+            lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _section_for_heading(line):
+    if len(line) > 40:
+        return None
+    return _HEADING_TO_SECTION.get(_dedupe_key(line.rstrip(':')))
+
+
+def split_cv_sections(lines):
+    """[(section_name, lines)] in document order; the first entry is the 'header' before any heading."""
+    sections = [('header', [])]
+    for line in lines:
+        section = _section_for_heading(line)
+        if section is not None:
+            sections.append((section, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(name, section_lines) for name, section_lines in sections if any(section_lines)]
+
+
+def compact_cv_text(text, max_tokens=None, model='gpt-4o'):
+    """
+    Normalized CV text that fits in max_tokens (None means no limit). When cutting is needed, whole
+    sections go first, least important (and, among equals, last in the CV) first, while summary,
+    experience and skills are kept; then the longest remaining sections lose lines from their end.
+    Text that already fits is returned as it is.
+    """
+    if max_tokens is None or count_tokens(text, model) <= max_tokens:
+        return text or ''
+    sections = split_cv_sections(normalize_cv_lines(text))
+    # Per-line counts (+1 for the newline) so the cuts below don't re-tokenize the whole CV
+    counted = [[name, [(line, count_tokens(line, model) + 1) for line in section_lines]] for name, section_lines in sections]
+    total = sum(count for _, section_lines in counted for _, count in section_lines)
+    if total <= max_tokens:
+        return '\n'.join(line for _, section_lines in counted for line, _ in section_lines)
+
+    droppable = sorted((i for i, (name, _) in enumerate(counted) if SECTION_PRIORITIES.get(name, 3) > 1),
+                       key=lambda i: (SECTION_PRIORITIES.get(counted[i][0], 3), i), reverse=True)
+    for i in droppable:
+        if total <= max_tokens:
+            break
+        total -= sum(count for _, count in counted[i][1])
+        counted[i][1] = []
+
+    while total > max_tokens:
+        longest = max(counted, key=lambda section: sum(count for _, count in section[1]))
+        if len(longest[1]) <= 1:
+            break
+        total -= longest[1].pop()[1]
+
+    compacted = '\n'.join(line for _, section_lines in counted for line, _ in section_lines)
+    if total > max_tokens: # A single huge line; cut by characters as a last resort
+        compacted = compacted[:max_tokens * CHARS_PER_TOKEN_ESTIMATE]
+    return compacted
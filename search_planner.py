@@ -0,0 +1,136 @@
+"""
+Decides which LinkedIn result page to fetch next during a search.
+
+Every search term gets its first page, in the order given. After that, the term whose recent
+pages brought the most new unique jobs is asked for its next page. A term stops being explored
+when a page adds nothing new, when most of a page overlaps jobs already collected
+(overlap_threshold), or when it hits max_pages_per_term. The whole search stops at the job
+target, at max_requests network requests or after time_budget_seconds.
+"""
+import time
+import threading
+
+WAIT = 'wait' # poll_next_page(): nothing to hand out until a page in flight is recorded
+
+
+class _TermState:
+    def __init__(self, index, term):
+        self.index = index
+        self.term = term
+        self.next_page = 0
+        self.pages = 0
+        self.new_jobs = 0
+        self.yield_estimate = None # Smoothed new unique jobs per page; None until the first page
+        self.in_flight = False
+        self.exhausted = False
+        self.stop_reason = None
+
+
+class SearchTermPlanner:
+    """Thread-safe page scheduler shared by the fetch workers of one search."""
+
+    def __init__(self, search_terms, target_jobs, max_requests=18, max_pages_per_term=5,
+                 overlap_threshold=0.8, time_budget_seconds=None, smoothing=0.5):
+        self.terms = [_TermState(i, term) for i, term in enumerate(search_terms)]
+        self.target_jobs = target_jobs
+        self.max_requests = max_requests
+        self.max_pages_per_term = max_pages_per_term
+        self.overlap_threshold = overlap_threshold
+        self.deadline = time.monotonic() + time_budget_seconds if time_budget_seconds else None
+        self.smoothing = smoothing
+        self.network_requests = 0
+        self.total_jobs = 0
+        self.stop_reason = None
+        self._reserved_requests = 0 # Pages handed out and not yet recorded
+        self._condition = threading.Condition()
+
+    def _budget_stop_reason(self):
+        if self.stop_reason:
+            return self.stop_reason
+        if self.total_jobs >= self.target_jobs:
+            return 'target reached'
+        if self.max_requests and self.network_requests + self._reserved_requests >= self.max_requests:
+            return 'request budget used'
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return 'time budget used'
+        return None
+
+    def _pick(self):
+        candidates = [t for t in self.terms if not t.exhausted and not t.in_flight]
+        if not candidates:
+            return None
+        unexplored = [t for t in candidates if t.yield_estimate is None]
+        if unexplored:
+            return unexplored[0]
+        return max(candidates, key=lambda t: (t.yield_estimate, -t.index))
+
+    def _next_page_locked(self, stopped):
+        reason = self._budget_stop_reason()
+        if not reason and stopped:
+            reason = 'stopped'
+        # Pages in flight may turn out to be cache hits and give back request budget, so wait for them
+        if reason and not (reason == 'request budget used' and self._reserved_requests):
+            self.stop_reason = reason
+            self._condition.notify_all()
+            return None
+        if not reason:
+            term = self._pick()
+            if term is not None:
+                term.in_flight = True
+                self._reserved_requests += 1
+                return term.index, term.term, term.next_page
+            if not any(t.in_flight for t in self.terms):
+                self.stop_reason = 'all terms exhausted'
+                self._condition.notify_all()
+                return None
+        return WAIT
+
+    def next_page(self, stop_event=None):
+        """
+        Blocks until a page can be fetched and returns (term_index, search_term, page_num), or
+        None when the search is over. Every returned page must be reported back via record().
+        """
+        with self._condition:
+            while True:
+                planned = self._next_page_locked(stop_event is not None and stop_event.is_set())
+                if planned is not WAIT:
+                    return planned
+                self._condition.wait(timeout=0.5) # A page in flight may still open up more work
+
+    def poll_next_page(self, stopped=False):
+        """Non-blocking next_page for asyncio workers: returns WAIT instead of waiting for pages in flight."""
+        with self._condition:
+            return self._next_page_locked(stopped)
+
+    def record(self, term_index, page_num, cards_on_page, new_jobs, from_network=True, failed=False):
+        """Reports a fetched page: how many cards it had and how many of them were new unique jobs."""
+        with self._condition:
+            term = self.terms[term_index]
+            term.in_flight = False
+            self._reserved_requests -= 1
+            if from_network:
+                self.network_requests += 1
+            term.pages += 1
+            term.next_page = page_num + 1
+            term.new_jobs += new_jobs
+            self.total_jobs += new_jobs
+            term.yield_estimate = new_jobs if term.yield_estimate is None else \
+                self.smoothing * new_jobs + (1 - self.smoothing) * term.yield_estimate
+
+            overlap = 1 - new_jobs / cards_on_page if cards_on_page else 1.0
+            if failed:
+                term.exhausted, term.stop_reason = True, 'fetch failed'
+            elif cards_on_page == 0 or new_jobs == 0:
+                term.exhausted, term.stop_reason = True, 'no new jobs'
+            elif overlap >= self.overlap_threshold:
+                term.exhausted, term.stop_reason = True, f'{overlap:.0%} overlap with earlier results'
+            elif term.next_page >= self.max_pages_per_term:
+                term.exhausted, term.stop_reason = True, 'page limit'
+            self._condition.notify_all()
+
+    def summary(self):
+        with self._condition:
+            return {
+                'network_requests': self.network_requests, 'jobs': self.total_jobs, 'stop_reason': self.stop_reason,
+                'terms': [{'term': t.term, 'pages': t.pages, 'new_jobs': t.new_jobs, 'stop_reason': t.stop_reason} for t in self.terms]
+            }
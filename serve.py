@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Production launcher: serves app.py with Gunicorn using several worker processes.
+
+The app is imported once in the Gunicorn master (preload) and the workers are forked from it,
+so module-level setup (config, prompt templates, the tokenizer) is shared instead of being
+repeated per worker. Expensive results live in SQLite files that every worker reads and writes
+(WAL mode): CV analyses, match scores and tailored CVs (CV_CACHE_DB_PATH), LinkedIn result
+pages (JOB_STORE_DB_PATH), background-task status (TASK_STORE_DB_PATH) and the /metrics counters
+(METRICS_DB_PATH), so a CV analysed or a page fetched by one worker is a cache hit in all the others.
+
+Usage:
+    python serve.py [--workers N] [--threads 16] [--bind 0.0.0.0:8080]
+"""
+import argparse
+import gc
+import os
+import sys
+from settings import settings
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError: # Gunicorn is Unix-only; python app.py still works without it
+    BaseApplication = None
+
+DEFAULT_WORKERS = settings.get_int('WEB_CONCURRENCY', os.cpu_count() or 1)
+DEFAULT_THREADS = settings.get_int('WEB_THREADS', 16) # Streaming responses hold a thread each
+DEFAULT_TIMEOUT = settings.get_int('WEB_TIMEOUT', 120)
+
+
+def load_app():
+    """Imports and warms up the Flask app; runs once, in the master process."""
+    from app import app, warm_up, log_startup_summary
+    from prompt_utils import count_tokens
+    import metrics
+    log_startup_summary()
+    warm_up() # Lazily loaded libraries and the OpenAI client are shared by the workers, not loaded by each
+    count_tokens('warm up', 'gpt-4o') # Loads the tokenizer (if installed) before the workers fork
+    metrics.reset() # /metrics starts from zero; the workers must not inherit the master's counts
+    # Objects created so far stay untouched by the garbage collector, so the forked workers
+    # keep sharing those memory pages instead of copying them
+    gc.freeze()
+    return app
+
+
+if BaseApplication is not None:
+    class PreloadedApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return load_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='worker processes (default: WEB_CONCURRENCY or CPU count)')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help='request threads per worker (default: WEB_THREADS or 16)')
+    parser.add_argument('--bind', default=f"0.0.0.0:{settings.port}", help='address to listen on (default: 0.0.0.0:$PORT)')
+    args = parser.parse_args()
+
+    if BaseApplication is None:
+        sys.exit("❌ Gunicorn is not installed (pip install gunicorn). Use `python app.py` for a single process.")
+    if args.workers > 1:
+        # Task status has to be visible to whichever worker the next poll lands on
+        settings.set_default('TASK_STORE_DB_PATH', os.path.join('cache', 'tasks.sqlite3'))
+        # So is the /metrics scrape; the counters of all workers are added up there
+        settings.set_default('METRICS_DB_PATH', os.path.join('cache', 'metrics.sqlite3'))
+        # Each worker rate-limits LinkedIn on its own, so each gets its share of the configured rate
+        settings.set_default('LINKEDIN_RATE_PROCESSES', str(args.workers))
+
+    print(f"🚀 Serving on {args.bind} with {args.workers} worker process(es) x {args.threads} threads")
+    PreloadedApplication({
+        'bind': args.bind,
+        'workers': args.workers,
+        'worker_class': 'gthread',
+        'threads': args.threads,
+        'timeout': DEFAULT_TIMEOUT,
+        'preload_app': True,
+    }).run()
+
+
+if __name__ == '__main__':
+    main()
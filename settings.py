@@ -0,0 +1,91 @@
+"""
+Application settings, loaded once.
+
+The first import reads the .env file next to this module, or the first .env found from the
+working directory upwards. Values from .env take precedence over the process environment, as
+they always have. It then takes a snapshot of the environment into `settings`. Modules read
+their configuration through `settings` instead of calling os.getenv themselves, so the .env
+file is parsed a single time and nothing depends on import order. Nothing is printed and no
+clients are built here.
+"""
+import os
+from pathlib import Path
+
+ENV_FILE_PATH = Path(__file__).resolve().parent / '.env'
+
+
+def load_env_file():
+    """Loads ENV_FILE_PATH (or the nearest .env) into os.environ. Returns the path used, or None."""
+    try:
+        from dotenv import load_dotenv, find_dotenv
+    except ImportError: # python-dotenv is optional when the environment is set up by the platform
+        return None
+    env_file = str(ENV_FILE_PATH) if ENV_FILE_PATH.exists() else find_dotenv(usecwd=True)
+    if not env_file:
+        return None
+    load_dotenv(env_file, override=True)
+    return env_file
+
+
+class Settings:
+    """Typed read access to a snapshot of the environment, plus the settings shared by several modules."""
+
+    def __init__(self, environ, env_file=None):
+        self._values = dict(environ)
+        self.env_file = env_file
+
+    def get(self, name, default=None):
+        return self._values.get(name, default)
+
+    def _parse(self, name, default, parse, kind):
+        value = self._values.get(name)
+        if value is None or value.strip() == '':
+            return default
+        try:
+            return parse(value.strip())
+        except ValueError:
+            raise ValueError(f"Setting {name}={value!r} is not a valid {kind}")
+
+    def get_int(self, name, default):
+        return self._parse(name, default, int, 'integer')
+
+    def get_float(self, name, default):
+        return self._parse(name, None if default is None else float(default), float, 'number')
+
+    def get_bool(self, name, default):
+        return self._parse(name, default, lambda value: value.lower() == 'true', 'boolean')
+
+    def set_default(self, name, value):
+        """Sets a value that neither the environment nor .env provides (e.g. from a launcher)."""
+        self._values.setdefault(name, value)
+
+    # --- Shared settings ---
+    @property
+    def openai_api_key(self):
+        return self.get('OPENAI_API_KEY') or None
+
+    @property
+    def lazy_init(self):
+        # True: the OpenAI client and heavy parsing libraries are loaded on first use.
+        # False: app.py loads them at import (see app.warm_up()).
+        return self.get_bool('LAZY_INIT', True)
+
+    @property
+    def flask_debug(self):
+        return self.get_bool('FLASK_DEBUG', False)
+
+    @property
+    def port(self):
+        return self.get_int('PORT', 8080)
+
+    def bright_data_config(self):
+        """Bright Data proxy settings; the password is BRIGHTDATA_ACTUAL_PASSWORD from .env."""
+        return {
+            'host': self.get('BRIGHTDATA_HOST', 'brd.superproxy.io'),
+            'port': self.get('BRIGHTDATA_PORT', '33335'),
+            'username': 'brd-customer-hl_158e0070-zone-mcp_unlocker', # This is from your original code
+            'password': self.get('BRIGHTDATA_ACTUAL_PASSWORD')
+        }
+
+
+settings = Settings(os.environ, env_file=load_env_file())
@@ -0,0 +1,126 @@
+import re
+
+_SIMPLE_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class IncrementalJSONFieldParser:
+    """
+    Pulls values out of a JSON object while it is still being streamed, without waiting for
+    the closing brace. `string_fields` are top-level string values emitted piece by piece as
+    ('<field>', decoded_text_delta); `list_fields` are top-level arrays of strings whose items
+    are emitted whole as ('<field>', item) once each item's closing quote has arrived.
+
+        parser = IncrementalJSONFieldParser(string_fields=['tailored_cv'], list_fields=['recommendations'])
+        for chunk in chunks:
+            for field, value in parser.feed(chunk):
+                ...
+    """
+
+    def __init__(self, string_fields=(), list_fields=()):
+        self.string_fields = set(string_fields)
+        self.list_fields = set(list_fields)
+        fields = '|'.join(re.escape(f) for f in sorted(self.string_fields | self.list_fields))
+        self._key_re = re.compile(r'"(' + fields + r')"\s*:\s*([\["])') if fields else None
+        self._buffer = ''
+        self._pos = 0
+        self._field = None # field currently being read
+        self._mode = None # None (looking for a key), 'string' or 'list'
+
+    def feed(self, chunk):
+        """Adds streamed text and returns the (field, value) pieces that became available."""
+        self._buffer += chunk or ''
+        events = []
+        while True:
+            if self._mode is None:
+                if not self._find_next_field():
+                    break
+            elif self._mode == 'string':
+                text, closed = self._read_string_chars()
+                if text:
+                    events.append((self._field, text))
+                if not closed:
+                    break
+                self._mode = None
+            elif self._mode == 'list':
+                item, status = self._read_list_item()
+                if item is not None:
+                    events.append((self._field, item))
+                if status == 'wait':
+                    break
+                if status == 'end':
+                    self._mode = None
+        return events
+
+    def _find_next_field(self):
+        if self._key_re is None:
+            return False
+        match = self._key_re.search(self._buffer, self._pos)
+        if not match:
+            return False
+        field, opener = match.group(1), match.group(2)
+        expected = '"' if field in self.string_fields else '['
+        self._pos = match.end()
+        if opener != expected: # e.g. tailored_cv given as a list; skip it
+            return True
+        self._field = field
+        self._mode = 'string' if opener == '"' else 'list'
+        return True
+
+    def _read_string_chars(self):
+        """Decodes string content from _pos; returns (decoded_text, reached_closing_quote)."""
+        out = []
+        buf, pos = self._buffer, self._pos
+        while pos < len(buf):
+            ch = buf[pos]
+            if ch == '"':
+                self._pos = pos + 1
+                return ''.join(out), True
+            if ch == '\\':
+                if pos + 1 >= len(buf):
+                    break # escape split across chunks
+                esc = buf[pos + 1]
+                if esc == 'u':
+                    if pos + 6 > len(buf):
+                        break
+                    code = int(buf[pos + 2:pos + 6], 16)
+                    # Surrogate pair: wait for the low half too
+                    if 0xD800 <= code <= 0xDBFF:
+                        if pos + 12 > len(buf):
+                            break
+                        if buf[pos + 6:pos + 8] == '\\u':
+                            low = int(buf[pos + 8:pos + 12], 16)
+                            out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                            pos += 12
+                            continue
+                    out.append(chr(code))
+                    pos += 6
+                    continue
+                out.append(_SIMPLE_ESCAPES.get(esc, esc))
+                pos += 2
+                continue
+            out.append(ch)
+            pos += 1
+        self._pos = pos
+        return ''.join(out), False
+
+    def _read_list_item(self):
+        """Returns (item or None, status) where status is 'more', 'wait' or 'end'."""
+        buf = self._buffer
+        pos = self._pos
+        while pos < len(buf) and buf[pos] in ' \t\r\n,':
+            pos += 1
+        self._pos = pos
+        if pos >= len(buf):
+            return None, 'wait'
+        if buf[pos] == ']':
+            self._pos = pos + 1
+            return None, 'end'
+        if buf[pos] != '"': # non-string item; stop reading this list
+            return None, 'end'
+        start = pos
+        self._pos = pos + 1
+        text, closed = self._read_string_chars()
+        if not closed:
+            self._pos = start # re-read the whole item once it is complete
+            return None, 'wait'
+        return text, 'more'
@@ -0,0 +1,78 @@
+import copy
+import threading
+from ai_services import tailor_cv_with_ai, normalize_cv_text, TAILORING_MODEL, TAILOR_PROMPT_VERSION
+from cache_utils import stable_hash
+import metrics
+from task_queue import SUCCEEDED, FAILED
+
+
+class TailoringService:
+    """
+    Runs tailor_cv_with_ai off the request thread via a TaskManager.
+    Requests for the same (CV, job) pair share one in-flight task, and completed results are
+    kept in `cache`, so double-clicks and repeat visits don't trigger another OpenAI call.
+    """
+
+    def __init__(self, task_manager, cache):
+        self.task_manager = task_manager
+        self.cache = cache
+        self._in_flight = {} # cache key -> Task
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(original_cv_text, job_details):
+        # The job URL identifies the posting; title/company/description cover jobs without one
+        job_identity = job_details.get('url') or '|'.join(
+            str(job_details.get(field, '')) for field in ('title', 'company', 'location', 'description')
+        )
+        return stable_hash(normalize_cv_text(original_cv_text), job_identity, TAILORING_MODEL, TAILOR_PROMPT_VERSION)
+
+    def get_cached(self, original_cv_text, job_details):
+        cached = self.cache.get(self.cache_key(original_cv_text, job_details))
+        return copy.deepcopy(cached) if cached is not None else None
+
+    def store(self, original_cv_text, job_details, result):
+        """Caches a result produced outside the service (e.g. by the streaming endpoint)."""
+        self.cache.set(self.cache_key(original_cv_text, job_details), copy.deepcopy(result))
+
+    def submit(self, original_cv_text, job_details):
+        """
+        Returns (cached_result, None) on a cache hit, otherwise (None, task), where task is the
+        existing in-flight task for this (CV, job) pair if there is one. May raise TaskQueueFull.
+        """
+        key = self.cache_key(original_cv_text, job_details)
+        cached = self.cache.get(key)
+        if cached is not None:
+            print(f"♻️ Tailored CV served from cache for: {job_details.get('title')}")
+            return copy.deepcopy(cached), None
+        with self._lock:
+            task = self._in_flight.get(key)
+            if task is not None:
+                print(f"🔁 Joining in-flight tailoring task {task.id} for: {job_details.get('title')}")
+                return None, task
+            # The OpenAI usage of a shared task is attributed to the request that started it
+            task = self.task_manager.submit('tailor_cv', metrics.bind_trace(self._run), key, original_cv_text, job_details)
+            self._in_flight[key] = task
+            return None, task
+
+    def _run(self, task, key, original_cv_text, job_details):
+        try:
+            task.update({'stage': 'tailoring', 'message': 'AI is tailoring your CV...'})
+            result = tailor_cv_with_ai(original_cv_text, job_details)
+            self.cache.set(key, copy.deepcopy(result))
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def tailor(self, original_cv_text, job_details, timeout=None):
+        """Blocking helper for synchronous callers; re-raises the tailoring error if the task failed."""
+        cached, task = self.submit(original_cv_text, job_details)
+        if task is None:
+            return cached
+        self.task_manager.wait(task, timeout=timeout)
+        if task.status == SUCCEEDED:
+            return copy.deepcopy(task.result)
+        if task.status == FAILED and task.exception is not None:
+            raise task.exception
+        raise Exception(task.error or f"Tailoring task {task.id} did not finish ({task.status}).")
@@ -0,0 +1,196 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+# Task statuses
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATUSES = {SUCCEEDED, FAILED, CANCELLED}
+
+
+class TaskQueueFull(Exception):
+    """Raised by TaskManager.submit when max_queue_depth tasks are already queued or running."""
+
+
+class Task:
+    """One background task. The worker reports progress through update()/add_partial_result()."""
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.progress = None
+        self.partial_results = []
+        self.result = None
+        self.error = None
+        self.exception = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.on_change = None # Set by TaskManager when task snapshots are shared between processes
+        self._lock = threading.Lock()
+
+    def update(self, progress):
+        with self._lock:
+            self.progress = progress
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def add_partial_result(self, item):
+        with self._lock:
+            self.partial_results.append(item)
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def to_dict(self, include_partial=True):
+        with self._lock:
+            data = {
+                'task_id': self.id, 'kind': self.kind, 'status': self.status,
+                'progress': self.progress, 'error': self.error,
+                'created_at': self.created_at, 'finished_at': self.finished_at,
+                'result': self.result,
+            }
+            if include_partial:
+                data['partial_results'] = list(self.partial_results)
+            return data
+
+
+class TaskManager:
+    """
+    Runs tasks on a local thread pool with a bounded number of queued + running tasks.
+    Finished tasks are kept for result_ttl_seconds so clients can poll for the result.
+
+    With several worker processes a status request may reach a process other than the one running
+    the task. Given a shared_store (e.g. a cache_utils.SQLiteCache), each task's to_dict() snapshot
+    is written there on every status change and at most every publish_interval seconds while it
+    reports progress; snapshot() and cancel() fall back to it for tasks of other processes.
+    """
+
+    def __init__(self, max_workers=4, max_queue_depth=32, result_ttl_seconds=600, thread_name_prefix='task',
+                 shared_store=None, publish_interval=0.5):
+        self.max_queue_depth = max_queue_depth
+        self.result_ttl_seconds = result_ttl_seconds
+        self.shared_store = shared_store
+        self.publish_interval = publish_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._tasks = {}
+        self._published_at = {} # task_id -> time of the last shared snapshot
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """Queues fn(task, *args, **kwargs); its return value becomes task.result. Raises TaskQueueFull."""
+        task = Task(kind)
+        with self._lock:
+            self._expire_finished()
+            active = sum(1 for t in self._tasks.values() if t.status not in FINISHED_STATUSES)
+            if active >= self.max_queue_depth:
+                raise TaskQueueFull(f"Too many tasks in progress ({active}). Please try again shortly.")
+            self._tasks[task.id] = task
+        if self.shared_store is not None:
+            task.on_change = self._publish
+            self._publish(task, force=True) # Before the worker can publish 'running'
+        task.future = self._executor.submit(self._run, task, fn, args, kwargs)
+        return task
+
+    def _run(self, task, fn, args, kwargs):
+        if task.is_cancelled():
+            task.status = CANCELLED
+            task.finished_at = time.time()
+            self._publish(task, force=True)
+            return
+        task.status = RUNNING
+        self._publish(task, force=True)
+        try:
+            result = fn(task, *args, **kwargs)
+            with task._lock:
+                task.result = result
+                task.status = CANCELLED if task.is_cancelled() else SUCCEEDED
+        except Exception as e:
+            print(f"❌ Background task {task.id} ({task.kind}) failed: {e}")
+            with task._lock:
+                task.error = str(e)
+                task.exception = e
+                task.status = CANCELLED if task.is_cancelled() else FAILED
+        finally:
+            task.finished_at = time.time()
+            self._publish(task, force=True)
+
+    def _publish(self, task, force=False):
+        """Writes the task's snapshot to the shared store and picks up cancellations requested elsewhere."""
+        if self.shared_store is None:
+            return
+        now = time.time()
+        with self._lock:
+            if not force and now - self._published_at.get(task.id, 0) < self.publish_interval:
+                return
+            self._published_at[task.id] = now
+        try:
+            self.shared_store.set(task.id, task.to_dict())
+            if not task.is_cancelled() and self.shared_store.get(f"cancel:{task.id}"):
+                task.cancel_event.set()
+        except Exception as e: # Status polling from other processes degrades; the task itself keeps running
+            print(f"⚠️ Could not share status of task {task.id}: {e}")
+
+    def snapshot(self, task_id, include_partial=True):
+        """to_dict() of a task from this process or, failing that, its last shared snapshot; None if unknown."""
+        task = self.get(task_id)
+        if task is not None:
+            return task.to_dict(include_partial=include_partial)
+        data = self.shared_store.get(task_id) if self.shared_store is not None else None
+        if data is not None and not include_partial:
+            data.pop('partial_results', None)
+        return data
+
+    def wait(self, task, timeout=None):
+        """Blocks until the task has finished (or timeout seconds pass)."""
+        if task.future is not None:
+            try:
+                task.future.result(timeout=timeout)
+            except CancelledError:
+                pass
+        return task
+
+    def get(self, task_id):
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def cancel(self, task_id):
+        """
+        Cancels a queued task outright, or signals a running one via task.cancel_event. A task of
+        another process is flagged in the shared store and stops at its next progress report.
+        Returns the task's snapshot (without partial results) or None.
+        """
+        task = self.get(task_id)
+        if task is None:
+            data = self.snapshot(task_id, include_partial=False)
+            if data is not None and data['status'] not in FINISHED_STATUSES:
+                self.shared_store.set(f"cancel:{task_id}", True)
+            return data
+        task.cancel_event.set()
+        if task.status == QUEUED and task.future is not None and task.future.cancel():
+            task.status = CANCELLED
+            task.finished_at = time.time()
+            self._publish(task, force=True)
+        return task.to_dict(include_partial=False)
+
+    def _expire_finished(self):
+        cutoff = time.time() - self.result_ttl_seconds
+        expired = [task_id for task_id, t in self._tasks.items() if t.finished_at and t.finished_at < cutoff]
+        for task_id in expired:
+            del self._tasks[task_id]
+            self._published_at.pop(task_id, None)
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for t in self._tasks.values():
+                counts[t.status] = counts.get(t.status, 0) + 1
+            return {'tasks': counts, 'max_queue_depth': self.max_queue_depth}
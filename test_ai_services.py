@@ -0,0 +1,243 @@
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import ai_services
+from ai_services import (calculate_job_match_score, calculate_job_match_scores_batch, score_jobs_concurrently,
+                         _create_completion_with_backoff, _retry_after_seconds)
+from cache_utils import LRUCache, TieredCache
+
+CV_ANALYSIS = {
+    'current_role': 'Senior Python Developer',
+    'experience_years': 6,
+    'technical_skills': ['Python', 'Django'],
+    'industry': 'Software',
+    'career_level': 'Senior',
+    'target_job_titles': ['Backend Engineer'],
+}
+SCORES = {'Python Developer': 0.9, 'Backend Engineer': 0.8, 'Data Engineer': 0.6, 'Nurse': 0.1, 'Accountant': 0.2}
+
+
+def job(title):
+    return {'title': title, 'company': 'Acme', 'url': f"https://www.linkedin.com/jobs/view/{title.lower().replace(' ', '-')}"}
+
+
+class FakeRateLimitError(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__('429 Too Many Requests')
+        self.response = SimpleNamespace(headers={'retry-after': retry_after} if retry_after else {})
+
+
+class FakeTime:
+    """Records the backoff sleeps instead of waiting."""
+
+    def __init__(self):
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+class FakeClient:
+    """Stands in for the OpenAI client; `reply(prompt)` returns the message content or raises."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **options):
+        return self
+
+    def create(self, messages, **kwargs):
+        prompt = messages[-1]['content']
+        self.prompts.append(prompt)
+        content = self.reply(prompt)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def batch_results(prompt):
+    return [{'id': job_id, 'match_score': SCORES[title], 'reasoning': f"{title} fits", 'is_relevant': True}
+            for job_id, title in re.findall(r'\[JOB (\w+)\]\n- Title: (.*)', prompt)]
+
+
+def single_result(prompt):
+    title = re.search(r'- Title: (.*)', prompt).group(1)
+    return json.dumps({'match_score': SCORES[title], 'reasoning': f"{title} fits (single)", 'is_relevant': True})
+
+
+def answer(edit_batch=lambda results: results):
+    """Batch prompts get one result per job (passed through edit_batch), single-job prompts a single result."""
+    def reply(prompt):
+        if '[JOB ' not in prompt:
+            return single_result(prompt)
+        return json.dumps({'results': edit_batch(batch_results(prompt))})
+    return reply
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """Installs a FakeClient (set its .reply per test) and an empty in-memory match score cache."""
+    client = FakeClient(answer())
+    monkeypatch.setattr(ai_services, '_openai_client', client)
+    monkeypatch.setattr(ai_services, '_openai', lambda: SimpleNamespace(RateLimitError=FakeRateLimitError))
+    monkeypatch.setattr(ai_services, 'match_score_cache', TieredCache(LRUCache()))
+    monkeypatch.setattr(ai_services, 'SCORE_CACHE_ENABLED', True)
+    fake_time = FakeTime()
+    monkeypatch.setattr(ai_services, 'time', fake_time)
+    client.time = fake_time
+    return client
+
+
+# --- Batch scoring ---
+
+def test_batch_scores_come_back_in_job_order(fake_openai):
+    jobs = [job('Nurse'), job('Python Developer'), job('Accountant')]
+    assert calculate_job_match_scores_batch(jobs, CV_ANALYSIS) == [0.1, 0.9, 0.2]
+    assert len(fake_openai.prompts) == 1
+    assert jobs[1]['match_reasoning'] == 'Python Developer fits'
+
+
+def test_job_missing_from_the_batch_reply_is_scored_on_its_own(fake_openai):
+    fake_openai.reply = answer(lambda results: [r for r in results if r['id'] != '2'])
+    jobs = [job('Nurse'), job('Python Developer'), job('Accountant')]
+    assert calculate_job_match_scores_batch(jobs, CV_ANALYSIS) == [0.1, 0.9, 0.2]
+    assert len(fake_openai.prompts) == 2
+    assert jobs[1]['match_reasoning'] == 'Python Developer fits (single)'
+
+
+def test_non_numeric_score_is_scored_on_its_own(fake_openai):
+    fake_openai.reply = answer(lambda results: [dict(r, match_score='high') if r['id'] == '1' else r for r in results])
+    jobs = [job('Nurse'), job('Python Developer')]
+    assert calculate_job_match_scores_batch(jobs, CV_ANALYSIS) == [0.1, 0.9]
+    assert jobs[0]['match_reasoning'] == 'Nurse fits (single)'
+    assert jobs[1]['match_reasoning'] == 'Python Developer fits'
+
+
+def test_duplicate_id_keeps_the_first_entry(fake_openai):
+    fake_openai.reply = answer(lambda results: results + [dict(results[0], match_score=0.5, reasoning='duplicate')])
+    jobs = [job('Nurse'), job('Python Developer')]
+    assert calculate_job_match_scores_batch(jobs, CV_ANALYSIS) == [0.1, 0.9]
+    assert jobs[0]['match_reasoning'] == 'Nurse fits'
+    assert len(fake_openai.prompts) == 1
+
+
+def test_irrelevant_job_scores_zero(fake_openai):
+    fake_openai.reply = answer(lambda results: [dict(r, is_relevant=r['id'] != '1') for r in results])
+    assert calculate_job_match_scores_batch([job('Nurse'), job('Python Developer')], CV_ANALYSIS) == [0.0, 0.9]
+
+
+def test_order_is_kept_across_batches_with_single_job_fallbacks(fake_openai):
+    # Every batch drops its last job from the reply, so each batch also needs a single-job call
+    fake_openai.reply = answer(lambda results: results[:-1])
+    titles = ['Nurse', 'Python Developer', 'Accountant', 'Backend Engineer', 'Data Engineer']
+    scores = score_jobs_concurrently([job(t) for t in titles], CV_ANALYSIS, max_in_flight=3, batch_size=2, use_cache=False)
+    assert scores == [SCORES[t] for t in titles]
+    assert len(fake_openai.prompts) == 2 + 1 + 2 # Two batch calls, one call for the batch of one, two fallbacks
+
+
+# --- Rate limits and concurrency ---
+
+def test_retry_after_header_is_used_and_capped(monkeypatch):
+    monkeypatch.setattr(ai_services, 'SCORING_BACKOFF_BASE', 1.0)
+    assert _retry_after_seconds(FakeRateLimitError('7'), 0) == 7.0
+    assert _retry_after_seconds(FakeRateLimitError('120'), 0) == 60.0
+    assert 1.0 <= _retry_after_seconds(FakeRateLimitError('Wed, 21 Oct 2026 07:28:00 GMT'), 0) <= 2.0
+    assert 4.0 <= _retry_after_seconds(FakeRateLimitError(), 2) <= 5.0
+
+
+def rate_limited(times, retry_after=None):
+    """reply() that raises a 429 `times` times, then answers."""
+    calls = {'count': 0}
+
+    def reply(prompt):
+        calls['count'] += 1
+        if calls['count'] <= times:
+            raise FakeRateLimitError(retry_after)
+        return single_result(prompt)
+    return reply
+
+
+def test_rate_limited_call_is_retried_after_retry_after(fake_openai, monkeypatch):
+    monkeypatch.setattr(ai_services, 'SCORING_MAX_RETRIES', 3)
+    fake_openai.reply = rate_limited(2, retry_after='3')
+    assert calculate_job_match_score(job('Python Developer'), CV_ANALYSIS) == 0.9
+    assert len(fake_openai.prompts) == 3
+    assert fake_openai.time.sleeps == [3.0, 3.0]
+
+
+def test_attempts_stop_at_the_retry_limit(fake_openai, monkeypatch):
+    monkeypatch.setattr(ai_services, 'SCORING_MAX_RETRIES', 2)
+    fake_openai.reply = rate_limited(10)
+    with pytest.raises(FakeRateLimitError):
+        _create_completion_with_backoff(model='gpt-4o', messages=[{'role': 'user', 'content': '- Title: Nurse'}])
+    assert len(fake_openai.prompts) == 3 # The first attempt plus two retries
+    assert len(fake_openai.time.sleeps) == 2
+
+
+def test_failed_calls_give_the_default_score(fake_openai, monkeypatch):
+    monkeypatch.setattr(ai_services, 'SCORING_MAX_RETRIES', 0)
+    fake_openai.reply = rate_limited(100)
+    jobs = [job('Nurse'), job('Python Developer'), job('Accountant')]
+    assert score_jobs_concurrently(jobs, CV_ANALYSIS, batch_size=3) == [0.4, 0.4, 0.4]
+    assert all(j['match_reasoning'] == 'Error during AI scoring.' for j in jobs)
+    assert ai_services.match_score_cache.get(ai_services._match_score_cache_key(
+        jobs[0], ai_services.candidate_profile_fingerprint(CV_ANALYSIS))) is None # Defaults are not cached
+
+
+def test_calls_in_flight_are_capped(fake_openai):
+    lock = threading.Lock()
+    state = {'in_flight': 0, 'max_in_flight': 0}
+
+    def reply(prompt):
+        with lock:
+            state['in_flight'] += 1
+            state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+        time.sleep(0.05)
+        with lock:
+            state['in_flight'] -= 1
+        return single_result(prompt)
+
+    fake_openai.reply = reply
+    titles = list(SCORES) * 2
+    scores = score_jobs_concurrently([job(t) for t in titles], CV_ANALYSIS, max_in_flight=2, batch_size=1, use_cache=False)
+    assert scores == [SCORES[t] for t in titles]
+    assert state['max_in_flight'] == 2
+
+
+# --- Match score cache ---
+
+def test_cached_score_is_reused_for_the_same_profile(fake_openai):
+    assert calculate_job_match_score(job('Python Developer'), CV_ANALYSIS) == 0.9
+    same_profile = dict(CV_ANALYSIS, current_role='  senior python   developer ', name='Jane Doe') # Not a scoring input
+    cached_job = job('Python Developer')
+    assert calculate_job_match_score(cached_job, same_profile) == 0.9
+    assert cached_job['match_reasoning'] == 'Python Developer fits (single)'
+    assert len(fake_openai.prompts) == 1
+
+
+def test_changed_profile_misses_the_cache(fake_openai):
+    calculate_job_match_score(job('Python Developer'), CV_ANALYSIS)
+    calculate_job_match_score(job('Python Developer'), dict(CV_ANALYSIS, technical_skills=['Python', 'Go']))
+    assert len(fake_openai.prompts) == 2
+
+
+def test_new_prompt_version_misses_the_cache(fake_openai, monkeypatch):
+    calculate_job_match_score(job('Python Developer'), CV_ANALYSIS)
+    monkeypatch.setattr(ai_services, 'SCORING_PROMPT_VERSION', 'next')
+    calculate_job_match_score(job('Python Developer'), CV_ANALYSIS)
+    assert len(fake_openai.prompts) == 2
+
+
+def test_cache_key_uses_the_job_url():
+    fingerprint = ai_services.candidate_profile_fingerprint(CV_ANALYSIS)
+    assert ai_services._match_score_cache_key(dict(job('Nurse'), title='Renamed'), fingerprint) == \
+        ai_services._match_score_cache_key(job('Nurse'), fingerprint)
+    assert ai_services._match_score_cache_key({'title': 'No URL'}, fingerprint) is None
@@ -0,0 +1,143 @@
+import zlib
+
+import cache_utils
+from cache_utils import LRUCache, ResponseCache, SQLiteCache, TieredCache, normalize_url
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1 # 'b' is now the least recently used
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['entries'] == 2
+
+
+def test_lru_ttl_expiry(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_utils, 'time', clock)
+    cache = LRUCache(max_entries=10, ttl_seconds=60)
+    cache.set('a', 1)
+    clock.now += 59
+    assert cache.get('a') == 1
+    clock.now += 2
+    assert cache.get('a', 'missing') == 'missing'
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_sqlite_cache_round_trip_and_ttl(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_utils, 'time', clock)
+    cache = SQLiteCache(str(tmp_path / 'sub' / 'cache.sqlite3'), table='t', ttl_seconds=60)
+    cache.set('a', {'score': 0.5, 'tags': ['x']})
+    assert cache.get('a') == {'score': 0.5, 'tags': ['x']}
+    clock.now += 61
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    SQLiteCache(path, table='t').set('a', 1)
+    assert SQLiteCache(path, table='t').get('a') == 1
+    assert SQLiteCache(path, table='other').get('a') is None
+
+
+def test_sqlite_cache_values_skip_expired_entries(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_utils, 'time', clock)
+    cache = SQLiteCache(str(tmp_path / 'cache.sqlite3'), ttl_seconds=60)
+    cache.set('a', 1)
+    clock.now += 30
+    cache.set('b', [2])
+    assert sorted(cache.values(), key=str) == [1, [2]]
+    clock.now += 31
+    assert cache.values() == [[2]]
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_sqlite_cache_evicts_least_recently_accessed(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_utils, 'time', clock)
+    cache = SQLiteCache(str(tmp_path / 'cache.sqlite3'), max_entries=2)
+    for key in ('a', 'b'):
+        clock.now += 1
+        cache.set(key, key)
+    clock.now += 1
+    assert cache.get('a') == 'a' # 'b' is now the least recently accessed
+    clock.now += 1
+    cache.set('c', 'c')
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == 'a' and cache.get('c') == 'c'
+
+
+def test_sqlite_cache_does_not_touch_disk_until_used(tmp_path):
+    path = tmp_path / 'lazy' / 'cache.sqlite3'
+    cache = SQLiteCache(str(path))
+    assert not path.parent.exists()
+    cache.set('a', 1)
+    assert path.exists()
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    disk = SQLiteCache(str(tmp_path / 'cache.sqlite3'))
+    disk.set('a', 1)
+    cache = TieredCache(LRUCache(max_entries=10), disk)
+    assert cache.memory.get('a') is None
+    assert cache.get('a') == 1
+    assert cache.memory.get('a') == 1
+    cache.set('b', 2)
+    assert disk.get('b') == 2
+    cache.delete('b')
+    assert cache.get('b') is None
+
+
+def test_tiered_cache_without_disk_tier():
+    cache = TieredCache(LRUCache(max_entries=1))
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a', 'missing') == 'missing'
+    assert cache.stats()['disk'] is None
+
+
+def test_normalize_url_sorts_and_drops_params():
+    assert normalize_url('HTTPS://Example.com/jobs?b=2&trk=x&a=1#top', drop_params=('trk',)) == \
+        'https://example.com/jobs?a=1&b=2'
+
+
+def test_response_cache_freshness_and_revalidation(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_utils, 'time', clock)
+    cache = ResponseCache(ttl_seconds=60)
+    cache.set('https://example.com/a', '<html>a</html>', etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+    assert cache.get('https://example.com/a') == '<html>a</html>'
+    clock.now += 61
+    assert cache.get('https://example.com/a') is None
+    assert cache.revalidation_headers('https://example.com/a') == {
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+    assert cache.revalidated('https://example.com/a') == '<html>a</html>'
+    assert cache.get('https://example.com/a') == '<html>a</html>'
+
+
+def test_response_cache_evicts_by_compressed_size():
+    body = 'x' * 1000
+    one_entry = len(zlib.compress(body.encode('utf-8'), 6))
+    cache = ResponseCache(max_bytes=one_entry * 2)
+    for name in ('a', 'b', 'c'):
+        cache.set(f'https://example.com/{name}', body)
+    assert cache.get('https://example.com/a') is None
+    assert cache.get('https://example.com/c') == body
+    assert cache.stats()['compressed_bytes'] <= one_entry * 2
+
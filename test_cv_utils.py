@@ -0,0 +1,79 @@
+import io
+import time
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import cv_utils
+from cv_utils import extract_cv_text_from_bytes, extract_cv_text_from_upload, join_text_chunks
+
+CV_TEXT = "Jane Doe\nSenior Python Developer\nExperience\n- Built APIs\n"
+
+
+def upload(data, filename):
+    return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+
+def docx_bytes(paragraphs):
+    docx = pytest.importorskip('docx')
+    document = docx.Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture(params=[0, 1], ids=['inline', 'worker-process'])
+def extraction_workers(request, monkeypatch):
+    monkeypatch.setattr(cv_utils, 'CV_EXTRACTION_WORKERS', request.param)
+    return request.param
+
+
+def test_txt_upload_is_extracted_in_memory(extraction_workers, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    text, filename = extract_cv_text_from_upload(upload(CV_TEXT.encode('utf-8'), 'My CV.txt'))
+    assert (text, filename) == (CV_TEXT, 'My_CV.txt')
+    assert list(tmp_path.iterdir()) == [] # Nothing written to disk
+
+
+def test_docx_upload_is_extracted(extraction_workers):
+    text, _ = extract_cv_text_from_upload(upload(docx_bytes(['Jane Doe', 'Python Developer']), 'cv.docx'))
+    assert text == "Jane Doe\nPython Developer\n"
+
+
+def test_disallowed_upload_is_rejected():
+    assert extract_cv_text_from_upload(upload(b'MZ', 'cv.exe')) == ("", None)
+
+
+def test_filename_made_only_of_unsafe_characters_keeps_its_extension():
+    _, filename = extract_cv_text_from_upload(upload(b'text', '???.txt'))
+    assert filename.endswith('.txt')
+
+
+def test_text_is_cut_at_max_chars(capsys):
+    assert join_text_chunks(iter(['abc', 'def', 'ghi']), max_chars=5) == 'abcde'
+    assert 'truncated' in capsys.readouterr().out
+    assert join_text_chunks(iter(['abc']), max_chars=0) == 'abc' # 0 means no limit
+
+
+def test_text_of_exactly_max_chars_is_not_reported_as_truncated(capsys):
+    assert join_text_chunks(iter(['abc', 'de']), max_chars=5) == 'abcde'
+    assert 'truncated' not in capsys.readouterr().out
+
+
+def test_broken_pdf_gives_empty_text(extraction_workers):
+    assert extract_cv_text_from_bytes(b'%PDF-1.4 not really a pdf', 'cv.pdf') == ""
+
+
+def _hang(data, filename):
+    time.sleep(30)
+    return "never"
+
+
+def test_timeout_only_stops_that_extraction(monkeypatch):
+    monkeypatch.setattr(cv_utils, 'CV_EXTRACTION_WORKERS', 2)
+    started_at = time.monotonic()
+    assert cv_utils._extract_in_process(_hang, (b'', 'slow.pdf'), 'slow.pdf', timeout=0.5) == ""
+    assert time.monotonic() - started_at < 5
+    assert extract_cv_text_from_bytes(CV_TEXT.encode('utf-8'), 'cv.txt') == CV_TEXT
@@ -0,0 +1,85 @@
+from job_dedup import JobDedupIndex, dedupe_jobs, job_fingerprint, job_url_key, linkedin_job_id, normalize_title, simhash
+
+DESCRIPTION = ("We are looking for a backend engineer to build payment APIs in Python and Go, "
+               "run them on Kubernetes and mentor two junior developers in our Berlin office.")
+
+
+def job(url, title='Senior Python Developer', company='Acme', location='Berlin', description=DESCRIPTION):
+    return {'url': url, 'title': title, 'company': company, 'location': location, 'description': description}
+
+
+def test_linkedin_job_id_from_view_urls_and_current_job_id():
+    assert linkedin_job_id('https://de.linkedin.com/jobs/view/senior-python-developer-at-acme-3812345678?trk=x') == '3812345678'
+    assert linkedin_job_id('https://www.linkedin.com/jobs/search/?currentJobId=3812345678&keywords=python') == '3812345678'
+    assert linkedin_job_id('https://example.com/jobs/3812345678') is None
+    assert linkedin_job_id(None) is None
+
+
+def test_job_url_key_ignores_host_slug_and_tracking():
+    assert job_url_key('https://de.linkedin.com/jobs/view/python-dev-at-acme-3812345678?refId=1') == \
+        job_url_key('https://www.linkedin.com/jobs/view/3812345678/') == 'linkedin:3812345678'
+    assert job_url_key('https://example.com/careers/42?utm_source=x') == 'https://example.com/careers/42'
+
+
+def test_normalize_title_drops_gender_tags_and_punctuation():
+    assert normalize_title('Senior Python Developer (m/w/d)') == 'senior python developer'
+    assert normalize_title('Senior Python-Developer m/f/d') == 'senior python developer'
+
+
+def test_fingerprint_matches_reposts_with_cosmetic_differences():
+    assert job_fingerprint(job('a', title='Senior Python Developer (m/w/d)', company='ACME')) == \
+        job_fingerprint(job('b', title='senior python developer', company='Acme'))
+
+
+def test_simhash_distance():
+    near = DESCRIPTION.replace('two junior', 'three junior')
+    assert bin(simhash(DESCRIPTION) ^ simhash(DESCRIPTION)).count('1') == 0
+    assert bin(simhash(DESCRIPTION) ^ simhash(near)).count('1') <= 10
+    assert bin(simhash(DESCRIPTION) ^ simhash('Registered nurse for night shifts in a Hamburg hospital')).count('1') > 10
+
+
+def test_same_id_is_a_duplicate():
+    index = JobDedupIndex()
+    assert index.add(job('https://www.linkedin.com/jobs/view/dev-1111111111'))
+    assert not index.add(job('https://de.linkedin.com/jobs/view/other-slug-1111111111', title='Other', company='Other'))
+    assert index.duplicates['url'] == 1
+
+
+def test_same_fingerprint_is_a_duplicate():
+    index = JobDedupIndex()
+    assert index.add(job('https://www.linkedin.com/jobs/view/dev-1111111111'))
+    assert not index.add(job('https://www.linkedin.com/jobs/view/dev-2222222222', title='Senior Python Developer (m/w/d)'))
+    assert index.duplicates['fingerprint'] == 1
+
+
+def test_near_identical_posting_from_same_company_is_a_duplicate():
+    index = JobDedupIndex(max_distance=3)
+    assert index.add(job('https://www.linkedin.com/jobs/view/dev-1111111111'))
+    # Same posting with the location spelled differently: a different fingerprint, 3 bits apart
+    assert not index.add(job('https://www.linkedin.com/jobs/view/dev-2222222222', location='Berlin (Hybrid)'))
+    assert index.duplicates['simhash'] == 1
+    # Identical text from another company is a different job
+    assert index.add(job('https://www.linkedin.com/jobs/view/dev-3333333333', company='Globex'))
+
+
+def test_simhash_check_can_be_disabled():
+    index = JobDedupIndex(max_distance=-1)
+    assert index.add(job('https://www.linkedin.com/jobs/view/dev-1111111111'))
+    assert index.add(job('https://www.linkedin.com/jobs/view/dev-2222222222', location='Berlin (Hybrid)'))
+
+
+def test_postings_further_apart_than_the_threshold_are_kept():
+    index = JobDedupIndex(max_distance=3)
+    assert index.add(job('https://www.linkedin.com/jobs/view/dev-1111111111'))
+    # One word added to a short posting already moves its SimHash 4+ bits
+    assert index.add(job('https://www.linkedin.com/jobs/view/dev-2222222222', title='Senior Python Developer - Payments'))
+
+
+def test_different_roles_are_kept():
+    jobs = [
+        job('https://www.linkedin.com/jobs/view/dev-1111111111'),
+        job('https://www.linkedin.com/jobs/view/dev-2222222222', title='Data Engineer',
+            description='Build Spark pipelines and a data warehouse on AWS for our analytics team in Munich.'),
+        job('https://www.linkedin.com/jobs/view/dev-1111111111?trk=again'),
+    ]
+    assert [j['url'] for j in dedupe_jobs(jobs)] == [jobs[0]['url'], jobs[1]['url']]
@@ -0,0 +1,56 @@
+import job_prefilter
+from job_prefilter import cv_profile_text, job_similarities, job_text, prefilter_jobs
+
+CV_ANALYSIS = {
+    'current_role': 'Senior Python Developer',
+    'target_job_titles': ['Backend Engineer', 'Python Developer'],
+    'technical_skills': ['Python', 'Django', 'PostgreSQL', 'Kubernetes'],
+    'industry': 'Software',
+}
+
+
+def job(title, description=''):
+    return {'title': title, 'company': 'Acme', 'description': description}
+
+
+JOBS = [
+    job('Registered Nurse', 'Night shifts on a cardiology ward.'),
+    job('Python Developer', 'Build Django services on PostgreSQL and Kubernetes.'),
+    job('Sales Manager', 'Grow our enterprise accounts in DACH.'),
+    job('Backend Engineer (Python)', 'APIs in Python and Django.'),
+    job('Accountant', 'Monthly closing and VAT returns.'),
+]
+
+
+def test_relevant_jobs_rank_first():
+    kept = prefilter_jobs(JOBS, CV_ANALYSIS, keep_ratio=0.4, min_keep=1)
+    assert {j['title'] for j in kept} == {'Python Developer', 'Backend Engineer (Python)'}
+
+
+def test_keeps_at_least_min_keep_and_returns_everything_when_nothing_would_be_dropped():
+    assert len(prefilter_jobs(JOBS, CV_ANALYSIS, keep_ratio=0.1, min_keep=3)) == 3
+    assert prefilter_jobs(JOBS, CV_ANALYSIS, keep_ratio=1.0, min_keep=1) == JOBS
+    assert prefilter_jobs([], CV_ANALYSIS) == []
+
+
+def test_disabled_prefilter_keeps_order(monkeypatch):
+    monkeypatch.setattr(job_prefilter, 'PREFILTER_ENABLED', False)
+    assert prefilter_jobs(JOBS, CV_ANALYSIS, keep_ratio=0.1, min_keep=1) == JOBS
+
+
+def test_similarities_are_cosines_in_job_order():
+    similarities = job_similarities(JOBS, CV_ANALYSIS)
+    assert similarities.shape == (len(JOBS),)
+    assert all(0.0 <= s <= 1.0 + 1e-6 for s in similarities)
+    assert similarities[1] > similarities[0] and similarities[3] > similarities[4]
+
+
+def test_linkedin_placeholder_description_is_ignored():
+    placeholder = job('Python Developer', 'Details for Python Developer at Acme available on LinkedIn.')
+    assert job_text(placeholder) == 'Python Developer Python Developer '
+
+
+def test_profile_weighs_titles_twice():
+    profile = cv_profile_text(CV_ANALYSIS)
+    assert profile.count('Senior Python Developer') == 2
+    assert 'Kubernetes' in profile
@@ -0,0 +1,83 @@
+import job_store
+from job_store import JobStore
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def job(n, title='Python Developer'):
+    return {'url': f"https://www.linkedin.com/jobs/view/{n}", 'title': title, 'company': 'Acme', 'location': 'Berlin',
+            'description': 'Django', 'source': 'LinkedIn', 'posted_date': '2026-10-01', 'salary': 'Not specified'}
+
+
+def store(tmp_path, monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(job_store, 'time', clock)
+    return JobStore(str(tmp_path / 'jobs.sqlite3'), **kwargs), clock
+
+
+def test_page_round_trip_keeps_order_and_normalizes_the_query(tmp_path, monkeypatch):
+    jobs_db, _ = store(tmp_path, monkeypatch)
+    jobs = [job(3), job(1, 'Backend Engineer'), job(2)]
+    jobs_db.save_page('Python  Developer', 'Berlin', 0, jobs)
+    assert jobs_db.get_page('python developer', ' BERLIN ', 0) == jobs
+    assert jobs_db.get_page('python developer', 'Berlin', 1) is None
+    assert jobs_db.get_page('python developer', 'Munich', 0) is None
+
+
+def test_page_expires_after_the_ttl(tmp_path, monkeypatch):
+    jobs_db, clock = store(tmp_path, monkeypatch, page_ttl_seconds=60)
+    jobs_db.save_page('python', 'Berlin', 0, [job(1)])
+    clock.now += 60
+    assert jobs_db.get_page('python', 'Berlin', 0) == [job(1)]
+    clock.now += 1
+    assert jobs_db.get_page('python', 'Berlin', 0) is None
+    assert jobs_db.get_page('python', 'Berlin', 0, max_age_seconds=3600) == [job(1)]
+
+
+def test_pages_and_jobs_past_the_retention_are_pruned_and_refetched(tmp_path, monkeypatch):
+    jobs_db, clock = store(tmp_path, monkeypatch, page_ttl_seconds=3600, retention_seconds=100)
+    jobs_db.save_page('python', 'Berlin', 0, [job(1), job(2)])
+    clock.now += 50
+    jobs_db.save_page('django', 'Berlin', 0, [job(2)]) # Job 2 is refreshed, job 1 is not
+    clock.now += 60
+    jobs_db.save_page('flask', 'Berlin', 0, [job(3)]) # Prunes everything fetched more than 100s ago
+    assert jobs_db.get_page('python', 'Berlin', 0, max_age_seconds=3600) is None
+    assert jobs_db.get_page('django', 'Berlin', 0) == [job(2)]
+
+    jobs_db.save_page('python', 'Berlin', 0, [job(1), job(2)]) # The caller fetched the page again
+    assert jobs_db.get_page('python', 'Berlin', 0) == [job(1), job(2)]
+
+
+def test_page_with_a_missing_job_row_is_a_miss(tmp_path, monkeypatch):
+    jobs_db, _ = store(tmp_path, monkeypatch)
+    jobs_db.save_page('python', 'Berlin', 0, [job(1), job(2)])
+    with jobs_db._conn:
+        jobs_db._conn.execute("DELETE FROM jobs WHERE url = ?", (job(2)['url'],)) # Pruned by another process
+    assert jobs_db.get_page('python', 'Berlin', 0) is None
+    jobs_db.save_page('python', 'Berlin', 0, [job(1), job(2)])
+    assert jobs_db.get_page('python', 'Berlin', 0) == [job(1), job(2)]
+
+
+def test_upsert_keeps_one_row_per_job_url(tmp_path, monkeypatch):
+    jobs_db, _ = store(tmp_path, monkeypatch)
+    jobs_db.save_page('python', 'Berlin', 0, [job(1)])
+    jobs_db.save_page('django', 'Berlin', 0, [job(1, 'Senior Python Developer')])
+    assert jobs_db.get_page('python', 'Berlin', 0)[0]['title'] == 'Senior Python Developer'
+    assert jobs_db.stats()['jobs'] == 1
+
+
+def test_stats(tmp_path, monkeypatch):
+    jobs_db, _ = store(tmp_path, monkeypatch)
+    assert jobs_db.stats() == {'jobs': 0, 'pages': 0, 'page_hits': 0, 'page_misses': 0, 'page_hit_rate': 0.0}
+    jobs_db.save_page('python', 'Berlin', 0, [job(1), job(2)])
+    jobs_db.save_page('python', 'Berlin', 1, [])
+    jobs_db.get_page('python', 'Berlin', 0)
+    jobs_db.get_page('python', 'Berlin', 1)
+    jobs_db.get_page('python', 'Berlin', 2)
+    assert jobs_db.stats() == {'jobs': 2, 'pages': 2, 'page_hits': 2, 'page_misses': 1, 'page_hit_rate': 2 / 3}
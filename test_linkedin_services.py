@@ -0,0 +1,84 @@
+import glob
+import os
+
+import pytest
+
+import linkedin_services
+from cache_utils import ResponseCache
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), 'benchmarks', 'fixtures', 'linkedin_guest_search_page_*.html')))
+URL = 'https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords=python&start=0'
+
+
+class FakeResponse:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.headers = {}
+
+
+class FakeSession:
+    """Answers the conditional GET with 304 and any other GET with the page."""
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers)
+        return FakeResponse(304) if len(self.requests) == 1 else FakeResponse(200, '<li>job</li>')
+
+
+class FakeRateLimiter:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.acquired = 0
+
+    def acquire(self, stop_event=None):
+        if self.acquired == self.tokens:
+            return False
+        self.acquired += 1
+        return True
+
+
+@pytest.fixture
+def rate_limiter(monkeypatch):
+    monkeypatch.setattr(linkedin_services, 'linkedin_response_cache', ResponseCache()) # Empty: the 304'd entry is gone
+    limiter = FakeRateLimiter(tokens=2)
+    monkeypatch.setattr(linkedin_services, 'get_host_rate_limiter', lambda url: limiter)
+    return limiter
+
+
+def test_refetch_after_304_for_an_evicted_entry_takes_a_token(rate_limiter):
+    session = FakeSession()
+    assert linkedin_services._fetch_page_html(session, {}, URL, 'page 1', None) == ('<li>job</li>', True)
+    assert rate_limiter.acquired == 2 and len(session.requests) == 2
+
+
+def test_refetch_after_304_is_skipped_when_no_token_is_granted(rate_limiter):
+    rate_limiter.tokens = 1
+    session = FakeSession()
+    assert linkedin_services._fetch_page_html(session, {}, URL, 'page 1', None) == (None, False)
+    assert len(session.requests) == 1
+
+
+def test_placeholder_proxy_password_is_not_configured():
+    assert linkedin_services.bright_data_password_configured({'password': 'secret'})
+    for password in (None, '', 'YOUR_BRIGHTDATA_PASSWORD_PLACEHOLDER', 'YOUR_BRIGHTDATA_PASSWORD_PLACEHOLDER_FROM_APP_PY'):
+        assert not linkedin_services.bright_data_password_configured({'password': password})
+
+
+@pytest.mark.parametrize('backend', ['lxml', 'selectolax'])
+@pytest.mark.parametrize('fixture', FIXTURES, ids=os.path.basename)
+def test_parser_backends_match_beautifulsoup(fixture, backend, capsys):
+    if backend not in linkedin_services.available_parser_backends():
+        pytest.skip(f"{backend} is not installed")
+    with open(fixture, encoding='utf-8') as f:
+        html = f.read()
+    expected = linkedin_services.parse_linkedin_html(html, 'Berlin', backend='bs4')
+    jobs = linkedin_services.parse_linkedin_html(html, 'Berlin', backend=backend)
+    assert 'falling back' not in capsys.readouterr().out # A failing backend would silently return the bs4 result
+    assert expected
+    assert len(jobs) == len(expected)
+    for job, expected_job in zip(jobs, expected):
+        assert job == expected_job
@@ -0,0 +1,75 @@
+import multiprocessing
+
+import pytest
+
+import metrics
+from cache_utils import SQLiteCache
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    for name in ('_counters', '_histograms', '_collectors', '_help'):
+        monkeypatch.setattr(metrics, name, {})
+    monkeypatch.setattr(metrics, '_shared_store', None)
+
+
+def test_counters_histograms_and_collectors_in_exposition_format():
+    metrics.inc('openai_tokens', 120, 'OpenAI tokens used', model='gpt-4o', kind='prompt')
+    metrics.inc('openai_tokens', 30, model='gpt-4o', kind='completion')
+    metrics.observe_stage('scoring', 0.2)
+    metrics.register_collector('job_store', lambda: {'jobs': 3, 'pages': {'fresh': 1}, 'enabled': True, 'path': 'x'})
+    lines = metrics.render_prometheus().splitlines()
+
+    assert lines[:4] == [
+        '# HELP ai_job_finder_openai_tokens_total OpenAI tokens used',
+        '# TYPE ai_job_finder_openai_tokens_total counter',
+        'ai_job_finder_openai_tokens_total{kind="completion",model="gpt-4o"} 30',
+        'ai_job_finder_openai_tokens_total{kind="prompt",model="gpt-4o"} 120',
+    ]
+    assert '# TYPE ai_job_finder_stage_duration_seconds histogram' in lines
+    assert 'ai_job_finder_stage_duration_seconds_bucket{stage="scoring",le="0.1"} 0' in lines
+    assert 'ai_job_finder_stage_duration_seconds_bucket{stage="scoring",le="0.25"} 1' in lines
+    assert 'ai_job_finder_stage_duration_seconds_bucket{stage="scoring",le="+Inf"} 1' in lines
+    assert 'ai_job_finder_stage_duration_seconds_count{stage="scoring"} 1' in lines
+    assert 'ai_job_finder_stage_duration_seconds_sum{stage="scoring"} 0.200000' in lines
+    assert lines[-6:] == [
+        '# TYPE ai_job_finder_job_store_jobs gauge', 'ai_job_finder_job_store_jobs 3',
+        '# TYPE ai_job_finder_job_store_pages_fresh gauge', 'ai_job_finder_job_store_pages_fresh 1',
+        '# TYPE ai_job_finder_job_store_enabled gauge', 'ai_job_finder_job_store_enabled 1',
+    ]
+
+
+def test_label_values_are_escaped():
+    metrics.inc('linkedin_responses', 1, status='a"b\\c')
+    assert 'ai_job_finder_linkedin_responses_total{status="a\\"b\\\\c"} 1' in metrics.render_prometheus()
+
+
+def test_failing_collector_is_skipped():
+    metrics.register_collector('broken', lambda: 1 / 0)
+    metrics.register_collector('ok', lambda: {'entries': 2})
+    assert metrics.render_prometheus().splitlines()[-1] == 'ai_job_finder_ok_entries 2'
+
+
+def _record_in_worker():
+    metrics.inc('proxy_bytes', 200, 'Response bytes received through the proxy', host='linkedin')
+    metrics.observe_stage('scoring', 2)
+    metrics._publish_snapshot()
+
+
+def test_shared_store_adds_up_all_processes(tmp_path):
+    metrics.share_across_processes(SQLiteCache(str(tmp_path / 'metrics.sqlite3'), table='metrics'), publish_interval=60)
+    worker = multiprocessing.get_context('fork').Process(target=_record_in_worker)
+    worker.start()
+    worker.join(10)
+    assert worker.exitcode == 0
+    metrics.inc('proxy_bytes', 50, host='linkedin')
+    metrics.observe_stage('scoring', 0.2)
+
+    text = metrics.render_prometheus()
+    assert 'ai_job_finder_proxy_bytes_total{host="linkedin"} 250' in text
+    assert '# HELP ai_job_finder_proxy_bytes_total Response bytes received through the proxy' in text
+    assert 'ai_job_finder_stage_duration_seconds_bucket{stage="scoring",le="0.25"} 1' in text
+    assert 'ai_job_finder_stage_duration_seconds_count{stage="scoring"} 2' in text
+
+    metrics.reset()
+    assert 'proxy_bytes' not in metrics.render_prometheus()
@@ -0,0 +1,67 @@
+from prompt_utils import PAGE_BREAK, compact_cv_text, count_tokens, normalize_cv_lines, split_cv_sections
+
+TWO_JOBS_CV = """Jane Doe
+Experience
+Software Engineer
+Acme
+2019
+- Built APIs
+Software Engineer
+Globex
+2016
+- Built APIs
+"""
+
+
+def test_years_and_repeated_titles_under_other_employers_are_kept():
+    lines = normalize_cv_lines(TWO_JOBS_CV)
+    assert lines.count('Software Engineer') == 2
+    assert lines.count('- Built APIs') == 2
+    assert '2019' in lines and '2016' in lines
+
+
+def test_adjacent_repeated_line_is_kept_once():
+    assert normalize_cv_lines("Skills\nPython, SQL\nPython, SQL\n") == ['Skills', 'Python, SQL']
+
+
+def test_whitespace_and_blank_lines_are_collapsed():
+    assert normalize_cv_lines("  Jane \t Doe \r\n\n\n\nSummary\n\n") == ['Jane Doe', '', 'Summary']
+
+
+def test_page_numbers_and_running_headers_are_removed_at_page_breaks():
+    text = PAGE_BREAK.join([
+        "Jane Doe - Resume\nExperience\nEngineer at Acme\n2019\nPage 1 of 2\n",
+        "Jane Doe - Resume\n- Built APIs\nEducation\nBSc Computer Science\n2\n",
+    ])
+    assert normalize_cv_lines(text) == [
+        'Jane Doe - Resume', 'Experience', 'Engineer at Acme', '2019', '',
+        '- Built APIs', 'Education', 'BSc Computer Science',
+    ]
+
+
+def test_numbers_inside_a_page_are_not_page_numbers():
+    assert normalize_cv_lines("Jane Doe\nAwards\n3\nfirst places\n2020\nEnd\nof CV") == \
+        ['Jane Doe', 'Awards', '3', 'first places', '2020', 'End', 'of CV']
+
+
+def test_boilerplate_is_removed():
+    assert normalize_cv_lines("Curriculum Vitae\nJane Doe\n-----\nReferences available on request") == ['Jane Doe']
+
+
+def test_text_within_budget_is_returned_unchanged():
+    text = TWO_JOBS_CV + "\n\n\nPage 1\n"
+    assert compact_cv_text(text, max_tokens=10000) == text
+    assert compact_cv_text(text) == text
+
+
+def test_low_priority_sections_are_dropped_first():
+    text = "Jane Doe\nExperience\n- Built APIs for payments\nHobbies\n" + ''.join(f"Hiking trip number {i}\n" for i in range(40))
+    compacted = compact_cv_text(text, max_tokens=20)
+    assert 'Hiking' not in compacted
+    assert 'Built APIs' in compacted
+    assert count_tokens(compacted) <= 20
+
+
+def test_split_cv_sections_recognises_headings():
+    sections = split_cv_sections(['Jane Doe', 'Work Experience:', 'Engineer', 'Skills', 'Python'])
+    assert [name for name, _ in sections] == ['header', 'experience', 'skills']
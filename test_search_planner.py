@@ -0,0 +1,75 @@
+import threading
+
+from search_planner import WAIT, SearchTermPlanner
+
+
+def drain(planner, new_jobs_by_term, cards_per_page=25):
+    """Fetches pages one at a time; new_jobs_by_term[term] lists the new jobs each of its pages brings."""
+    fetched = []
+    while True:
+        planned = planner.next_page()
+        if planned is None:
+            return fetched
+        term_index, term, page_num = planned
+        fetched.append((term, page_num))
+        yields = new_jobs_by_term[term]
+        new_jobs = yields[page_num] if page_num < len(yields) else 0
+        planner.record(term_index, page_num, cards_per_page, new_jobs)
+
+
+def test_every_term_gets_its_first_page_in_order():
+    planner = SearchTermPlanner(['python', 'django', 'flask'], target_jobs=1000, max_requests=3)
+    fetched = drain(planner, {'python': [25], 'django': [25], 'flask': [25]})
+    assert fetched == [('python', 0), ('django', 0), ('flask', 0)]
+    assert planner.stop_reason == 'request budget used'
+
+
+def test_budget_goes_to_the_term_with_the_best_yield():
+    planner = SearchTermPlanner(['python', 'django'], target_jobs=1000, max_requests=5, overlap_threshold=0.9)
+    fetched = drain(planner, {'python': [25, 24, 23, 22], 'django': [10, 10, 10]})
+    assert fetched == [('python', 0), ('django', 0), ('python', 1), ('python', 2), ('python', 3)]
+    assert planner.summary()['network_requests'] == 5
+
+
+def test_term_stops_on_overlap_or_empty_page():
+    planner = SearchTermPlanner(['python', 'django'], target_jobs=1000, max_requests=10, overlap_threshold=0.8)
+    drain(planner, {'python': [25, 3], 'django': [0]})
+    reasons = {t['term']: t['stop_reason'] for t in planner.summary()['terms']}
+    assert reasons == {'python': '88% overlap with earlier results', 'django': 'no new jobs'}
+    assert planner.stop_reason == 'all terms exhausted'
+
+
+def test_page_limit_per_term():
+    planner = SearchTermPlanner(['python'], target_jobs=1000, max_requests=10, max_pages_per_term=2)
+    assert drain(planner, {'python': [25, 25, 25]}) == [('python', 0), ('python', 1)]
+    assert planner.summary()['terms'][0]['stop_reason'] == 'page limit'
+
+
+def test_stops_at_job_target():
+    planner = SearchTermPlanner(['python', 'django'], target_jobs=40, max_requests=10)
+    assert drain(planner, {'python': [25, 25], 'django': [25]}) == [('python', 0), ('django', 0)]
+    assert planner.stop_reason == 'target reached'
+
+
+def test_cache_hits_do_not_use_request_budget():
+    planner = SearchTermPlanner(['python'], target_jobs=1000, max_requests=1, max_pages_per_term=5)
+    term_index, _, page_num = planner.next_page()
+    planner.record(term_index, page_num, 25, 25, from_network=False)
+    assert planner.next_page() == (0, 'python', 1)
+
+
+def test_poll_waits_for_pages_in_flight():
+    planner = SearchTermPlanner(['python'], target_jobs=1000, max_requests=10)
+    first = planner.poll_next_page()
+    assert first == (0, 'python', 0)
+    assert planner.poll_next_page() is WAIT # The only term is in flight
+    planner.record(0, 0, 25, 25)
+    assert planner.poll_next_page() == (0, 'python', 1)
+
+
+def test_stop_event_ends_the_search():
+    planner = SearchTermPlanner(['python', 'django'], target_jobs=1000)
+    stop_event = threading.Event()
+    stop_event.set()
+    assert planner.next_page(stop_event) is None
+    assert planner.stop_reason == 'stopped'
@@ -0,0 +1,59 @@
+import json
+
+from stream_utils import IncrementalJSONFieldParser
+
+RESPONSE = {
+    'tailored_cv': 'Jane Doe\n"Senior" engineer — café \U0001F680\\done',
+    'recommendations': ['Lead with Python', 'Mention "Kubernetes"'],
+}
+
+
+def parse_in_chunks(text, size):
+    parser = IncrementalJSONFieldParser(string_fields=['tailored_cv'], list_fields=['recommendations'])
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events
+
+
+def collect(events):
+    cv = ''.join(value for field, value in events if field == 'tailored_cv')
+    recommendations = [value for field, value in events if field == 'recommendations']
+    return cv, recommendations
+
+
+def test_any_chunking_gives_the_same_values():
+    for ensure_ascii in (True, False):
+        text = json.dumps(RESPONSE, ensure_ascii=ensure_ascii, indent=2)
+        for size in (1, 2, 3, 7, len(text)):
+            assert collect(parse_in_chunks(text, size)) == (RESPONSE['tailored_cv'], RESPONSE['recommendations'])
+
+
+def test_string_field_is_emitted_before_the_object_is_complete():
+    parser = IncrementalJSONFieldParser(string_fields=['tailored_cv'])
+    assert parser.feed('{"tailored_cv": "Jane') == [('tailored_cv', 'Jane')]
+    assert parser.feed(' Doe') == [('tailored_cv', ' Doe')]
+    assert parser.feed('"}') == []
+
+
+def test_list_items_are_emitted_whole():
+    parser = IncrementalJSONFieldParser(list_fields=['recommendations'])
+    assert parser.feed('{"recommendations": ["Lead with') == []
+    assert parser.feed(' Python", "Add') == [('recommendations', 'Lead with Python')]
+    assert parser.feed(' metrics"]}') == [('recommendations', 'Add metrics')]
+
+
+def test_fields_of_the_wrong_type_and_other_keys_are_skipped():
+    parser = IncrementalJSONFieldParser(string_fields=['tailored_cv'], list_fields=['recommendations'])
+    events = parser.feed('{"note": "tailored_cv", "tailored_cv": ["x"], "recommendations": "y", "tailored_cv": "ok"}')
+    assert events == [('tailored_cv', 'ok')]
+
+
+def test_sse_event_framing():
+    from app import _sse_event
+    frame = _sse_event('job', {'job': {'title': 'Line one\nline two'}})
+    assert frame.endswith('\n\n')
+    lines = frame[:-2].split('\n')
+    assert lines[0] == 'event: job'
+    assert len(lines) == 2 and lines[1].startswith('data: ') # Newlines in the payload stay escaped
+    assert json.loads(lines[1][len('data: '):]) == {'job': {'title': 'Line one\nline two'}}
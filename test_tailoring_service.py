@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+import tailoring_service
+from cache_utils import LRUCache
+from tailoring_service import TailoringService
+from task_queue import TaskManager, TaskQueueFull
+
+CV = "Jane Doe\nSenior Python Developer\n"
+JOB = {'title': 'Backend Engineer', 'company': 'Acme', 'url': 'https://www.linkedin.com/jobs/view/1111111111'}
+
+
+@pytest.fixture
+def fake_tailoring(monkeypatch):
+    """Replaces the OpenAI call; each call blocks until `release` is set and is counted."""
+    state = {'calls': 0, 'release': threading.Event()}
+
+    def tailor_cv_with_ai(original_cv_text, job_details):
+        state['calls'] += 1
+        state['release'].wait(5)
+        return {'tailored_cv': f"Tailored for {job_details['title']}", 'recommendations': ['Lead with Python']}
+
+    monkeypatch.setattr(tailoring_service, 'tailor_cv_with_ai', tailor_cv_with_ai)
+    return state
+
+
+def test_identical_requests_share_one_task_and_hit_the_cache_afterwards(fake_tailoring):
+    service = TailoringService(TaskManager(max_workers=2), LRUCache())
+    _, first = service.submit(CV, JOB)
+    _, second = service.submit(CV, dict(JOB))
+    assert first is second
+    fake_tailoring['release'].set()
+    assert service.tailor(CV, JOB)['tailored_cv'] == 'Tailored for Backend Engineer'
+    cached, task = service.submit(CV, JOB)
+    assert task is None and cached['recommendations'] == ['Lead with Python']
+    assert fake_tailoring['calls'] == 1
+
+
+def test_cached_results_are_copies(fake_tailoring):
+    fake_tailoring['release'].set()
+    service = TailoringService(TaskManager(max_workers=1), LRUCache())
+    service.tailor(CV, JOB)['recommendations'].append('mutated')
+    assert service.get_cached(CV, JOB)['recommendations'] == ['Lead with Python']
+
+
+def test_cache_key_ignores_cv_whitespace_and_uses_the_job_url():
+    assert TailoringService.cache_key(CV, JOB) == TailoringService.cache_key("  Jane  Doe\n\nSenior Python Developer ", JOB)
+    assert TailoringService.cache_key(CV, JOB) == TailoringService.cache_key(CV, dict(JOB, title='Renamed'))
+    assert TailoringService.cache_key(CV, JOB) != TailoringService.cache_key(CV, dict(JOB, url='https://example.com/2'))
+
+
+def test_cache_key_changes_with_the_prompt_version_and_model(monkeypatch):
+    key = TailoringService.cache_key(CV, JOB)
+    monkeypatch.setattr(tailoring_service, 'TAILOR_PROMPT_VERSION', 'next')
+    assert TailoringService.cache_key(CV, JOB) != key
+    monkeypatch.undo()
+    monkeypatch.setattr(tailoring_service, 'TAILORING_MODEL', 'gpt-4o-mini')
+    assert TailoringService.cache_key(CV, JOB) != key
+
+
+def test_errors_are_raised_to_the_caller(monkeypatch):
+    def tailor_cv_with_ai(original_cv_text, job_details):
+        raise ValueError('model returned invalid JSON')
+
+    monkeypatch.setattr(tailoring_service, 'tailor_cv_with_ai', tailor_cv_with_ai)
+    service = TailoringService(TaskManager(max_workers=1), LRUCache())
+    with pytest.raises(ValueError):
+        service.tailor(CV, JOB, timeout=5)
+    assert service.get_cached(CV, JOB) is None
+
+
+def test_queue_depth_is_bounded(fake_tailoring):
+    service = TailoringService(TaskManager(max_workers=1, max_queue_depth=1), LRUCache())
+    service.submit(CV, JOB)
+    with pytest.raises(TaskQueueFull):
+        service.submit(CV, dict(JOB, url='https://www.linkedin.com/jobs/view/2222222222'))
+    fake_tailoring['release'].set()
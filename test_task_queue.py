@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from cache_utils import SQLiteCache
+from task_queue import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, TaskManager, TaskQueueFull
+
+
+def blocked(task, release, started=None):
+    """Task body that waits for `release`; `started` is set once it runs."""
+    if started is not None:
+        started.set()
+    release.wait(5)
+    return 'done'
+
+
+def until_cancelled(task, started):
+    """Task body that reports progress until it is cancelled."""
+    started.set()
+    step = 0
+    while not task.is_cancelled():
+        step += 1
+        task.update({'step': step})
+        time.sleep(0.01)
+    return step
+
+
+def wait_for_status(manager, task_id, status, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = manager.snapshot(task_id)
+        if data is not None and data['status'] == status:
+            return data
+        time.sleep(0.01)
+    raise AssertionError(f"task {task_id} never reached {status}: {manager.snapshot(task_id)}")
+
+
+def test_result_and_error_are_kept():
+    manager = TaskManager(max_workers=1)
+    ok = manager.wait(manager.submit('test', lambda task: {'jobs': 3}), timeout=5)
+    assert (ok.status, ok.result) == (SUCCEEDED, {'jobs': 3})
+
+    def fail(task):
+        raise ValueError('proxy down')
+    failed = manager.wait(manager.submit('test', fail), timeout=5)
+    assert (failed.status, failed.error) == (FAILED, 'proxy down')
+    assert isinstance(failed.exception, ValueError)
+
+
+def test_queue_depth_counts_queued_and_running_tasks():
+    manager = TaskManager(max_workers=1, max_queue_depth=2)
+    release, started = threading.Event(), threading.Event()
+    running = manager.submit('test', blocked, release, started)
+    queued = manager.submit('test', blocked, release)
+    with pytest.raises(TaskQueueFull):
+        manager.submit('test', blocked, release)
+    assert started.wait(5)
+    assert manager.stats() == {'tasks': {RUNNING: 1, QUEUED: 1}, 'max_queue_depth': 2}
+    release.set()
+    manager.wait(running, timeout=5)
+    manager.wait(queued, timeout=5)
+    assert manager.wait(manager.submit('test', blocked, release), timeout=5).status == SUCCEEDED # Finished tasks free their slots
+
+
+def test_cancelling_a_queued_task_means_it_never_runs():
+    manager = TaskManager(max_workers=1)
+    release = threading.Event()
+    manager.submit('test', blocked, release)
+    calls = []
+    queued = manager.submit('test', lambda task: calls.append(task.id))
+    assert manager.cancel(queued.id)['status'] == CANCELLED
+    release.set()
+    manager.wait(queued, timeout=5)
+    assert queued.status == CANCELLED and calls == []
+
+
+def test_cancelling_a_running_task_signals_it():
+    manager = TaskManager(max_workers=1)
+    started = threading.Event()
+    task = manager.submit('test', until_cancelled, started)
+    assert started.wait(5)
+    manager.cancel(task.id)
+    manager.wait(task, timeout=5)
+    assert task.status == CANCELLED and task.result >= 1
+    assert manager.cancel('unknown') is None
+
+
+def test_finished_tasks_expire_after_the_ttl():
+    manager = TaskManager(max_workers=1, result_ttl_seconds=0)
+    task = manager.wait(manager.submit('test', lambda task: 1), timeout=5)
+    time.sleep(0.01)
+    manager.submit('test', lambda task: 2) # Expiry runs on submit
+    assert manager.get(task.id) is None
+
+
+def test_other_process_reads_snapshots_and_cancels_through_the_shared_store(tmp_path):
+    path = str(tmp_path / 'tasks.sqlite3')
+    runner = TaskManager(max_workers=1, shared_store=SQLiteCache(path, table='tasks'), publish_interval=0)
+    other = TaskManager(max_workers=1, shared_store=SQLiteCache(path, table='tasks'))
+    started = threading.Event()
+    task = runner.submit('search', until_cancelled, started)
+    assert started.wait(5)
+
+    data = wait_for_status(other, task.id, RUNNING)
+    assert data['kind'] == 'search' and 'partial_results' in data
+    assert 'partial_results' not in other.snapshot(task.id, include_partial=False)
+
+    assert other.cancel(task.id)['status'] == RUNNING # Flagged; the runner stops at its next progress report
+    runner.wait(task, timeout=5)
+    data = wait_for_status(other, task.id, CANCELLED)
+    assert data['result'] == task.result and data['finished_at'] is not None
+    assert other.snapshot('unknown') is None